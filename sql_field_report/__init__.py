@@ -1,2 +1,13 @@
-from .sql_field_report import build_dataframe_field_report, build_sql_field_report
-from .utils.file_utils import read_file
+from .sql_field_report import (
+    build_async_field_report,
+    build_csv_field_report,
+    build_dataframe_field_report,
+    build_diff_report,
+    build_file_field_report,
+    build_reclassified_field_report,
+    build_sql_field_report,
+)
+from .utils.analysis import iter_field_report
+from .utils.async_analysis import aiter_field_report, get_async_engine_data
+from .utils.file_utils import expand_workbooks, read_file
+from .utils.report_writer import CsvReportWriter
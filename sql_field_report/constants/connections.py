@@ -0,0 +1,16 @@
+"""Contains connection pool settings"""
+
+# connections kept open for the whole run, and extra connections allowed under load
+POOL_SIZE = 8
+POOL_MAX_OVERFLOW = 0
+# seconds to wait for a free pooled connection
+POOL_TIMEOUT = 30
+# pooled connections are replaced after this many seconds, before servers drop them
+POOL_RECYCLE = 1800
+
+# failed connection attempts are retried this many times, waiting
+# CONNECT_BACKOFF * 2 ** attempt seconds between attempts
+CONNECT_RETRIES = 3
+CONNECT_BACKOFF = 0.5
+
+MSSQL_ODBC_DRIVER = "ODBC Driver 17 for SQL Server"
@@ -5,6 +5,8 @@ CURRENCY = "Currency"
 PERCENTAGE = "Percentage"
 MULTIPLIER = "Multiplier"
 NUMBER = "Number"
+# the datatypes of values matching NUMBER_REGEX
+NUMBER_TYPES = [CURRENCY, PERCENTAGE, MULTIPLIER, NUMBER]
 
 EMPTY = "Empty"
 
@@ -15,3 +17,16 @@ DATETIME = "Date and Time"
 SINGLE_LINE = "Single Line"
 MULTI_LINE = "Multi Line"
 MULTI_LINE_THRESHOLD = 80
+
+# CHOICE DETECTION
+CHOICE_DISTINCT_THRESHOLD = 10
+CHOICE_RATIO_THRESHOLD = 0.05
+
+# DATATYPE ESTIMATION RULES
+NUMBER_REGEX = r"^[0-9.,%xXmMbnB$£€GBPUSDEUR]+$"
+EMAIL_REGEX = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
+DATE_REGEX = r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}|\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}|\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}|\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}|\d{2,4}-\d{2}-\d{2,4}|\d{4}\/\d{2}\/\d{2} \d{2}:\d{2}:\d{2}\.\d{3}|\d{4}\/\d{2}\/\d{2} \d{2}:\d{2}:\d{2}|\d{2,4}\/\d{2}\/\d{2,4})"
+# the datatype estimated from the most common values must match this share of
+# all populated values, and a rule matching this share of them is used instead
+TYPE_MATCH_RATIO = 0.5
+CURRENCY_INDICATORS = ["m", "M", "bn", "B", "£", "$", "€", "GBP", "USD", "EUR"]
@@ -20,15 +20,109 @@ FIELD_REPORT_SCHEMA = [
     CHOICES,
 ]
 
+# optional field report columns, only added by some report options
+MINIMUM = "Min"
+MAXIMUM = "Max"
+MEAN = "Mean"
+QUARTILES = "Quartiles"
+LENGTH_RANGE = "Length"
+STATS_COLUMNS = [MINIMUM, MAXIMUM, MEAN, QUARTILES, LENGTH_RANGE]
+PATTERNS = "Patterns"
+KEY_CANDIDATE = "Key Candidate"
+OPTIONAL_COLUMNS = STATS_COLUMNS + [PATTERNS, KEY_CANDIDATE]
+
+# RELATIONSHIP SCHEMA
+REFERENCES_TABLE_FILE = "References Table/File"
+REFERENCES_FIELD = "References Field"
+CONTAINMENT = "Containment"
+
+RELATIONSHIP_SCHEMA = [
+    TABLE_FILE,
+    FIELD,
+    REFERENCES_TABLE_FILE,
+    REFERENCES_FIELD,
+    CONTAINMENT,
+]
+
+# DUPLICATE SCHEMA
+DUPLICATE_GROUP = "Duplicate Group"
+KIND = "Kind"
+TABLE_KIND = "Table"
+COLUMN_KIND = "Column"
+
+DUPLICATE_SCHEMA = [
+    DUPLICATE_GROUP,
+    KIND,
+    TABLE_FILE,
+    FIELD,
+    COUNT,
+]
+
+# SNAPSHOT SCHEMA, see utils/snapshots.py
+SOURCE_TYPE = "Source Type"
+FINGERPRINT = "Fingerprint"
+
+SNAPSHOT_SCHEMA = [
+    TABLE_FILE,
+    FIELD,
+    SOURCE_TYPE,
+    COUNT,
+    POPULATED,
+    UNIQUE,
+    DATATYPE,
+    CHOICES,
+    FINGERPRINT,
+]
+
+# DIFF SCHEMA
+CHANGE = "Change"
+ADDED_TABLE = "Added Table"
+DROPPED_TABLE = "Dropped Table"
+ADDED_FIELD = "Added Field"
+DROPPED_FIELD = "Dropped Field"
+CHANGED = "Changed"
+UNCHANGED = ""
+OLD = "Old "
+NEW = "New "
+POPULATED_SHIFT = "Populated Shift"
+ADDED_CHOICES = "Added Choices"
+REMOVED_CHOICES = "Removed Choices"
+CONTENT_CHANGED = "Content Changed"
+
+DIFF_SCHEMA = [
+    TABLE_FILE,
+    FIELD,
+    CHANGE,
+    OLD + DATATYPE,
+    NEW + DATATYPE,
+    OLD + SOURCE_TYPE,
+    NEW + SOURCE_TYPE,
+    OLD + COUNT,
+    NEW + COUNT,
+    OLD + POPULATED,
+    NEW + POPULATED,
+    POPULATED_SHIFT,
+    ADDED_CHOICES,
+    REMOVED_CHOICES,
+    CONTENT_CHANGED,
+]
+
 # CHOICE MAPPING SCHEMA
 LEGACY = "Legacy Value"
 TARGET = "Target Value"
 
 MAPPING_TABLE_COLUMNS_COUNT = 5
+# further mapping tables of a table spill over to extra sheets
+MAPPING_TABLES_PER_SHEET = 50
 LEGACY_COL_IDX = 0
 TARGET_COL_IDX = 1
 OPTIONS_COL_IDX = 3
 
+# Excel sheet limits
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_COLUMNS = 16384
+EXCEL_MAX_SHEET_NAME = 31
+
 
 def calculate_col_index_for_mapping_table(
     mapping_table_count: int, col_type: int
@@ -0,0 +1,29 @@
+"""Contains file reading settings"""
+
+# encoding detection reads at most this many bytes, from the start, middle and end of a file
+ENCODING_SAMPLE_SIZE = 1024 * 1024
+# non UTF-8 files are transcoded in chunks of this many bytes
+TRANSCODE_CHUNK_SIZE = 4 * 1024 * 1024
+
+UTF8 = "utf8"
+UTF8_LOSSY = "utf8-lossy"
+
+# read with the calamine engine, one report entry per sheet
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xlsb", ".xls", ".ods")
+
+# read lazily, so only the columns being profiled are loaded
+PARQUET_EXTENSIONS = (".parquet",)
+IPC_EXTENSIONS = (".arrow", ".ipc", ".feather")
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+# formats whose columns can be read one at a time, see analysis.profile_lazy_frame
+COLUMNAR_EXTENSIONS = PARQUET_EXTENSIONS + IPC_EXTENSIONS
+
+# the column holding the source file name, when files with matching schemas are scanned together
+FILE_NAME_COLUMN = "__sql_field_report_file__"
+
+# typed reads infer column types over batches of this many rows
+TYPE_SAMPLE_ROWS = 100_000
+# typed reads load text columns with at most this unique:row ratio as Categorical
+CATEGORICAL_RATIO = 0.1
+# integers that cast back to exactly the same text, so only these are read as Int64
+INTEGER_REGEX = r"^(0|-?[1-9][0-9]{0,17})$"
@@ -0,0 +1,60 @@
+"""Contains column profiling settings"""
+
+# the maximum number of value counts kept in a saved or merged column profile
+PROFILE_SKETCH_SIZE = 10000
+
+# distinct value sketches, see utils/sketches.py
+DISTINCT_SKETCH_SIZE = 1024
+SKETCH_HASH_SEED = 0
+
+# cardinality early exit: columns of at least CARDINALITY_PREFIX_SIZE rows whose
+# prefix is mostly unique, and whose approximate unique count exceeds the choice
+# thresholds by CARDINALITY_MARGIN, skip the full sorted value count
+CARDINALITY_EARLY_EXIT = True
+CARDINALITY_PREFIX_SIZE = 1000
+HIGH_CARDINALITY_RATIO = 0.5
+CARDINALITY_MARGIN = 2
+# approximate unique counts within this share of the populated count are replaced by the
+# exact count, so unique (key) columns report exactly one value per populated row
+EXACT_UNIQUE_MARGIN = 0.05
+
+# the asyncio fetch mode keeps at most this many tables fetched/analysed at once
+ASYNC_MAX_IN_FLIGHT = 16
+# blocking get_data functions need a thread per fetch, so fewer are run at once
+ASYNC_FETCH_WORKERS = 4
+
+# relationship discovery keeps a sketch of this many hashes of each column's populated values, as text
+KEY_SKETCH_SIZE = 1024
+# populated, unique columns are key candidates; sampled unique counts are approximate
+KEY_UNIQUE_TOLERANCE = 0.01
+# columns with at least this many unique values are checked for references to key candidates
+RELATIONSHIP_MIN_DISTINCT = 10
+# the estimated share of a column's values found in a key candidate to report a relationship
+RELATIONSHIP_MIN_CONTAINMENT = 0.9
+# containment is only estimated from at least this many sketched values
+RELATIONSHIP_MIN_SAMPLE = 5
+
+# value patterns: letters become LETTER_MASK and digits DIGIT_MASK, e.g. "AB-1234" -> "AA-9999"
+LETTER_REGEX = r"\p{L}"
+DIGIT_REGEX = r"\p{Nd}"
+LETTER_MASK = "A"
+DIGIT_MASK = "9"
+# patterns are cut to this many characters, so free text does not make each value its own pattern
+PATTERN_MAX_LENGTH = 30
+# the number of pattern counts kept in a column profile, and shown in the report
+PATTERN_SKETCH_SIZE = 100
+PATTERN_REPORT_TOP = 3
+
+# value statistics: the quantiles kept for numeric columns, and the significant digits they are reported to
+STATS_QUANTILES = (0.25, 0.5, 0.75)
+STATS_REPORT_DIGITS = 10
+
+# duplicate detection: columns with fewer unique values are not reported as duplicates of each
+# other, since any two flags or codes with the same counts would match
+DUPLICATE_MIN_DISTINCT = 10
+# get_data functions return a single column with this name when a table cannot be read;
+# such placeholders are profiled but never fingerprinted, so failed tables are not duplicates
+ERROR_FIELD = "ERROR"
+
+# run diffs: a change of at least this share of rows populated is reported
+DIFF_POPULATED_SHIFT = 0.05
@@ -0,0 +1,16 @@
+"""Contains profiling service settings"""
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+# tables of all jobs are profiled on one shared pool of this many threads
+SERVICE_WORKERS = 4
+# connections kept open per database
+SERVICE_POOL_SIZE = 4
+
+# table profiles and table lists are reused for this many seconds
+RESULT_CACHE_TTL = 300
+CATALOG_TTL = 300
+# the number of table profiles kept in the result cache
+RESULT_CACHE_SIZE = 1024
+# finished jobs kept for GET /jobs/<id>
+FINISHED_JOBS_KEPT = 100
@@ -1,6 +1,12 @@
+import asyncio
 import logging
+import os
 import traceback
-from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Union
 
 import coloredlogs
 import pandas as pd
@@ -8,24 +14,72 @@ import polars as pl
 import typer
 from sqlalchemy import Connection, text
 
-from .utils.analysis import analyze_polars_dataframes, analyze_sql_tables
-from .utils.databases import MSSQLConnectionX, MySQLConnection
-from .utils.excel import generate_excel_report
+import sql_field_report.constants.datatypes as dtypes
+import sql_field_report.constants.profiling as profiling
+import sql_field_report.constants.service as service
+import sql_field_report.utils.config as config
 
+from .utils.analysis import (
+    analyze_sql_tables,
+    build_analysis,
+    get_sql_engine_data,
+    iter_field_report,
+    profile_data,
+    profile_fetched,
+    profile_objects,
+)
+from .utils.async_analysis import analyze_async
+from .utils.databases import (
+    ConnectionPool,
+    MSSQLConnectionPool,
+    MSSQLConnectionX,
+    MySQLConnection,
+    MySQLConnectionPool,
+)
+from .utils.duplicates import (
+    error_frame,
+    find_duplicates,
+    sample_frame,
+    table_fingerprint,
+)
+from .utils.excel import generate_excel_report, parse_file
+from .utils.file_groups import find_files, profile_files
+from .utils.file_utils import expand_workbooks, read_file
+from .utils.incremental import profile_incremental
+from .utils.profiles import load_profiles, save_profiles
+from .utils.relationships import find_relationships
+from .utils.report_writer import CsvReportWriter
+from .utils.scheduler import SNAPSHOT, QueryScheduler
+from .utils.service import create_server
+from .utils.snapshots import (
+    diff_snapshots,
+    load_snapshot,
+    save_snapshot,
+    write_diff_report,
+)
 
-def build_sql_field_report(output_file_name: str, objects: list, conn: Connection):
+
+def build_sql_field_report(
+    output_file_name: str,
+    objects: list,
+    conn: Connection,
+    profile_file: str = None,
+    scheduler: QueryScheduler = None,
+):
     """Build SQL Field Report
 
     Args:
         output_file_name (str): The output file name for the report
         objects (list): A list of tables to be analyzed
         conn: SQLAlchemy connection
+        profile_file (str): Optional filepath to save the column profiles to, see build_reclassified_field_report
+        scheduler (QueryScheduler): Optional limits on the queries, e.g. for production servers
 
     Returns:
         str: SQL Report filepath
     """
 
-    analysis = analyze_sql_tables(objects, conn)
+    analysis = analyze_sql_tables(objects, conn, profile_file, scheduler)
 
     path = generate_excel_report(analysis, output_file_name)
 
@@ -35,22 +89,184 @@ def build_sql_field_report(output_file_name: str, objects: list, conn: Connectio
         return None
 
 
-def get_mssql_data(table: str, cnx: str) -> pl.DataFrame:
+def get_mssql_tables(cnx: Union[str, Connection], schema: str) -> list[str]:
+    """Get MSSQL Tables
+
+    Args:
+        cnx (Union[str, Connection]): connectx connection string, or SQLAlchemy connection
+        schema (str): The database schema
+
+    Returns:
+        list[str]: The populated user tables of the schema, formatted [schema].[table]
+    """
+    return (
+        read_mssql(
+            f"""
+SELECT DISTINCT
+	('[' + s.name + '].[' + t.name + ']') [TABLE_NAME]
+FROM 
+    sys.tables t
+INNER JOIN 
+    sys.partitions p ON t.object_id = p.OBJECT_ID 
+INNER JOIN
+	sys.schemas s ON t.schema_id = s.schema_id
+WHERE 
+    t.NAME NOT LIKE 'dt%' 
+    AND s.name = '{schema}'
+    AND t.is_ms_shipped = 0
+    AND p.rows != 0
+            """,
+            cnx,
+        )
+        .select(pl.col("TABLE_NAME"))
+        .to_series()
+        .to_list()
+    )
+
+
+def get_mysql_tables(conn: Connection, database_name: str) -> list[str]:
+    """Get MySQL Tables
+
+    Args:
+        conn (Connection): SQLAlchemy connection
+        database_name (str): The database name
+
+    Returns:
+        list[str]: The tables of the database, formatted `schema`.`table`
+    """
+    return pd.read_sql(
+        text(
+            "select DISTINCT(CONCAT('`', TABLE_SCHEMA , '`.`' , TABLE_NAME , '`')) \"TABLE_NAME\" from information_schema.columns where table_schema = '{}';".format(
+                database_name
+            )
+        ),
+        conn,
+    )["TABLE_NAME"].to_list()
+
+
+def read_mssql(
+    query: str, cnx: Union[str, Connection], scheduler: QueryScheduler = None
+):
+    """Run a query with connectorx, or on a pooled SQLAlchemy connection, under the scheduler limits if one is given"""
+    if isinstance(cnx, Connection):
+        if scheduler:
+            return scheduler.read_sql(query, cnx)
+        return pl.from_pandas(pd.read_sql(text(query), cnx))
+    if scheduler:
+        return scheduler.read_database_uri(query, cnx)
+    return pl.read_database_uri(query, cnx)
+
+
+def get_mssql_columns(
+    table: str, cnx: str, scheduler: QueryScheduler = None
+) -> list[str]:
+    """Get MSSQL Columns
+
+    Args:
+        table (str): Database table name, formatted [schema].[table]
+        cnx (str): connectx connection string
+        scheduler (QueryScheduler): Optional limits on the query
+
+    Returns:
+        list[str]: The bracketed names of the columns with supported datatypes
+    """
+    t = table.split("].[")[1][:-1]
+    return (
+        read_mssql(
+            f"SELECT DISTINCT('[' + COLUMN_NAME + ']') [COLUMN_NAME] FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME='{t}' AND DATA_TYPE != 'sql_variant'",
+            cnx,
+            scheduler,
+        )
+        .select(pl.col("COLUMN_NAME"))
+        .to_series()
+        .to_list()
+    )
+
+
+def to_mssql_literal(value) -> str:
+    """Format a python value as an MSSQL literal"""
+    if isinstance(value, bool):
+        return str(int(value))
+    elif isinstance(value, (int, float, Decimal)):
+        return str(value)
+    elif isinstance(value, (datetime, date)):
+        return f"CAST('{value.isoformat()}' AS datetime2)"
+    else:
+        escaped = str(value).replace("'", "''")
+        return f"N'{escaped}'"
+
+
+def get_mssql_incremental_data(
+    table: str,
+    cnx: Union[str, ConnectionPool],
+    watermark_column: str,
+    watermark=None,
+    scheduler: QueryScheduler = None,
+) -> pl.DataFrame:
+    """Get MSSQL Incremental Data
+
+    Using connectx, query the rows of a given SQL table past a watermark. Unlike
+    get_mssql_data the rows are never abbreviated, and failures are raised.
+    Tables without watermark_column are pulled with get_mssql_data instead, so
+    their full pull on every run is abbreviated like any other table.
+
+    Args:
+        table (str): Database table name
+        cnx (Union[str, ConnectionPool]): connectx connection string, or connection pool
+        watermark_column (str): An ascending identity or created-date column
+        watermark (object): The highest watermark_column value already profiled
+        scheduler (QueryScheduler): Optional limits on the queries
+
+    Returns:
+        pl.DataFrame: Table data
+    """
+    if isinstance(cnx, ConnectionPool):
+        with cnx.connect() as conn:
+            return get_mssql_incremental_data(
+                table, conn, watermark_column, watermark, scheduler
+            )
+    cols = get_mssql_columns(table, cnx, scheduler)
+    watermark_column = "[{}]".format(watermark_column.strip("[]"))
+    if watermark_column.lower() not in (c.lower() for c in cols):
+        logger.warning(
+            f"Table {table} has no {watermark_column} column, pulling it like get_mssql_data"
+        )
+        return get_mssql_data(table, cnx, scheduler)
+    columns = ", ".join(cols)
+    hint = scheduler.table_hint() if scheduler else ""
+
+    query = f"SELECT {columns} FROM {table}{hint}"
+    if watermark is not None:
+        query += f" WHERE {watermark_column} > {to_mssql_literal(watermark)}"
+    data = read_mssql(query, cnx, scheduler)
+    logger.info(f"Table {table} data pulled.")
+    return data
+
+
+def get_mssql_data(
+    table: str, cnx: Union[str, ConnectionPool], scheduler: QueryScheduler = None
+) -> pl.DataFrame:
     """Get MSSQL Data
 
-    Using connectx, query data from a given SQL table
+    Using connectx, query data from a given SQL table. With a ConnectionPool,
+    the queries for the table share one pooled connection instead.
 
     Args:
         table (str): Database table name
-        cnx (str): connectx connection string
+        cnx (Union[str, ConnectionPool]): connectx connection string, or connection pool
+        scheduler (QueryScheduler): Optional limits on the queries, e.g. for production servers
 
     Returns:
         pl.DataFrame: Table data
     """
+    if isinstance(cnx, ConnectionPool):
+        with cnx.connect() as conn:
+            return get_mssql_data(table, conn, scheduler)
+    hint = scheduler.table_hint() if scheduler else ""
     try:
         # get number of rows
         counts = (
-            pl.read_database_uri(f"SELECT COUNT(*) [c] FROM {table}", cnx)
+            read_mssql(f"SELECT COUNT(*) [c] FROM {table}{hint}", cnx, scheduler)
             .select(pl.col("c"))
             .to_series()
             .to_list()[0]
@@ -58,39 +274,81 @@ def get_mssql_data(table: str, cnx: str) -> pl.DataFrame:
         logger.info(f"Table {table} has: {counts} rows...")
 
         # get columns with valid datatypes
-        t = table.split("].[")[1][:-1]
-        cols = (
-            pl.read_database_uri(
-                f"SELECT DISTINCT('[' + COLUMN_NAME + ']') [COLUMN_NAME] FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME='{t}' AND DATA_TYPE != 'sql_variant'",
-                cnx,
-            )
-            .select(pl.col("COLUMN_NAME"))
-            .to_series()
-            .to_list()
-        )
+        cols = get_mssql_columns(table, cnx, scheduler)
 
         columns = ", ".join(cols)
 
         if counts > 100000:
             logger.info(f"Table {table} -- abbreviating to top 50000")
-            query = f"SELECT TOP(50000) {columns} FROM {table}"
+            query = f"SELECT TOP(50000) {columns} FROM {table}{hint}"
         else:
-            query = f"SELECT {columns} FROM {table}"
-        data = pl.read_database_uri(query, cnx)
+            query = f"SELECT {columns} FROM {table}{hint}"
+        data = read_mssql(query, cnx, scheduler)
+        if counts > 100000:
+            data = sample_frame(data)
         logger.info(f"Table {table} data pulled.")
     except Exception as e:
         traceback.print_exc()
         logger.error(e)
         logger.error(f"Table {table} data pull failed.")
-        data = pl.from_records(data=[[0]], schema=["ERROR"])
+        data = error_frame()
     return data
 
 
+def get_mssql_fingerprint(
+    table: str, cnx: Union[str, ConnectionPool], scheduler: QueryScheduler = None
+) -> str:
+    """Get MSSQL Fingerprint
+
+    Fingerprint a table on the server with CHECKSUM_AGG(BINARY_CHECKSUM(*)),
+    without fetching its rows. Checksums can collide, unlike the fingerprints
+    of fetched data (see duplicates.frame_fingerprint), so this is only used
+    to skip tables that are almost certainly copies.
+
+    Args:
+        table (str): Database table name
+        cnx (Union[str, ConnectionPool]): connectx connection string, or connection pool
+        scheduler (QueryScheduler): Optional limits on the queries
+
+    Returns:
+        str: the table fingerprint, or None if it could not be computed
+    """
+    if isinstance(cnx, ConnectionPool):
+        with cnx.connect() as conn:
+            return get_mssql_fingerprint(table, conn, scheduler)
+    hint = scheduler.table_hint() if scheduler else ""
+    try:
+        checksum = read_mssql(
+            "SELECT COUNT_BIG(*) [n], CHECKSUM_AGG(BINARY_CHECKSUM(*)) [c] "
+            f"FROM {table}{hint}",
+            cnx,
+            scheduler,
+        ).row(0)
+        columns = get_mssql_columns(table, cnx, scheduler)
+    except Exception as e:
+        logger.error(f"Table {table} fingerprint failed: {e}")
+        return None
+    if not checksum[0]:
+        # empty tables are never duplicates
+        return None
+    return "mssql:" + table_fingerprint(
+        checksum[0], dict.fromkeys(columns, checksum[1])
+    )
+
+
 def build_dataframe_field_report(
     output_file_name: str,
     objects: list,
     get_data: Callable[[str], pl.DataFrame],
     cnx: str = None,
+    profile_file: str = None,
+    max_workers: int = 1,
+    relationships: bool = False,
+    patterns: bool = False,
+    stats: bool = False,
+    duplicates: bool = False,
+    skip_duplicates: bool = False,
+    snapshot_file: str = None,
     **kwargs,
 ):
     """Build DataFrames Field Report
@@ -99,12 +357,111 @@ def build_dataframe_field_report(
         output_file_name (str): The output file name for the report
         objects (list): A list of tables to be analyzed
         get_data (Callable[[str], pd.DataFrame]): A function that will take in a table name and return a Dataframe
+        profile_file (str): Optional filepath to save the column profiles to, see build_reclassified_field_report
+        max_workers (int): The number of tables fetched and analysed in parallel
+        relationships (bool): Flag key candidates and add a sheet of the columns referencing them
+        patterns (bool): Add the most common value patterns of each field, e.g. AA-9999
+        stats (bool): Add the min, max, mean and quartiles of number/date fields, and the lengths of text fields
+        duplicates (bool): Add a sheet grouping the tables and columns with the same content
+        skip_duplicates (bool): Copy the profiles of tables with the same content as an earlier table instead of profiling them, and add the duplicates sheet
+        snapshot_file (str): Optional filepath to save a Parquet snapshot of the run to, for the diff command
 
     Returns:
         str: SQL Report filepath
     """
 
-    analysis = analyze_polars_dataframes(objects, get_data, cnx, **kwargs)
+    if relationships:
+        kwargs["key_sketch_size"] = profiling.KEY_SKETCH_SIZE
+    profiles = profile_objects(
+        objects, get_data, cnx, max_workers, skip_duplicates, **kwargs
+    )
+
+    if profile_file:
+        save_profiles(profiles, profile_file)
+    if snapshot_file:
+        save_snapshot(profiles, snapshot_file)
+
+    path = generate_excel_report(
+        build_analysis(profiles, patterns, stats),
+        output_file_name,
+        find_relationships(profiles) if relationships else None,
+        find_duplicates(profiles) if duplicates or skip_duplicates else None,
+    )
+
+    if path:
+        return path
+    else:
+        return None
+
+
+def build_csv_field_report(
+    output_file_name: str,
+    objects: list,
+    get_data: Callable[[str], pl.DataFrame],
+    cnx: str = None,
+    max_workers: int = 1,
+    patterns: bool = False,
+    stats: bool = False,
+    **kwargs,
+):
+    """Build CSV Field Report
+
+    Write the report rows of each table to a CSV file as soon as the table is
+    done, so progress can be followed and downstream loads started before the
+    run ends. See iter_field_report.
+
+    Args:
+        output_file_name (str): The output CSV file name for the report
+        objects (list): A list of tables to be analyzed
+        get_data (Callable[[str], pd.DataFrame]): A function that will take in a table name and return a Dataframe
+        max_workers (int): The number of tables fetched and analysed in parallel
+        patterns (bool): Add the most common value patterns of each field
+        stats (bool): Add the value and length ranges of each field
+
+    Returns:
+        str: Report filepath
+    """
+
+    with CsvReportWriter(output_file_name) as writer:
+        for rows in iter_field_report(
+            objects, get_data, cnx, max_workers, patterns, stats, **kwargs
+        ):
+            writer.write(rows)
+            logger.info(
+                f"Wrote {writer.tables}/{len(objects)} tables to {output_file_name}"
+            )
+
+    return output_file_name
+
+
+def build_async_field_report(
+    output_file_name: str,
+    objects: list,
+    get_data: Callable,
+    cnx: str = None,
+    max_in_flight: int = profiling.ASYNC_MAX_IN_FLIGHT,
+    **kwargs,
+):
+    """Build Async Field Report
+
+    Fetch many tables concurrently on an event loop, with the profiling run in
+    an executor. get_data may be a coroutine function, e.g. get_async_engine_data
+    with an AsyncEngine, or a blocking function, see aiter_profiles.
+
+    Args:
+        output_file_name (str): The output file name for the report
+        objects (list): A list of tables to be analyzed
+        get_data (Callable): A function or coroutine function that will take in a table name and return a Dataframe
+        cnx (object): Connection object passed to get_data
+        max_in_flight (int): The number of tables fetched and analysed at once
+
+    Returns:
+        str: Report filepath
+    """
+
+    analysis = asyncio.run(
+        analyze_async(objects, get_data, cnx, max_in_flight=max_in_flight, **kwargs)
+    )
 
     path = generate_excel_report(analysis, output_file_name)
 
@@ -114,14 +471,435 @@ def build_dataframe_field_report(
         return None
 
 
-def build_mssql_field_report(output_file_name: str, objects: list, cnx: str):
-    path = build_dataframe_field_report(output_file_name, objects, get_mssql_data, cnx)
+def build_mssql_field_report(
+    output_file_name: str,
+    objects: list,
+    cnx: str,
+    profile_file: str = None,
+    scheduler: QueryScheduler = None,
+    max_workers: int = 1,
+    relationships: bool = False,
+    patterns: bool = False,
+    stats: bool = False,
+    duplicates: bool = False,
+    skip_duplicates: bool = False,
+    snapshot_file: str = None,
+):
+    kwargs = {}
+    if skip_duplicates:
+        # fingerprint tables on the server, so duplicates are not fetched either
+        kwargs["get_fingerprint"] = get_mssql_fingerprint
+    path = build_dataframe_field_report(
+        output_file_name,
+        objects,
+        get_mssql_data,
+        cnx,
+        profile_file=profile_file,
+        max_workers=max_workers,
+        relationships=relationships,
+        patterns=patterns,
+        stats=stats,
+        duplicates=duplicates,
+        skip_duplicates=skip_duplicates,
+        snapshot_file=snapshot_file,
+        scheduler=scheduler,
+        **kwargs,
+    )
+    if path:
+        return path
+    else:
+        return None
+
+
+def build_incremental_field_report(
+    output_file_name: str,
+    objects: list,
+    get_data: Callable[..., pl.DataFrame],
+    state_file: str,
+    watermark_column: str,
+    cnx: str = None,
+    profile_file: str = None,
+    max_workers: int = 1,
+    relationships: bool = False,
+    patterns: bool = False,
+    stats: bool = False,
+    duplicates: bool = False,
+    snapshot_file: str = None,
+    **kwargs,
+):
+    """Build Incremental Field Report
+
+    Profile only the rows of append-only tables added since the last run, merge
+    them into the stored column profiles and build the report of all rows.
+
+    Args:
+        output_file_name (str): The output file name for the report
+        objects (list): A list of tables to be analyzed
+        get_data (Callable[..., pl.DataFrame]): A function that will take in a table name, watermark_column and watermark, and return the Dataframe of newer rows
+        state_file (str): The filepath of the stored profiles and watermarks
+        watermark_column (str): An ascending identity or created-date column
+        cnx (str): ConnectorX connection string
+        profile_file (str): Optional filepath to save the column profiles to, for the reclassify command
+        max_workers (int): The number of tables fetched and analysed in parallel
+        relationships (bool): Flag key candidates and add a sheet of the columns referencing them
+        patterns (bool): Add the most common value patterns of each field
+        stats (bool): Add the value and length ranges of each field
+        duplicates (bool): Add a sheet grouping the tables and columns with the same content
+        snapshot_file (str): Optional filepath to save a Parquet snapshot of the run to, for the diff command
+
+    Returns:
+        str: Report filepath
+    """
+
+    if relationships:
+        kwargs["key_sketch_size"] = profiling.KEY_SKETCH_SIZE
+    profiles = profile_incremental(
+        objects,
+        get_data,
+        state_file,
+        watermark_column,
+        cnx,
+        max_workers=max_workers,
+        **kwargs,
+    )
+
+    if profile_file:
+        save_profiles(profiles, profile_file)
+    if snapshot_file:
+        save_snapshot(profiles, snapshot_file)
+
+    path = generate_excel_report(
+        build_analysis(profiles, patterns, stats),
+        output_file_name,
+        find_relationships(profiles) if relationships else None,
+        find_duplicates(profiles) if duplicates else None,
+    )
+
+    if path:
+        return path
+    else:
+        return None
+
+
+def build_reclassified_field_report(
+    output_file_name: str,
+    profile_file: str,
+    choice_distinct_threshold: int = dtypes.CHOICE_DISTINCT_THRESHOLD,
+    choice_ratio_threshold: float = dtypes.CHOICE_RATIO_THRESHOLD,
+    multi_line_threshold: int = dtypes.MULTI_LINE_THRESHOLD,
+    patterns: bool = False,
+    stats: bool = False,
+    duplicates: bool = False,
+    snapshot_file: str = None,
+):
+    """Build Reclassified Field Report
+
+    Rebuild a field report from saved column profiles with new classification
+    thresholds, without reading the source data again.
+
+    Args:
+        output_file_name (str): The output file name for the report
+        profile_file (str): The column profiles saved by a previous report
+        choice_distinct_threshold (int): Fields with fewer unique values are choices
+        choice_ratio_threshold (float): Fields with a lower unique:count ratio are choices
+        multi_line_threshold (int): Values longer than this are Multi Line
+        patterns (bool): Add the most common value patterns of each field
+        stats (bool): Add the value and length ranges of each field
+        duplicates (bool): Add a sheet grouping the tables and columns with the same content
+        snapshot_file (str): Optional filepath to save a Parquet snapshot of the run to, for the diff command
+
+    Returns:
+        str: Report filepath
+    """
+
+    profiles = load_profiles(profile_file)
+    analysis = build_analysis(
+        profiles,
+        patterns,
+        stats,
+        choice_distinct_threshold=choice_distinct_threshold,
+        choice_ratio_threshold=choice_ratio_threshold,
+        multi_line_threshold=multi_line_threshold,
+    )
+    if snapshot_file:
+        save_snapshot(
+            profiles,
+            snapshot_file,
+            choice_distinct_threshold=choice_distinct_threshold,
+            choice_ratio_threshold=choice_ratio_threshold,
+            multi_line_threshold=multi_line_threshold,
+        )
+
+    relationships = None
+    if any("key_sketch" in p for p in profiles):
+        relationships = find_relationships(profiles)
+
+    path = generate_excel_report(
+        analysis,
+        output_file_name,
+        relationships,
+        find_duplicates(profiles) if duplicates else None,
+    )
+
+    if path:
+        return path
+    else:
+        return None
+
+
+def build_file_field_report(
+    output_file_name: str,
+    source: str,
+    profile_file: str = None,
+    max_workers: int = 1,
+    typed: bool = False,
+    relationships: bool = False,
+    patterns: bool = False,
+    stats: bool = False,
+    duplicates: bool = False,
+    snapshot_file: str = None,
+):
+    """Build File Field Report
+
+    Profile every file in a directory, or matching a glob pattern. Files with
+    matching schemas are profiled together with one lazy scan.
+
+    Args:
+        output_file_name (str): The output file name for the report
+        source (str): A directory, file path or glob pattern
+        profile_file (str): Optional filepath to save the column profiles to
+        max_workers (int): The number of workbook sheets read in parallel
+        typed (bool): Narrow workbook text columns to integer/categorical dtypes once
+            loaded, see file_utils.read_excel_sheet; CSV files are scanned lazily either way
+        relationships (bool): Flag key candidates and add a sheet of the columns referencing them
+        patterns (bool): Add the most common value patterns of each field
+        stats (bool): Add the value and length ranges of each field
+        duplicates (bool): Add a sheet grouping the files and columns with the same content
+        snapshot_file (str): Optional filepath to save a Parquet snapshot of the run to, for the diff command
+
+    Returns:
+        str: Report filepath
+    """
+
+    files = find_files(source)
+    if not files:
+        raise ValueError(f"No supported files found in {source}")
+
+    profiles = profile_files(
+        files,
+        max_workers,
+        typed,
+        profiling.KEY_SKETCH_SIZE if relationships else None,
+    )
+
+    if profile_file:
+        save_profiles(profiles, profile_file)
+    if snapshot_file:
+        save_snapshot(profiles, snapshot_file)
+
+    path = generate_excel_report(
+        build_analysis(profiles, patterns, stats),
+        output_file_name,
+        find_relationships(profiles) if relationships else None,
+        find_duplicates(profiles) if duplicates else None,
+    )
+
     if path:
         return path
     else:
         return None
 
 
+def build_diff_report(
+    output_file_name: str,
+    old_snapshot: str,
+    new_snapshot: str,
+    populated_shift: float = profiling.DIFF_POPULATED_SHIFT,
+    all_fields: bool = False,
+) -> str:
+    """Build Diff Report
+
+    Compare the snapshots of two runs, without reading the source data again.
+
+    Args:
+        output_file_name (str): The output file name for the report, .xlsx, .csv or .parquet
+        old_snapshot (str): The snapshot of the earlier run, see save_snapshot
+        new_snapshot (str): The snapshot of the later run
+        populated_shift (float): The smallest change of the share of populated rows reported
+        all_fields (bool): Include unchanged fields
+
+    Returns:
+        str: Report filepath
+    """
+    diff = diff_snapshots(
+        load_snapshot(old_snapshot),
+        load_snapshot(new_snapshot),
+        populated_shift,
+        all_fields,
+    )
+    logger.info(f"{diff.shape[0]} changed fields")
+    return write_diff_report(diff, output_file_name)
+
+
+def open_target(
+    target: dict,
+    stack: ExitStack,
+    connections: dict,
+    scheduler: QueryScheduler,
+    pool_size: int = None,
+    options: dict = None,
+) -> tuple[list, Callable, object, dict]:
+    """Open a job file target, sharing connections between targets on the same database
+
+    Args:
+        target (dict): The target, see load_config
+        stack (ExitStack): Closes the connections at the end of the run
+        connections (dict): The open connections, keyed by target type, server, port, user and database
+        scheduler (QueryScheduler): The limits shared by all targets
+        pool_size (int): If set, keep a pool of this many connections open per database
+        options (dict): Profile options for every target, see profile_data
+
+    Returns:
+        tuple: the objects to analyse, and the get_data, cnx and keyword arguments to fetch them with
+    """
+    options = options or {}
+    if target["type"] == config.FILES:
+        files = expand_workbooks(config.expand_files(target["files"]))
+        return files, read_file, None, dict(options, typed=target["typed"])
+
+    key = tuple([target["type"]] + [target[k] for k in config.DATABASE_KEYS])
+    args = (
+        target["server"],
+        target["port"],
+        target["user"],
+        target["password"],
+        target["database"],
+    )
+    if key not in connections:
+        if pool_size:
+            pool = (
+                MSSQLConnectionPool
+                if target["type"] == config.MSSQL
+                else MySQLConnectionPool
+            )
+            connections[key] = stack.enter_context(
+                pool(*args, pool_size=pool_size, metrics=scheduler.metrics)
+            )
+        elif target["type"] == config.MSSQL:
+            connections[key] = stack.enter_context(MSSQLConnectionX(*args))
+        else:
+            connections[key] = stack.enter_context(MySQLConnection(*args))
+
+    cnx = connections[key]
+    if target["type"] == config.MSSQL:
+        objects = target.get("tables")
+        if not objects and pool_size:
+            with cnx.connect() as conn:
+                objects = get_mssql_tables(conn, target["schema"])
+        elif not objects:
+            objects = get_mssql_tables(cnx, target["schema"])
+        return objects, get_mssql_data, cnx, dict(options, scheduler=scheduler)
+    else:
+        objects = target.get("tables")
+        if not objects and pool_size:
+            with cnx.connect() as conn:
+                objects = get_mysql_tables(conn, target["database"])
+        elif not objects:
+            objects = get_mysql_tables(cnx, target["database"])
+        engine = cnx if pool_size else cnx.engine
+        return objects, get_sql_engine_data, engine, dict(options, scheduler=scheduler)
+
+
+def build_config_field_reports(config_file: str) -> list[str]:
+    """Build Config Field Reports
+
+    Run every target of a job file in a single process. Tables of all targets
+    are fetched and analysed on one shared worker pool, under per-server query
+    limits shared by all targets, and connections are shared between targets on
+    the same database.
+
+    Args:
+        config_file (str): The TOML/YAML job file, see utils.config.load_config
+
+    Returns:
+        list[str]: The report filepaths
+    """
+    job = config.load_config(config_file)
+    scheduler = QueryScheduler(
+        job["max_concurrent_queries"],
+        job["rows_per_second"],
+        job["isolation_level"],
+        job["query_timeout"],
+    )
+    os.makedirs(job["output_dir"], exist_ok=True)
+    if job["snapshot_dir"]:
+        os.makedirs(job["snapshot_dir"], exist_ok=True)
+    options = {}
+    if job["relationships"]:
+        options["key_sketch_size"] = profiling.KEY_SKETCH_SIZE
+
+    paths = []
+    combined = []
+    with ExitStack() as stack, ThreadPoolExecutor(
+        job["workers"], thread_name_prefix="analysis"
+    ) as pool:
+        stack.enter_context(scheduler)
+        connections = {}
+        runs = []
+        for target in job["targets"]:
+            logger.info(f"Queueing target {target['name']}...")
+            objects, get_data, cnx, kwargs = open_target(
+                target, stack, connections, scheduler, job["pool_size"], options
+            )
+            futures = list(
+                [pool.submit(profile_data, o, get_data, cnx, **kwargs) for o in objects]
+            )
+            runs.append((target, objects, futures))
+
+        for target, objects, futures in runs:
+            profiles = []
+            for table, future in zip(objects, futures):
+                try:
+                    profiles.extend(future.result())
+                except Exception as e:
+                    # list the table as failed, like get_mssql_data, and carry on
+                    logger.error(f"Target {target['name']} table {table} failed: {e}")
+                    profiles.extend(profile_fetched(table, error_frame()))
+            if job["snapshot_dir"]:
+                save_snapshot(
+                    profiles,
+                    os.path.join(job["snapshot_dir"], f"{target['name']}.parquet"),
+                )
+            if job["per_target_reports"]:
+                path = generate_excel_report(
+                    build_analysis(profiles, job["patterns"], job["stats"]),
+                    os.path.join(job["output_dir"], target["output_file"]),
+                    find_relationships(profiles) if job["relationships"] else None,
+                    find_duplicates(profiles) if job["duplicates"] else None,
+                )
+                if path:
+                    paths.append(path)
+            if job["combined_report"]:
+                combined.extend(
+                    dict(p, table=f"{target['name']}.{parse_file(p['table'])}")
+                    for p in profiles
+                )
+
+    if job["combined_report"]:
+        path = generate_excel_report(
+            build_analysis(combined, job["patterns"], job["stats"]),
+            os.path.join(job["output_dir"], job["combined_report"]),
+            find_relationships(combined) if job["relationships"] else None,
+            find_duplicates(combined) if job["duplicates"] else None,
+        )
+        if path:
+            paths.append(path)
+
+    scheduler.metrics.log()
+
+    return paths
+
+
 logger = logging.getLogger(__name__)
 coloredlogs.install()
 logging.basicConfig(level="INFO")
@@ -138,6 +916,21 @@ def MSSQL_Database_Report(
     database_name: str,
     schema: str,
     output_file_name: str,
+    profile_file: str = None,
+    state_file: str = None,
+    watermark_column: str = None,
+    workers: int = 1,
+    max_concurrent_queries: int = None,
+    rows_per_second: float = None,
+    isolation_level: str = None,
+    query_timeout: float = None,
+    pool_size: int = 0,
+    relationships: bool = False,
+    patterns: bool = False,
+    stats: bool = False,
+    duplicates: bool = False,
+    skip_duplicates: bool = False,
+    snapshot_file: str = None,
 ):
     """MSSQL Database Report
 
@@ -151,37 +944,98 @@ def MSSQL_Database_Report(
         database_name (str): The name of the database to analyse
         schema (str): The database schema to analyse
         output_file_name (str): The output file name of the report
+        profile_file (str): Optional file to save the column profiles to, for the reclassify command
+        state_file (str): Incremental mode - the file storing column profiles and watermarks between runs
+        watermark_column (str): Incremental mode - an ascending identity or created-date column
+        workers (int): The number of tables fetched and analysed in parallel
+        max_concurrent_queries (int): The maximum number of queries running on the server at a time
+        rows_per_second (float): The maximum average number of rows fetched per second
+        isolation_level (str): READ UNCOMMITTED, to read without taking shared locks, or SNAPSHOT (needs --pool-size)
+        query_timeout (float): Query timeout in seconds
+        pool_size (int): Keep this many pooled ODBC connections open for the run, instead of a connectorx connection per query
+        relationships (bool): Flag likely primary keys and add a sheet of the columns referencing them
+        patterns (bool): Add the most common value patterns of each field, e.g. AA-9999 (80%)
+        stats (bool): Add the min, max, mean and quartiles of number/date fields, and the lengths of text fields
+        duplicates (bool): Add a sheet grouping the tables and columns with the same content
+        skip_duplicates (bool): Checksum tables on the server first, and copy the profiles of tables matching an earlier table instead of fetching them
+        snapshot_file (str): Optional file to save a Parquet snapshot of the run to, for the diff command
     """
 
     if not output_file_name.endswith(".xlsx"):
         output_file_name = "{}.xlsx".format(output_file_name.split(".")[0])
 
-    with MSSQLConnectionX(server, port, user, password, database_name) as cnx:
-        objects = (
-            pl.read_database_uri(
-                f"""
-SELECT DISTINCT
-	('[' + s.name + '].[' + t.name + ']') [TABLE_NAME]
-FROM 
-    sys.tables t
-INNER JOIN 
-    sys.partitions p ON t.object_id = p.OBJECT_ID 
-INNER JOIN
-	sys.schemas s ON t.schema_id = s.schema_id
-WHERE 
-    t.NAME NOT LIKE 'dt%' 
-    AND s.name = '{schema}'
-    AND t.is_ms_shipped = 0
-    AND p.rows != 0
-                """,
-                uri=cnx,
-            )
-            .select(pl.col("TABLE_NAME"))
-            .to_series()
-            .to_list()
+    if bool(state_file) != bool(watermark_column):
+        raise typer.BadParameter(
+            "--state-file and --watermark-column must be used together"
+        )
+
+    if state_file and skip_duplicates:
+        raise typer.BadParameter(
+            "--skip-duplicates cannot be used with --state-file, incremental runs only fetch new rows"
+        )
+
+    if isolation_level and isolation_level.upper() == SNAPSHOT and not pool_size:
+        raise typer.BadParameter(
+            "--isolation-level SNAPSHOT needs --pool-size, it cannot be set through connectorx"
         )
 
-        build_mssql_field_report(output_file_name, objects, cnx)
+    with QueryScheduler(
+        max_concurrent_queries, rows_per_second, isolation_level, query_timeout
+    ) as scheduler:
+        if pool_size:
+            connection = MSSQLConnectionPool(
+                server,
+                port,
+                user,
+                password,
+                database_name,
+                pool_size=pool_size,
+                metrics=scheduler.metrics,
+            )
+        else:
+            connection = MSSQLConnectionX(server, port, user, password, database_name)
+
+        with connection as cnx:
+            if pool_size:
+                with cnx.connect() as conn:
+                    objects = get_mssql_tables(conn, schema)
+            else:
+                objects = get_mssql_tables(cnx, schema)
+
+            if state_file:
+                build_incremental_field_report(
+                    output_file_name,
+                    objects,
+                    get_mssql_incremental_data,
+                    state_file,
+                    watermark_column,
+                    cnx,
+                    profile_file,
+                    workers,
+                    relationships,
+                    patterns,
+                    stats,
+                    duplicates,
+                    snapshot_file,
+                    scheduler=scheduler,
+                )
+            else:
+                build_mssql_field_report(
+                    output_file_name,
+                    objects,
+                    cnx,
+                    profile_file,
+                    scheduler,
+                    workers,
+                    relationships,
+                    patterns,
+                    stats,
+                    duplicates,
+                    skip_duplicates,
+                    snapshot_file,
+                )
+
+        scheduler.metrics.log()
 
 
 @app.command()
@@ -192,6 +1046,10 @@ def MySQL_Database_Report(
     password: str,
     database_name: str,
     output_file_name: str,
+    profile_file: str = None,
+    rows_per_second: float = None,
+    isolation_level: str = None,
+    query_timeout: float = None,
 ):
     """MySQL Database Report
 
@@ -204,21 +1062,191 @@ def MySQL_Database_Report(
         password (str): Your SQL Server password
         database_name (str): The name of the database to analyse
         output_file_name (str): The output file name of the report
+        profile_file (str): Optional file to save the column profiles to, for the reclassify command
+        rows_per_second (float): The maximum average number of rows fetched per second
+        isolation_level (str): READ UNCOMMITTED, to read without taking shared locks
+        query_timeout (float): Query timeout in seconds
     """
 
     if not output_file_name.endswith(".xlsx"):
         output_file_name = "{}.xlsx".format(output_file_name.split(".")[0])
 
-    with MySQLConnection(server, port, user, password, database_name) as conn:
-        objects = pd.read_sql(
-            text(
-                "select DISTINCT(CONCAT('`', TABLE_SCHEMA , '`.`' , TABLE_NAME , '`')) \"TABLE_NAME\" from information_schema.columns where table_schema = '{}';".format(
-                    database_name
-                )
-            ),
-            conn,
-        )["TABLE_NAME"].to_list()
-        build_sql_field_report(output_file_name, objects, conn)
+    with QueryScheduler(
+        None, rows_per_second, isolation_level, query_timeout
+    ) as scheduler:
+        with MySQLConnection(server, port, user, password, database_name) as conn:
+            objects = get_mysql_tables(conn, database_name)
+            build_sql_field_report(
+                output_file_name, objects, conn, profile_file, scheduler
+            )
+
+        scheduler.metrics.log()
+
+
+@app.command()
+def Reclassify(
+    profile_file: str,
+    output_file_name: str,
+    choice_distinct_threshold: int = dtypes.CHOICE_DISTINCT_THRESHOLD,
+    choice_ratio_threshold: float = dtypes.CHOICE_RATIO_THRESHOLD,
+    multi_line_threshold: int = dtypes.MULTI_LINE_THRESHOLD,
+    patterns: bool = False,
+    stats: bool = False,
+    duplicates: bool = False,
+    snapshot_file: str = None,
+):
+    """Reclassify
+
+    Rebuild an excel report from saved column profiles with new thresholds, without reading the data again
+
+    Args:
+        profile_file (str): The column profiles saved with --profile-file
+        output_file_name (str): The output file name of the report
+        choice_distinct_threshold (int): Fields with fewer unique values are choices
+        choice_ratio_threshold (float): Fields with a lower unique:count ratio are choices
+        multi_line_threshold (int): Values longer than this are Multi Line
+        patterns (bool): Add the most common value patterns of each field, e.g. AA-9999 (80%)
+        stats (bool): Add the min, max, mean and quartiles of number/date fields, and the lengths of text fields
+        duplicates (bool): Add a sheet grouping the tables and columns with the same content
+        snapshot_file (str): Optional file to save a Parquet snapshot of the run to, for the diff command
+    """
+
+    if not output_file_name.endswith(".xlsx"):
+        output_file_name = "{}.xlsx".format(output_file_name.split(".")[0])
+
+    build_reclassified_field_report(
+        output_file_name,
+        profile_file,
+        choice_distinct_threshold,
+        choice_ratio_threshold,
+        multi_line_threshold,
+        patterns,
+        stats,
+        duplicates,
+        snapshot_file,
+    )
+
+
+@app.command()
+def File_Report(
+    path: str,
+    output_file_name: str,
+    profile_file: str = None,
+    workers: int = 1,
+    typed: bool = False,
+    relationships: bool = False,
+    patterns: bool = False,
+    stats: bool = False,
+    duplicates: bool = False,
+    snapshot_file: str = None,
+):
+    """File Report
+
+    Generate an excel report of every CSV, Excel, Parquet, Arrow IPC and NDJSON file in a directory, or matching a glob pattern
+
+    Args:
+        path (str): A directory, file path or quoted glob pattern, e.g. "exports/**/*.csv"
+        output_file_name (str): The output file name of the report
+        profile_file (str): Optional filepath to save the column profiles to, for reclassify
+        workers (int): The number of workbook sheets read in parallel
+        typed (bool): Narrow workbook text columns to integers/categoricals where lossless, once loaded. Lowers the memory held while profiling, not the peak while reading; no effect on CSV files, which are scanned lazily
+        relationships (bool): Flag likely primary keys and add a sheet of the columns referencing them
+        patterns (bool): Add the most common value patterns of each field, e.g. AA-9999 (80%)
+        stats (bool): Add the min, max, mean and quartiles of number/date fields, and the lengths of text fields
+        duplicates (bool): Add a sheet grouping the files and columns with the same content
+        snapshot_file (str): Optional file to save a Parquet snapshot of the run to, for the diff command
+    """
+
+    if not output_file_name.endswith(".xlsx"):
+        output_file_name = "{}.xlsx".format(output_file_name.split(".")[0])
+
+    build_file_field_report(
+        output_file_name,
+        path,
+        profile_file,
+        workers,
+        typed,
+        relationships,
+        patterns,
+        stats,
+        duplicates,
+        snapshot_file,
+    )
+
+
+@app.command()
+def Diff(
+    old_snapshot: str,
+    new_snapshot: str,
+    output_file_name: str,
+    populated_shift: float = profiling.DIFF_POPULATED_SHIFT,
+    all_fields: bool = False,
+):
+    """Diff
+
+    Generate a report of the fields added, dropped or changed between two runs, from their --snapshot-file snapshots
+
+    Args:
+        old_snapshot (str): The snapshot of the earlier run
+        new_snapshot (str): The snapshot of the later run
+        output_file_name (str): The output file name of the report, .xlsx, .csv or .parquet
+        populated_shift (float): The smallest change of the share of populated rows reported, e.g. 0.05 for 5 percentage points
+        all_fields (bool): Include unchanged fields
+    """
+
+    if not output_file_name.lower().endswith((".xlsx", ".csv", ".parquet")):
+        output_file_name = "{}.xlsx".format(output_file_name.split(".")[0])
+
+    build_diff_report(
+        output_file_name, old_snapshot, new_snapshot, populated_shift, all_fields
+    )
+
+
+@app.command()
+def Serve(
+    host: str = service.SERVICE_HOST,
+    port: int = service.SERVICE_PORT,
+    workers: int = service.SERVICE_WORKERS,
+    pool_size: int = service.SERVICE_POOL_SIZE,
+    cache_ttl: float = service.RESULT_CACHE_TTL,
+):
+    """Serve
+
+    Run a local HTTP/JSON profiling service that keeps connection pools and caches warm between reports
+
+    Args:
+        host (str): The address to listen on
+        port (int): The port to listen on
+        workers (int): The number of tables profiled at once, across all jobs
+        pool_size (int): The number of connections kept open per database
+        cache_ttl (float): Seconds table profiles are reused for
+    """
+
+    server = create_server(
+        host, port, workers=workers, pool_size=pool_size, cache_ttl=cache_ttl
+    )
+    logger.info(f"Serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+        server.service.metrics.log()
+
+
+@app.command()
+def Run_Config(config_file: str):
+    """Run Config
+
+    Generate excel reports for every server, database, schema and file set listed in a TOML/YAML job file, in a single process
+
+    Args:
+        config_file (str): The job file, see the README for its format
+    """
+
+    build_config_field_reports(config_file)
 
 
 if __name__ == "__main__":
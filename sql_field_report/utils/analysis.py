@@ -1,14 +1,35 @@
 import logging
-from typing import Callable, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, Union
 
 import pandas as pd
 import polars as pl
 import regex as re
 from sqlalchemy import text
-from sqlalchemy.engine import Connection
+from sqlalchemy.engine import Connection, Engine
 
 import sql_field_report.constants.datatypes as dtypes
 import sql_field_report.constants.field_report_schema as schema
+import sql_field_report.constants.file_reading as file_reading
+import sql_field_report.constants.profiling as profiling
+
+from .duplicates import (
+    DuplicateIndex,
+    DuplicateStream,
+    add_table_fingerprint,
+    column_fingerprint,
+    duplicate_profile,
+    frame_fingerprint,
+    is_error_frame,
+    is_sample_frame,
+    resolve_duplicates,
+    series_fingerprint,
+)
+from .file_utils import parquet_column_stats
+from .profiles import load_profiles, save_profiles
+from .relationships import is_key_candidate
+from .scheduler import QueryScheduler
+from .sketches import distinct_sketch, key_sketch
 
 logger = logging.getLogger(__name__)
 
@@ -20,28 +41,30 @@ def most_common(lst):
     return max(set(lst), key=lst.count)
 
 
-def estimate_crm_datatype(value, choice_flag):
+def estimate_crm_datatype(
+    value, choice_flag, multi_line_threshold: int = dtypes.MULTI_LINE_THRESHOLD
+):
     """
     Estimate the datatype of a particular value
 
     Params:
     value
     bool: choice_flag
+    int: multi_line_threshold - values longer than this are Multi Line
 
     Returns:
     str: datatype
     """
     value = str(value)
-    dc_number_regex = r"^[0-9.,%xXmMbnB$£€GBPUSDEUR]+$"
-    email_regex = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
-    date_regex = r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}|\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}|\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}|\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}|\d{2,4}-\d{2}-\d{2,4}|\d{4}\/\d{2}\/\d{2} \d{2}:\d{2}:\d{2}\.\d{3}|\d{4}\/\d{2}\/\d{2} \d{2}:\d{2}:\d{2}|\d{2,4}\/\d{2}\/\d{2,4})"
-    url_regex = r"[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*)"
 
-    if re.search(dc_number_regex, value):
+    if re.search(dtypes.NUMBER_REGEX, value):
         # test if it is a DealCloud number field
-        currency_indicators = ["m", "M", "bn", "B", "£", "$", "€", "GBP", "USD", "EUR"]
         if bool(
-            [indicator for indicator in currency_indicators if (indicator in value)]
+            [
+                indicator
+                for indicator in dtypes.CURRENCY_INDICATORS
+                if (indicator in value)
+            ]
         ):
             return dtypes.CURRENCY
         elif "%" in value:
@@ -53,21 +76,27 @@ def estimate_crm_datatype(value, choice_flag):
     else:
         if value == "" or value == " ":
             return dtypes.EMPTY
-        elif re.search(email_regex, value):
+        elif re.search(dtypes.EMAIL_REGEX, value):
             return dtypes.EMAIL
-        elif re.search(date_regex, value):
+        elif re.search(dtypes.DATE_REGEX, value):
             return dtypes.DATETIME
-        elif len(value) > dtypes.MULTI_LINE_THRESHOLD:
+        elif len(value) > multi_line_threshold:
             return dtypes.MULTI_LINE
         elif choice_flag:
             return dtypes.CHOICE_REFERENCE
-        elif len(value) < dtypes.MULTI_LINE_THRESHOLD:
+        elif len(value) < multi_line_threshold:
             return dtypes.SINGLE_LINE
         else:
             return None
 
 
-def get_choice_flag(distinct_count, choice_ratio, count) -> bool:
+def get_choice_flag(
+    distinct_count,
+    choice_ratio,
+    count,
+    distinct_threshold: int = dtypes.CHOICE_DISTINCT_THRESHOLD,
+    ratio_threshold: float = dtypes.CHOICE_RATIO_THRESHOLD,
+) -> bool:
     """
     Determine if a field should be a choice or not
 
@@ -75,12 +104,17 @@ def get_choice_flag(distinct_count, choice_ratio, count) -> bool:
     int: distinct_count - the unique values
     float: choice_ratio - the ratio of unique values:values
     int: count - the count of values
+    int: distinct_threshold - fields with fewer unique values are choices
+    float: ratio_threshold - fields with a lower unique ratio are choices
 
     Returns:
     bool: True if choice else false
     """
     if (
-        (float(distinct_count) < 10 or float(choice_ratio) < 0.05)
+        (
+            float(distinct_count) < distinct_threshold
+            or float(choice_ratio) < ratio_threshold
+        )
         and (not float(distinct_count) == 0)
         and (not float(count) == float(distinct_count))
     ):
@@ -89,6 +123,47 @@ def get_choice_flag(distinct_count, choice_ratio, count) -> bool:
         return False
 
 
+def check_type_matches(
+    datatype: str,
+    profile: dict,
+    choice_flag: bool,
+    multi_line_threshold: int = dtypes.MULTI_LINE_THRESHOLD,
+    ratio: float = dtypes.TYPE_MATCH_RATIO,
+) -> str:
+    """Check a datatype estimated from the most common values of a field
+    against the type-match counts of all its populated values
+
+    Args:
+        datatype (str): the datatype estimated from the most common values
+        profile (dict): the column profile, see profile_column and get_type_matches
+        choice_flag (bool): whether the field is a choice, see get_choice_flag
+        multi_line_threshold (int): values longer than this are Multi Line
+        ratio (float): the share of populated values a rule must match
+
+    Returns:
+        str: the datatype
+    """
+    matches = profile.get("type_matches")
+    populated = profile["populated"]
+    if not matches or not populated:
+        return datatype
+    rule = dtypes.NUMBER if datatype in dtypes.NUMBER_TYPES else datatype
+    if rule in matches and matches[rule] >= ratio * populated:
+        return datatype
+    best, count = max(matches.items(), key=lambda m: m[1])
+    if count >= ratio * populated:
+        return best
+    if rule not in matches:
+        return datatype
+    # the rule only matched the most common values, see estimate_crm_datatype
+    if (profile.get("lengths") or {}).get("max", 0) > multi_line_threshold:
+        return dtypes.MULTI_LINE
+    elif choice_flag:
+        return dtypes.CHOICE_REFERENCE
+    else:
+        return dtypes.SINGLE_LINE
+
+
 def get_series(table: str, data: pd.DataFrame) -> list[tuple[str, pd.Series]]:
     """Accepts a dataframe and returns a list of series
 
@@ -101,167 +176,954 @@ def get_series(table: str, data: pd.DataFrame) -> list[tuple[str, pd.Series]]:
     return list([(table, c, data[c]) for c in data.columns])
 
 
-def get_sql_polars(arg: tuple[str, Connection]) -> pl.DataFrame:
+def get_sql_polars(
+    arg: tuple[str, Connection], scheduler: QueryScheduler = None
+) -> pl.DataFrame:
     """
     Take in a file path and return an overview of the shape of that file
 
     Params:
     str: table - the database table to query
+    QueryScheduler: scheduler - optional limits on the query, see QueryScheduler
 
     Returns:
     Tuple: file_shape - a tuple of tuples containing the file name, field name, row count for each field
     """
     table, conn = arg
+    query = f"SELECT * FROM {table}"
+    if scheduler:
+        return scheduler.read_sql(query, conn)
     # determine counts for abridged analysis
-    data = pl.from_pandas(pd.read_sql(text(f"SELECT * FROM {table}"), conn))
+    data = pl.from_pandas(pd.read_sql(text(query), conn))
 
     return data
 
 
-# noinspection PyArgumentList
-def analyze_data(
+def get_sql_engine_data(
+    table: str, engine: Engine, scheduler: QueryScheduler = None
+) -> pl.DataFrame:
+    """
+    Query a database table over a connection checked out of an engine pool, so
+    that tables can be fetched in parallel
+
+    Params:
+    str: table - the database table to query
+    Engine: engine - SQLAlchemy engine, or databases.ConnectionPool
+    QueryScheduler: scheduler - optional limits on the query, see QueryScheduler
+
+    Returns:
+    pl.DataFrame: the table data
+    """
+    with engine.connect() as conn:
+        return get_sql_polars((table, conn), scheduler)
+
+
+def count_empty(values: pl.DataFrame) -> int:
+    """Count the empty values of a column from its value counts
+
+    Args:
+        values (pl.DataFrame): value counts, as returned by pl.Expr.value_counts
+
+    Returns:
+        int: the number of null (or blank/NaN, depending on dtype) values
+    """
+    column = values.columns[0]
+    dtype = values.dtypes[0]
+    if dtype == pl.Utf8 or dtype == pl.Categorical:
+        condition = (pl.col(column).cast(pl.Utf8) == "") | (pl.col(column).is_null())
+    elif dtype in pl.FLOAT_DTYPES:
+        condition = pl.col(column).is_null() | pl.col(column).is_nan()
+    else:
+        condition = pl.col(column).is_null()
+    e = values.filter(condition).select(pl.col("count"))
+    if e.shape[0] > 0:
+        return e.rows(named=True)[0].get("count")
+    else:
+        return 0
+
+
+def get_length_stats(values: pl.DataFrame) -> dict:
+    """Summarise the string lengths of the populated values in a value count frame
+
+    Args:
+        values (pl.DataFrame): value counts, as returned by pl.Expr.value_counts
+
+    Returns:
+        dict: min, max and mean length, or an empty dict if unavailable
+    """
+    column = values.columns[0]
+    try:
+        lengths = values.select(
+            pl.col(column).cast(pl.Utf8).str.len_chars().alias("length"),
+            pl.col("count"),
+        ).filter(pl.col("length") > 0)
+    except Exception:
+        return {}
+    if lengths.shape[0] == 0:
+        return {}
+    total = lengths["count"].sum()
+    return {
+        "min": int(lengths["length"].min()),
+        "max": int(lengths["length"].max()),
+        "mean": float((lengths["length"] * lengths["count"]).sum() / total),
+    }
+
+
+def get_type_matches(values: pl.DataFrame) -> dict:
+    """Count the populated values matching each datatype rule
+
+    Args:
+        values (pl.DataFrame): value counts, as returned by pl.Expr.value_counts
+
+    Returns:
+        dict: a count of values per matched datatype rule
+    """
+    column = values.columns[0]
+    try:
+        text_values = values.select(
+            pl.col(column).cast(pl.Utf8).alias("value"), pl.col("count")
+        ).filter(pl.col("value").is_not_null() & (pl.col("value") != ""))
+        matches = text_values.select(
+            pl.col("count")
+            .filter(pl.col("value").str.contains(dtypes.NUMBER_REGEX))
+            .sum()
+            .alias(dtypes.NUMBER),
+            pl.col("count")
+            .filter(pl.col("value").str.contains(dtypes.EMAIL_REGEX))
+            .sum()
+            .alias(dtypes.EMAIL),
+            pl.col("count")
+            .filter(pl.col("value").str.contains(dtypes.DATE_REGEX))
+            .sum()
+            .alias(dtypes.DATETIME),
+        )
+    except Exception:
+        return {}
+    return {k: int(v or 0) for k, v in matches.row(0, named=True).items()}
+
+
+def get_value_stats(
+    values: pl.DataFrame, quantiles: tuple = profiling.STATS_QUANTILES
+) -> dict:
+    """Summarise the range of the populated values in a value count frame
+
+    Numeric columns, and text columns whose populated values all read as
+    numbers, get a min, max, mean and quantiles. Date/time columns get a min and
+    max, stored as ISO strings so the profile stays JSON serialisable.
+
+    Args:
+        values (pl.DataFrame): value counts, as returned by pl.Expr.value_counts
+        quantiles (tuple): the quantiles kept, e.g. (0.25, 0.5, 0.75)
+
+    Returns:
+        dict: the value stats, or an empty dict if unavailable
+    """
+    column = values.columns[0]
+    dtype = values.dtypes[0]
+    try:
+        if dtype.is_temporal():
+            dates = values.get_column(column).drop_nulls()
+            if dates.len() == 0:
+                return {}
+            return {"min": str(dates.min()), "max": str(dates.max())}
+
+        if dtype.is_numeric():
+            numbers = values.select(
+                pl.col(column).cast(pl.Float64).alias("value"), pl.col("count")
+            )
+        elif dtype == pl.Utf8 or dtype == pl.Categorical:
+            text_values = values.select(
+                pl.col(column).cast(pl.Utf8).str.strip_chars().alias("value"),
+                pl.col("count"),
+            ).filter(pl.col("value").is_not_null() & (pl.col("value") != ""))
+            numbers = text_values.with_columns(
+                pl.col("value").cast(pl.Float64, strict=False)
+            )
+            # text columns only get stats if every populated value is a number
+            if numbers.get_column("value").is_finite().sum() < numbers.shape[0]:
+                return {}
+        else:
+            return {}
+
+        numbers = (
+            numbers.filter(pl.col("value").is_finite())
+            .sort("value")
+            .with_columns(pl.col("count").cum_sum().alias("cumulative"))
+        )
+    except Exception:
+        return {}
+    if numbers.shape[0] == 0:
+        return {}
+
+    total = numbers["cumulative"][-1]
+    return {
+        "min": float(numbers["value"][0]),
+        "max": float(numbers["value"][-1]),
+        "mean": float((numbers["value"] * numbers["count"]).sum() / total),
+        "quantiles": list(
+            [
+                float(numbers.filter(pl.col("cumulative") >= q * total)["value"][0])
+                for q in quantiles
+            ]
+        ),
+    }
+
+
+TEXT_DTYPES = ("Utf8", "String", "Categorical")
+
+
+def format_stat(value) -> str:
+    """Format a value stat for the report, e.g. 12.0 -> "12", "2024-01-31" -> "2024-01-31"
+
+    Args:
+        value: a value stat, see get_value_stats
+
+    Returns:
+        str: the formatted stat, or "" if missing
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.{profiling.STATS_REPORT_DIGITS}g}"
+    return str(value)
+
+
+def format_stats(profile: dict) -> tuple:
+    """Describe the value and length ranges of a column profile
+
+    Args:
+        profile (dict): the column profile, see profile_column
+
+    Returns:
+        tuple: the report stats columns, see schema.STATS_COLUMNS
+    """
+    stats = profile.get("stats") or {}
+    quantiles = stats.get("quantiles") or []
+    lengths = profile.get("lengths") or {}
+    length_range = ""
+    # lengths are only reported for text, the lengths of numbers read as text are not interesting
+    if lengths and str(profile.get("dtype")).startswith(TEXT_DTYPES):
+        length_range = f"{lengths['min']}-{lengths['max']} (mean {lengths['mean']:.1f})"
+    return (
+        format_stat(stats.get("min")),
+        format_stat(stats.get("max")),
+        format_stat(stats.get("mean")),
+        " / ".join(format_stat(q) for q in quantiles),
+        length_range,
+    )
+
+
+def get_patterns(
+    values: pl.DataFrame, sketch_size: int = profiling.PATTERN_SKETCH_SIZE
+) -> tuple[list, int]:
+    """Count the format patterns of the populated values in a value count frame
+
+    Letters are masked as "A" and digits as "9", e.g. "AB-1234" -> "AA-9999".
+
+    Args:
+        values (pl.DataFrame): value counts, as returned by pl.Expr.value_counts
+        sketch_size (int): the maximum number of pattern counts kept
+
+    Returns:
+        tuple[list, int]: [pattern, count] pairs, most common first, and the
+            number of values they were counted from
+    """
+    column = values.columns[0]
+    try:
+        patterns = (
+            values.select(
+                pl.col(column)
+                .cast(pl.Utf8)
+                .str.replace_all(profiling.DIGIT_REGEX, profiling.DIGIT_MASK)
+                .str.replace_all(profiling.LETTER_REGEX, profiling.LETTER_MASK)
+                .str.slice(0, profiling.PATTERN_MAX_LENGTH)
+                .alias("pattern"),
+                pl.col("count"),
+            )
+            .filter(pl.col("pattern").is_not_null() & (pl.col("pattern") != ""))
+            .group_by("pattern")
+            .agg(pl.col("count").sum())
+            .sort(["count", "pattern"], descending=[True, False])
+        )
+    except Exception:
+        return [], 0
+    total = int(patterns["count"].sum())
+    return list([list(p) for p in patterns.head(sketch_size).rows()]), total
+
+
+def format_patterns(profile: dict, top: int = profiling.PATTERN_REPORT_TOP) -> str:
+    """Describe the most common patterns of a column profile and their share of the populated values
+
+    Args:
+        profile (dict): the column profile, see profile_column
+        top (int): the number of patterns shown
+
+    Returns:
+        str: e.g. "AA-9999 (80%); 99/99/9999 (20%)"
+    """
+    patterns = profile.get("patterns") or []
+    total = profile.get("pattern_total") or sum(c for _, c in patterns)
+    if not total:
+        return ""
+    return "; ".join(f"{p} ({c / total:.0%})" for p, c in patterns[:top])
+
+
+def profile_column(
+    table: str,
+    values: pl.DataFrame,
+    length: int,
+    sketch_size: int = None,
+    distinct_sketch_size: int = None,
+    key_sketch_size: int = None,
+) -> dict:
+    """Build a column profile from the value counts of a column
+
+    The profile holds everything needed to classify the column, so a report can
+    be rebuilt from stored profiles without reading the data again. All value
+    counts are kept, so the report is classified from the full counts; they are
+    only cut to a sketch when the profiles are saved, see profiles.save_profiles.
+
+    Args:
+        table (str): the object/table name
+        values (pl.DataFrame): value counts sorted by count, as returned by pl.Expr.value_counts
+        length (int): the number of rows in the table
+        sketch_size (int): if set, the maximum number of value counts kept in the profile
+        distinct_sketch_size (int): if set, keep a mergeable distinct value sketch of this size
+        key_sketch_size (int): if set, keep a sketch of the populated values of this size, for relationships.find_relationships
+
+    Returns:
+        dict: the column profile
+    """
+    column = values.columns[0]
+    empty = count_empty(values)
+    populated = length - empty
+    if populated == 0:
+        unique = 0
+    else:
+        unique = values.shape[0]
+    kept = values.head(sketch_size) if sketch_size else values
+
+    profile = {
+        "table": table,
+        "field": column,
+        "dtype": str(values.dtypes[0]),
+        "count": length,
+        "populated": populated,
+        "unique": unique,
+        "values": [list(v) for v in kept.rows()],
+        "truncated": kept.shape[0] < values.shape[0],
+        "lengths": get_length_stats(values),
+        "type_matches": get_type_matches(values),
+        "stats": get_value_stats(values),
+        "fingerprint": column_fingerprint(values),
+    }
+    profile["patterns"], profile["pattern_total"] = get_patterns(values)
+    if distinct_sketch_size:
+        profile["distinct_sketch"] = distinct_sketch(
+            values.get_column(column), distinct_sketch_size
+        )
+    if key_sketch_size:
+        profile["key_sketch"] = key_sketch(values.get_column(column), key_sketch_size)
+
+    return profile
+
+
+def empty_profile(table: str, column: str) -> dict:
+    """Build the profile of a column in a table with no rows
+
+    Args:
+        table (str): the object/table name
+        column (str): the column name
+
+    Returns:
+        dict: the column profile
+    """
+    return {
+        "table": table,
+        "field": column,
+        "dtype": None,
+        "count": 0,
+        "populated": 0,
+        "unique": 0,
+        "values": [],
+        "truncated": False,
+        "lengths": {},
+        "type_matches": {},
+        "stats": {},
+        "fingerprint": [0, 0],
+        "patterns": [],
+        "pattern_total": 0,
+    }
+
+
+def classify_profile(
+    profile: dict,
+    choice_distinct_threshold: int = dtypes.CHOICE_DISTINCT_THRESHOLD,
+    choice_ratio_threshold: float = dtypes.CHOICE_RATIO_THRESHOLD,
+    multi_line_threshold: int = dtypes.MULTI_LINE_THRESHOLD,
+) -> tuple:
+    """Classify a column profile into a field report row
+
+    Fields whose profile only kept some of their values (sampled columns, or
+    profiles saved with a value count sketch) are never choices, as their choice
+    list would be incomplete. The datatype is estimated from the most common
+    values, and checked against the type matches of all values, see
+    check_type_matches.
+
+    Args:
+        profile (dict): the column profile, see profile_column
+        choice_distinct_threshold (int): fields with fewer unique values are choices
+        choice_ratio_threshold (float): fields with a lower unique ratio are choices
+        multi_line_threshold (int): values longer than this are Multi Line
+
+    Returns:
+        tuple: a row of the field report, see schema.FIELD_REPORT_SCHEMA
+    """
+    table = profile["table"]
+    column = profile["field"]
+    length = profile["count"]
+    populated = profile["populated"]
+    unique = profile["unique"]
+    values = [v[0] for v in profile["values"]]
+
+    if length == 0:
+        return (table, column, length, populated, unique, "EMPTY", "", "")
+
+    choice_ratio = float(unique) / float(length)
+    choice_flag = get_choice_flag(
+        unique,
+        choice_ratio,
+        length,
+        choice_distinct_threshold,
+        choice_ratio_threshold,
+    )
+    if choice_flag and profile.get("truncated"):
+        # only some of the values were kept (e.g. the prefix of a sampled
+        # column), so a choice list would silently miss values
+        logger.warning(
+            f"{table}.{column} has {unique} unique values, more than its profile "
+            "kept, so it is not reported as a choice"
+        )
+        choice_flag = False
+
+    if populated == 0:
+        datatype = dtypes.EMPTY
+    else:
+        types = list(
+            [
+                estimate_crm_datatype(v, choice_flag, multi_line_threshold)
+                for v in values[:5]
+            ]
+        )
+        datatype = check_type_matches(
+            most_common(types), profile, choice_flag, multi_line_threshold
+        )
+    top_five = "; ".join(
+        filter(
+            lambda x: x is not None,
+            list([str(x)[:50] if x != "" else None for x in values[:6]]),
+        )
+    )
+
+    choices = ""
+    if datatype == dtypes.CHOICE_REFERENCE:
+        choices = values
+
+    return (table, column, length, populated, unique, datatype, top_five, choices)
+
+
+def is_high_cardinality(
+    data: pl.DataFrame, column: str, length: int, text_values: bool = False
+) -> int:
+    """Check whether a column clearly exceeds the choice thresholds
+
+    The cardinality of a prefix of the column is checked first, so the
+    approximate unique count is only computed for likely ID, free text or
+    timestamp columns.
+
+    Args:
+        data (pl.DataFrame): the data
+        column (str): the column to check
+        length (int): the number of rows in the data
+        text_values (bool): estimate the unique count of the values as text, see
+            profile_frame, so narrowed columns get the same estimate as text
+
+    Returns:
+        int: the approximate unique count if the column is high cardinality, otherwise 0
+    """
+    if (
+        not profiling.CARDINALITY_EARLY_EXIT
+        or length < profiling.CARDINALITY_PREFIX_SIZE
+    ):
+        return 0
+    prefix = data.get_column(column).head(profiling.CARDINALITY_PREFIX_SIZE)
+    if prefix.n_unique() < profiling.HIGH_CARDINALITY_RATIO * prefix.len():
+        return 0
+    values = pl.col(column).cast(pl.Utf8) if text_values else pl.col(column)
+    unique = data.select(values.approx_n_unique()).item()
+    choice_limit = max(
+        dtypes.CHOICE_DISTINCT_THRESHOLD, dtypes.CHOICE_RATIO_THRESHOLD * length
+    )
+    if unique > choice_limit * profiling.CARDINALITY_MARGIN:
+        return unique
+    return 0
+
+
+def fast_profile_column(
+    table: str,
+    data: pl.DataFrame,
+    column: str,
+    length: int,
+    unique: int,
+    distinct_sketch_size: int = None,
+    key_sketch_size: int = None,
+    text_values: bool = False,
+    **options,
+) -> dict:
+    """Build the profile of a high cardinality column without a full value count
+
+    Only the populated count is computed over the whole column. Sample values,
+    length stats and type matches come from the value counts of a prefix. The
+    approximate unique count is capped at the populated count, and replaced by
+    the exact count when it is near it (likely keys), see EXACT_UNIQUE_MARGIN.
+
+    Args:
+        table (str): the object/table name
+        data (pl.DataFrame): the data
+        column (str): the column to profile
+        length (int): the number of rows in the data
+        unique (int): the approximate unique count, see is_high_cardinality
+        distinct_sketch_size (int): if set, keep a mergeable distinct value sketch of this size
+        key_sketch_size (int): if set, keep a sketch of the populated values of this size
+        text_values (bool): profile the values as text, see profile_frame
+
+    Returns:
+        dict: the column profile
+    """
+    series = data.get_column(column)
+    empty = series.null_count()
+    # like count_empty, only the most common kind of empty value is counted
+    if series.dtype == pl.Utf8 or series.dtype == pl.Categorical:
+        empty = max(empty, int((series.cast(pl.Utf8) == "").sum()))
+    elif series.dtype in pl.FLOAT_DTYPES:
+        empty = max(empty, int(series.is_nan().sum()))
+
+    sample = (
+        series.head(profiling.CARDINALITY_PREFIX_SIZE)
+        .value_counts(sort=True)
+        .select(pl.col(column), pl.col("count"))
+    )
+    if text_values:
+        series = series.cast(pl.Utf8)
+        sample = sample.with_columns(pl.col(column).cast(pl.Utf8))
+    populated = length - empty
+    if unique >= (1 - profiling.EXACT_UNIQUE_MARGIN) * populated:
+        unique = series.n_unique()
+    profile = profile_column(table, sample, length, **options)
+    profile.update(
+        populated=populated,
+        unique=min(unique, populated),
+        truncated=True,
+        sampled=True,
+        # the column is already in memory, so its range and fingerprint are not left to the sample
+        stats=get_value_stats(
+            series.to_frame().with_columns(pl.lit(1, pl.UInt32).alias("count"))
+        ),
+        fingerprint=series_fingerprint(series),
+    )
+    if distinct_sketch_size:
+        profile["distinct_sketch"] = distinct_sketch(series, distinct_sketch_size)
+    if key_sketch_size:
+        profile["key_sketch"] = key_sketch(series, key_sketch_size)
+
+    return profile
+
+
+def stats_value_counts(
+    column: str, dtype: pl.DataType, stats: dict, length: int
+) -> pl.DataFrame:
+    """Build the value counts of a column from file metadata, when that is enough
+
+    Args:
+        column (str): the column name
+        dtype (pl.DataType): the column dtype
+        stats (dict): the column null count, min and max, see file_utils.parquet_column_stats
+        length (int): the number of rows
+
+    Returns:
+        pl.DataFrame: the value counts if the column is all null or constant, otherwise None
+    """
+    if stats is None:
+        return None
+    if stats["null_count"] == length:
+        value = None
+    elif stats["null_count"] == 0 and stats["min"] is not None:
+        if stats["min"] != stats["max"]:
+            return None
+        value = stats["min"]
+    else:
+        return None
+    try:
+        return pl.DataFrame(
+            [
+                pl.Series(column, [value], dtype=dtype),
+                pl.Series("count", [length], dtype=pl.UInt32),
+            ]
+        )
+    except Exception:
+        return None
+
+
+def profile_lazy_frame(
+    table: str, data: pl.LazyFrame, stats: dict = None, **options
+) -> list[dict]:
+    """Profile each column of a lazy frame, loading one column at a time
+
+    Only the profiled column is read from the source (projection pushdown), and
+    columns that file metadata shows to be all null or constant are not read.
+    This suits columnar files (Parquet, Arrow IPC) only, row oriented sources
+    are parsed in full for every column.
+
+    Args:
+        table (str): the object/table name
+        data (pl.LazyFrame): the data to profile
+        stats (dict): optional column metadata, see file_utils.parquet_column_stats
+        options: column profile options, see profile_column
+
+    Returns:
+        list[dict]: A profile for each column of the data
+    """
+    stats = stats or {}
+    schema = data.schema
+    length = data.select(pl.len()).collect().item()
+    if length == 0:
+        return list([empty_profile(table, i) for i in schema])
+
+    profiles = []
+    for i, dtype in schema.items():
+        values = stats_value_counts(i, dtype, stats.get(i), length)
+        if values is not None:
+            profiles.append(profile_column(table, values, length, **options))
+        else:
+            profiles.extend(
+                profile_frame(table, data.select(pl.col(i)).collect(), **options)
+            )
+    return profiles
+
+
+def profile_frame(
+    table: str, data: pl.DataFrame, text_values: bool = False, **options
+) -> list[dict]:
+    """Profile each column of a dataframe
+
+    Args:
+        table (str): the object/table name
+        data (pl.DataFrame): the data to profile
+        text_values (bool): cast the counted values back to text, for data read
+            with narrowed text columns (see file_utils.read_file)
+        options: column profile options, see profile_column
+
+    Returns:
+        list[dict]: A profile for each column of the data
+    """
+    if isinstance(data, pl.LazyFrame):
+        return profile_lazy_frame(table, data, **options)
+    length = data.shape[0]
+    profiles = []
+    if length != 0:
+        for i in data.columns:
+            unique = is_high_cardinality(data, i, length, text_values)
+            if unique:
+                profiles.append(
+                    fast_profile_column(
+                        table,
+                        data,
+                        i,
+                        length,
+                        unique,
+                        text_values=text_values,
+                        **options,
+                    )
+                )
+                continue
+            values = data.select(pl.col(i).value_counts(sort=True)).select(
+                [
+                    pl.col(i).struct.field(i),
+                    pl.col(i).struct.field("count"),
+                ]
+            )
+            if text_values:
+                values = values.with_columns(pl.col(i).cast(pl.Utf8))
+            profiles.append(profile_column(table, values, length, **options))
+    else:
+        for i in data.columns:
+            profiles.append(empty_profile(table, i))
+
+    return profiles
+
+
+def profile_data(
     table: Union[str, tuple],
     get_data: Callable[[str], pl.DataFrame],
     cnx: str = None,
+    typed: bool = False,
+    key_sketch_size: int = None,
+    duplicates: DuplicateIndex = None,
+    get_fingerprint: Callable[[str], str] = None,
     **kwargs,
-) -> list[tuple]:
-    """Analyze data
+) -> list[dict]:
+    """Profile data
 
     Args:
         table (str): the object/table name - will be passed to the get_data function
         get_data (Callable[[str], pl.DataFrame]):  A function that will take in a table name and return a Dataframe
         cnx (object): ConnectorX Connection object
+        typed (bool): pass typed=True to get_data, which returns text columns
+            narrowed to integer/categorical dtypes, see file_utils.read_file
+        key_sketch_size (int): if set, keep a sketch of each column's values for relationship discovery
+        duplicates (DuplicateIndex): if set, tables duplicating an earlier table are not profiled
+        get_fingerprint (Callable[[str], str]): optional function returning a
+            table fingerprint without fetching the data, called like get_data,
+            e.g. get_mssql_fingerprint
 
     Returns:
-        tuple: A tuple describing the shape of the data
+        list[dict]: A profile for each column of the data, or a placeholder for
+            a duplicate table, see duplicates.resolve_duplicates
     """
     logger.info(f"Analysing {table}...")
-    res = []
+    fingerprint = None
+    if duplicates is not None and get_fingerprint:
+        name = table[0] if isinstance(table, tuple) else table
+        if cnx:
+            fingerprint = get_fingerprint(table, cnx, **kwargs)
+        else:
+            fingerprint = get_fingerprint(table, **kwargs)
+        original = duplicates.claim(fingerprint, name) if fingerprint else None
+        if original:
+            logger.info(f"{name} is a duplicate of {original}, skipping...")
+            return [duplicate_profile(name, original, fingerprint)]
+
+    if typed:
+        kwargs["typed"] = True
     if cnx:
         data = get_data(table, cnx, **kwargs)
     else:
         data = get_data(table, **kwargs)
+
+    return profile_fetched(table, data, typed, key_sketch_size, duplicates, fingerprint)
+
+
+def profile_fetched(
+    table: Union[str, tuple],
+    data: Union[pl.DataFrame, pl.LazyFrame],
+    typed: bool = False,
+    key_sketch_size: int = None,
+    duplicates: DuplicateIndex = None,
+    fingerprint: str = None,
+) -> list[dict]:
+    """Profile data returned by a get_data function, see profile_data
+
+    Args:
+        table (str): the object/table passed to the get_data function
+        data (Union[pl.DataFrame, pl.LazyFrame]): the data it returned
+        typed (bool): whether the data was read with narrowed text columns
+        key_sketch_size (int): if set, keep a sketch of each column's values for relationship discovery
+        duplicates (DuplicateIndex): if set, tables duplicating an earlier table are not profiled
+        fingerprint (str): the table fingerprint, if already known
+
+    Returns:
+        list[dict]: A profile for each column of the data, or a placeholder for
+            a duplicate table, see duplicates.resolve_duplicates
+    """
     if isinstance(table, tuple):
         table = table[0]
-    length = data.shape[0]
-    report = []
-    if length != 0:
-        for i in data.columns:
-            res.append(
-                data.select(pl.col(i).value_counts(sort=True)).select(
-                    [
-                        pl.col(i).struct.field(i),
-                        pl.col(i).struct.field("count"),
-                    ]
-                )
-            )
 
-        for i in res:
-            column = i.columns[0]
-            if i.dtypes[0] == pl.Utf8:
-                e = i.filter(
-                    (pl.col(column) == "") | (pl.col(column).is_null())
-                ).select(pl.col("count"))
-                if e.shape[0] > 0:
-                    empty = e.rows(named=True)[0].get("count")
-                else:
-                    empty = 0
-            elif i.dtypes[0] in pl.INTEGER_DTYPES or i.dtypes[0] in pl.FLOAT_DTYPES:
-                e = i.filter(pl.col(column).is_null() | pl.col(column).is_nan()).select(
-                    pl.col("count")
-                )
-                if e.shape[0] > 0:
-                    empty = e.rows(named=True)[0].get("count")
-                else:
-                    empty = 0
-            else:
-                e = i.filter(pl.col(column).is_null()).select(pl.col("count"))
-                if e.shape[0] > 0:
-                    empty = e.rows(named=True)[0].get("count")
-                else:
-                    empty = 0
-            populated = length - empty
-            if populated == 0:
-                unique = 0
-            else:
-                unique = i.shape[0]
-
-            choice_ratio = float(unique) / float(length)
-            choice_flag = get_choice_flag(unique, choice_ratio, length)
-
-            if populated == 0:
-                datatype = dtypes.EMPTY
-            else:
-                types = list(
-                    [
-                        estimate_crm_datatype(v, choice_flag)
-                        for v in i.select(pl.col(column)).head().to_series().to_list()
-                    ]
-                )
-                datatype = most_common(types)
-            top_five = "; ".join(
-                filter(
-                    lambda x: x is not None,
-                    list(
-                        [
-                            str(x)[:50] if x != "" else None
-                            for x in i.head(6).to_dict(as_series=False).get(column)
-                        ]
-                    ),
-                )
-            )
+    if isinstance(data, pl.LazyFrame) and not table.lower().endswith(
+        file_reading.COLUMNAR_EXTENSIONS
+    ):
+        # row oriented files (NDJSON) would be parsed again for every column
+        data = data.collect()
 
-            choices = ""
-            if datatype == dtypes.CHOICE_REFERENCE:
-                choices = i.select(pl.col(column)).to_dict(as_series=False).get(column)
+    error = isinstance(data, pl.DataFrame) and is_error_frame(data)
+    sample = is_sample_frame(data)
+    if error:
+        # failed tables all return the same placeholder, which is not their content
+        if duplicates is not None and fingerprint is not None:
+            duplicates.release(fingerprint, table)
+        fingerprint = None
+    elif duplicates is not None and fingerprint is None and not sample:
+        if isinstance(data, pl.DataFrame) and data.shape[0]:
+            fingerprint = frame_fingerprint(data)
+            original = duplicates.claim(fingerprint, table)
+            if original:
+                logger.info(f"{table} is a duplicate of {original}, skipping...")
+                return [duplicate_profile(table, original, fingerprint)]
 
-            report.append(
-                (table, column, length, populated, unique, datatype, top_five, choices)
-            )
+    if isinstance(data, pl.LazyFrame):
+        stats = None
+        if table.lower().endswith(file_reading.PARQUET_EXTENSIONS):
+            stats = parquet_column_stats(table)
+        profiles = profile_lazy_frame(
+            table, data, stats, key_sketch_size=key_sketch_size
+        )
     else:
-        for i in data.columns:
-            column = i
-            populated = 0
-            unique = 0
-            datatype = "EMPTY"
-            top_five = ""
-            choices = ""
-
-            report.append(
-                (table, column, length, populated, unique, datatype, top_five, choices)
-            )
+        profiles = profile_frame(
+            table, data, text_values=typed, key_sketch_size=key_sketch_size
+        )
+
+    if error or sample:
+        # the fingerprints would be those of the placeholder or the sample; a
+        # sample keeps the fingerprint of the whole table from get_fingerprint
+        for p in profiles:
+            p["fingerprint"] = None
+            p["table_fingerprint"] = fingerprint
+        return profiles
+    return add_table_fingerprint(profiles, fingerprint)
 
-    return report
 
+# noinspection PyArgumentList
+def analyze_data(
+    table: Union[str, tuple],
+    get_data: Callable[[str], pl.DataFrame],
+    cnx: str = None,
+    **kwargs,
+) -> list[tuple]:
+    """Analyze data
 
-def analyze_sql_tables(objects: list, conn: Connection) -> pd.DataFrame:
+    Args:
+        table (str): the object/table name - will be passed to the get_data function
+        get_data (Callable[[str], pl.DataFrame]):  A function that will take in a table name and return a Dataframe
+        cnx (object): ConnectorX Connection object
+
+    Returns:
+        tuple: A tuple describing the shape of the data
+    """
+    return list(
+        [classify_profile(p) for p in profile_data(table, get_data, cnx, **kwargs)]
+    )
+
+
+def build_analysis(
+    profiles: list[dict], patterns: bool = False, stats: bool = False, **thresholds
+) -> pd.DataFrame:
+    """
+    Build the analysis dataframe from column profiles
+
+    Params:
+    list profiles - column profiles, see profile_column
+    bool patterns - add the most common value patterns of each field, see format_patterns
+    bool stats - add the value and length ranges of each field, see format_stats
+    thresholds - classification thresholds, see classify_profile
+
+    Returns:
+    pd.DataFrame: analysis - a summary of all files, fields and their row counts
+    """
+    data_shapes = tuple(classify_profile(p, **thresholds) for p in profiles)
+
+    analysis = pd.DataFrame(
+        data=data_shapes,
+        columns=schema.FIELD_REPORT_SCHEMA,
+    )
+
+    if stats:
+        analysis[schema.STATS_COLUMNS] = pd.DataFrame(
+            data=list([format_stats(p) for p in profiles]),
+            columns=schema.STATS_COLUMNS,
+            index=analysis.index,
+        )
+
+    if patterns:
+        analysis[schema.PATTERNS] = list([format_patterns(p) for p in profiles])
+
+    # profiled for relationship discovery, see relationships.find_relationships
+    if any("key_sketch" in p for p in profiles):
+        analysis[schema.KEY_CANDIDATE] = list(
+            ["Yes" if is_key_candidate(p) else "" for p in profiles]
+        )
+
+    return analysis
+
+
+def analyze_sql_tables(
+    objects: list,
+    conn: Connection,
+    profile_file: str = None,
+    scheduler: QueryScheduler = None,
+) -> pd.DataFrame:
     """
     Analyze SQL Tables
 
     Params:
     list db_tables - list of database tables
     conn - sql server connection
+    str profile_file - optional filepath to save the column profiles to
+    QueryScheduler scheduler - optional limits on the queries, see QueryScheduler
 
     Returns:
     pd.DataFrame: analysis - a summary of all files, fields and their row counts
     """
 
-    # data_shapes = tuple(analyze_sql_table(l, conn) for l in objects)
-    data_shapes = tuple(analyze_data((l, conn), get_sql_polars) for l in objects)
+    profiles = tuple(
+        profile_data((l, conn), get_sql_polars, scheduler=scheduler) for l in objects
+    )
 
     # flatten tuple
-    data_shapes = tuple((element for t in data_shapes for element in t))
+    profiles = list((element for t in profiles for element in t))
 
-    analysis = pd.DataFrame(
-        data=data_shapes,
-        columns=schema.FIELD_REPORT_SCHEMA,
-    )
+    if profile_file:
+        save_profiles(profiles, profile_file)
 
-    return analysis
+    return build_analysis(profiles)
+
+
+def profile_objects(
+    objects: list,
+    get_data: Callable[[str], pl.DataFrame],
+    cnx: str = None,
+    max_workers: int = 1,
+    skip_duplicates: bool = False,
+    **kwargs,
+) -> list[dict]:
+    """
+    Profile tables/files, keeping their order
+
+    Params:
+    list objects - list of tables, passed to get_data
+    get_data - a function returning a Dataframe for a table
+    cnx - optional connection passed to get_data
+    int max_workers - the number of tables fetched and analysed in parallel
+    bool skip_duplicates - copy the profiles of tables with the same content as an earlier table, instead of profiling them
+    kwargs - see profile_data
+
+    Returns:
+    list[dict]: profiles - a profile for each column of each table
+    """
+    if skip_duplicates:
+        kwargs["duplicates"] = DuplicateIndex()
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="analysis") as pool:
+            profiles = tuple(
+                pool.map(lambda l: profile_data(l, get_data, cnx, **kwargs), objects)
+            )
+    else:
+        profiles = tuple(profile_data(l, get_data, cnx, **kwargs) for l in objects)
+
+    # flatten tuple
+    profiles = list((element for t in profiles for element in t))
+    if skip_duplicates:
+        profiles = resolve_duplicates(profiles)
+    return profiles
 
 
 def analyze_polars_dataframes(
-    objects: list, get_data: Callable[[str], pl.DataFrame], cnx: str = None, **kwargs
+    objects: list,
+    get_data: Callable[[str], pl.DataFrame],
+    cnx: str = None,
+    profile_file: str = None,
+    max_workers: int = 1,
+    patterns: bool = False,
+    stats: bool = False,
+    **kwargs,
 ) -> pd.DataFrame:
     """
     Analyze Files
@@ -269,19 +1131,116 @@ def analyze_polars_dataframes(
     Params:
     list db_tables - list of database tables
     conn - sql server connection
+    str profile_file - optional filepath to save the column profiles to
+    int max_workers - the number of tables fetched and analysed in parallel
+    bool patterns - add the most common value patterns of each field
+    bool stats - add the value and length ranges of each field
 
     Returns:
     pd.DataFrame: analysis - a summary of all files, fields and their row counts
     """
 
-    data_shapes = tuple(analyze_data(l, get_data, cnx, **kwargs) for l in objects)
+    profiles = profile_objects(objects, get_data, cnx, max_workers, **kwargs)
 
-    # flatten tuple
-    data_shapes = tuple((element for t in data_shapes for element in t))
+    if profile_file:
+        save_profiles(profiles, profile_file)
 
-    analysis = pd.DataFrame(
-        data=data_shapes,
-        columns=schema.FIELD_REPORT_SCHEMA,
-    )
+    return build_analysis(profiles, patterns, stats)
 
-    return analysis
+
+def iter_profiles(
+    objects: list,
+    get_data: Callable[[str], pl.DataFrame],
+    cnx: str = None,
+    max_workers: int = 1,
+    skip_duplicates: bool = False,
+    relationships: bool = False,
+    **kwargs,
+) -> Iterator[list[dict]]:
+    """Profile tables, yielding the profiles of each table as soon as it is done
+
+    With max_workers > 1 tables are profiled in parallel and yielded in the
+    order they complete, otherwise one at a time in objects order. Tables not
+    yet started are cancelled if the iterator is closed early; tables already
+    being profiled are finished first. With skip_duplicates, a duplicate table
+    is yielded once the table it copies is done.
+
+    Args:
+        objects (list): the tables - each will be passed to the get_data function
+        get_data (Callable[[str], pl.DataFrame]): A function that will take in a table name and return a Dataframe
+        cnx (object): ConnectorX Connection object
+        max_workers (int): the number of tables fetched and analysed in parallel
+        skip_duplicates (bool): copy the profiles of tables with the same content as an earlier table, instead of profiling them
+        relationships (bool): keep the key sketches find_relationships needs
+        kwargs: see profile_data
+
+    Returns:
+        Iterator[list[dict]]: the column profiles of each table
+    """
+    if skip_duplicates:
+        kwargs["duplicates"] = DuplicateIndex()
+    if relationships:
+        kwargs.setdefault("key_sketch_size", profiling.KEY_SKETCH_SIZE)
+    stream = DuplicateStream()
+
+    if max_workers <= 1:
+        for table in objects:
+            yield from stream.add(profile_data(table, get_data, cnx, **kwargs))
+        return
+
+    pool = ThreadPoolExecutor(max_workers, thread_name_prefix="analysis")
+    try:
+        futures = list(
+            [pool.submit(profile_data, o, get_data, cnx, **kwargs) for o in objects]
+        )
+        for future in as_completed(futures):
+            yield from stream.add(future.result())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_field_report(
+    objects: list,
+    get_data: Callable[[str], pl.DataFrame],
+    cnx: str = None,
+    max_workers: int = 1,
+    patterns: bool = False,
+    stats: bool = False,
+    **kwargs,
+) -> Iterator[pd.DataFrame]:
+    """Analyze tables, yielding the report rows of each table as soon as it is done
+
+    See iter_profiles. Concatenated, the yielded frames hold the same rows as
+    analyze_polars_dataframes, in completion order.
+
+    Args:
+        objects (list): the tables - each will be passed to the get_data function
+        get_data (Callable[[str], pl.DataFrame]): A function that will take in a table name and return a Dataframe
+        cnx (object): ConnectorX Connection object
+        max_workers (int): the number of tables fetched and analysed in parallel
+        patterns (bool): add the most common value patterns of each field, see build_analysis
+        stats (bool): add the value and length ranges of each field, see build_analysis
+
+    Returns:
+        Iterator[pd.DataFrame]: the field report rows of each table
+    """
+    for profiles in iter_profiles(objects, get_data, cnx, max_workers, **kwargs):
+        yield build_analysis(profiles, patterns=patterns, stats=stats)
+
+
+def reclassify_profiles(
+    profile_file: str, patterns: bool = False, stats: bool = False, **thresholds
+) -> pd.DataFrame:
+    """
+    Rebuild the analysis from saved column profiles, without reading the data again
+
+    Params:
+    str profile_file - filepath of profiles saved by analyze_polars_dataframes/analyze_sql_tables
+    bool patterns - add the most common value patterns of each field, see format_patterns
+    bool stats - add the value and length ranges of each field, see format_stats
+    thresholds - classification thresholds, see classify_profile
+
+    Returns:
+    pd.DataFrame: analysis - a summary of all files, fields and their row counts
+    """
+    return build_analysis(load_profiles(profile_file), patterns, stats, **thresholds)
@@ -0,0 +1,209 @@
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Union
+
+import pandas as pd
+import polars as pl
+from sqlalchemy import text
+
+import sql_field_report.constants.profiling as profiling
+
+from .analysis import build_analysis, profile_fetched
+from .duplicates import DuplicateIndex, DuplicateStream, duplicate_profile
+
+logger = logging.getLogger(__name__)
+
+
+async def get_async_engine_data(table: str, engine) -> pl.DataFrame:
+    """Fetch a table through a SQLAlchemy AsyncEngine
+
+    The engine's connection pool bounds the connections held open, e.g.
+    create_async_engine("mssql+aioodbc://...", pool_size=8). Requires an async
+    driver (aioodbc, aiomysql, aiosqlite, ...).
+
+    Args:
+        table (str): The table
+        engine (AsyncEngine): The engine
+
+    Returns:
+        pl.DataFrame: The data
+    """
+    async with engine.connect() as conn:
+        result = await conn.execute(text(f"SELECT * FROM {table}"))
+        columns = list(result.keys())
+        rows = result.fetchall()
+    return pl.DataFrame(
+        [tuple(r) for r in rows], schema=columns, orient="row", infer_schema_length=None
+    )
+
+
+async def fetch_data(
+    table: Union[str, tuple],
+    get_data: Callable,
+    cnx: str = None,
+    fetch_executor: Executor = None,
+    **kwargs,
+) -> Union[pl.DataFrame, pl.LazyFrame]:
+    """Fetch a table with an async get_data function, or a blocking one in an executor"""
+    args = (table, cnx) if cnx else (table,)
+    if asyncio.iscoroutinefunction(get_data):
+        return await get_data(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        fetch_executor, functools.partial(get_data, *args, **kwargs)
+    )
+
+
+async def aiter_profiles(
+    objects: list,
+    get_data: Callable,
+    cnx: str = None,
+    max_in_flight: int = profiling.ASYNC_MAX_IN_FLIGHT,
+    executor: Executor = None,
+    typed: bool = False,
+    fetch_workers: int = profiling.ASYNC_FETCH_WORKERS,
+    key_sketch_size: int = None,
+    relationships: bool = False,
+    skip_duplicates: bool = False,
+    get_fingerprint: Callable = None,
+    **kwargs,
+) -> AsyncIterator[list[dict]]:
+    """Profile tables on an event loop, yielding each table's profiles as soon as it is done
+
+    Up to max_in_flight tables are fetched and analysed at once. An async
+    get_data function (e.g. get_async_engine_data) is awaited, so waiting on the
+    network costs no threads. A blocking get_data function cannot wait without
+    a thread, so it is run on at most fetch_workers threads, and only that many
+    of its fetches are in flight. The CPU bound profiling is run in executor,
+    which defaults to a pool of one thread per CPU.
+
+    Args:
+        objects (list): the tables - each will be passed to the get_data function
+        get_data (Callable): A function or coroutine function that will take in a table name and return a Dataframe
+        cnx (object): Connection object passed to get_data
+        max_in_flight (int): the number of tables fetched and analysed at once
+        executor (Executor): runs the profiling
+        typed (bool): pass typed=True to get_data, see profile_data
+        fetch_workers (int): the number of threads running a blocking get_data function
+        key_sketch_size (int): if set, keep a sketch of each column's values for relationship discovery
+        relationships (bool): keep the key sketches find_relationships needs
+        skip_duplicates (bool): copy the profiles of tables with the same content as an earlier table, instead of profiling them
+        get_fingerprint (Callable): optional function or coroutine function
+            returning a table fingerprint without fetching the data, see profile_data
+
+    Returns:
+        AsyncIterator[list[dict]]: the column profiles of each table, in completion order
+    """
+    fetch_kwargs = dict(kwargs, typed=True) if typed else kwargs
+    if relationships and not key_sketch_size:
+        key_sketch_size = profiling.KEY_SKETCH_SIZE
+    duplicates = DuplicateIndex() if skip_duplicates else None
+    stream = DuplicateStream()
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_in_flight)
+    fetch_executor = None
+    if not asyncio.iscoroutinefunction(get_data) or (
+        get_fingerprint and not asyncio.iscoroutinefunction(get_fingerprint)
+    ):
+        fetch_executor = ThreadPoolExecutor(
+            min(fetch_workers, max_in_flight), thread_name_prefix="fetch"
+        )
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(
+            os.cpu_count() or 1, thread_name_prefix="analysis"
+        )
+
+    async def profile(table):
+        async with semaphore:
+            logger.info(f"Analysing {table}...")
+            fingerprint = None
+            if duplicates is not None and get_fingerprint:
+                name = table[0] if isinstance(table, tuple) else table
+                fingerprint = await fetch_data(
+                    table, get_fingerprint, cnx, fetch_executor, **kwargs
+                )
+                original = duplicates.claim(fingerprint, name) if fingerprint else None
+                if original:
+                    logger.info(f"{name} is a duplicate of {original}, skipping...")
+                    return [duplicate_profile(name, original, fingerprint)]
+            data = await fetch_data(
+                table, get_data, cnx, fetch_executor, **fetch_kwargs
+            )
+            return await loop.run_in_executor(
+                executor,
+                profile_fetched,
+                table,
+                data,
+                typed,
+                key_sketch_size,
+                duplicates,
+                fingerprint,
+            )
+
+    tasks = list([asyncio.ensure_future(profile(o)) for o in objects])
+    try:
+        for task in asyncio.as_completed(tasks):
+            for profiles in stream.add(await task):
+                yield profiles
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if fetch_executor:
+            fetch_executor.shutdown(wait=False)
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+async def aiter_field_report(
+    objects: list,
+    get_data: Callable,
+    cnx: str = None,
+    patterns: bool = False,
+    stats: bool = False,
+    **kwargs,
+) -> AsyncIterator[pd.DataFrame]:
+    """Analyze tables on an event loop, yielding each table's report rows as soon as it is done
+
+    See aiter_profiles and iter_field_report.
+
+    Args:
+        objects (list): the tables - each will be passed to the get_data function
+        get_data (Callable): A function or coroutine function that will take in a table name and return a Dataframe
+        cnx (object): Connection object passed to get_data
+        patterns (bool): add the most common value patterns of each field, see build_analysis
+        stats (bool): add the value and length ranges of each field, see build_analysis
+
+    Returns:
+        AsyncIterator[pd.DataFrame]: the field report rows of each table
+    """
+    async for profiles in aiter_profiles(objects, get_data, cnx, **kwargs):
+        yield build_analysis(profiles, patterns=patterns, stats=stats)
+
+
+async def analyze_async(
+    objects: list, get_data: Callable, cnx: str = None, **kwargs
+) -> pd.DataFrame:
+    """
+    Analyze tables on an event loop
+
+    Params:
+    list objects - list of tables, passed to get_data
+    get_data - a function or coroutine function returning a Dataframe for a table
+    cnx - optional connection passed to get_data
+    kwargs - see aiter_profiles
+
+    Returns:
+    pd.DataFrame: analysis - a summary of all tables, fields and their row counts, in objects order
+    """
+    profiles = {}
+    async for table_profiles in aiter_profiles(objects, get_data, cnx, **kwargs):
+        if table_profiles:
+            profiles[table_profiles[0]["table"]] = table_profiles
+
+    names = list([o[0] if isinstance(o, tuple) else o for o in objects])
+    return build_analysis([p for n in names for p in profiles.get(n, [])])
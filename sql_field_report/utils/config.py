@@ -0,0 +1,160 @@
+import glob
+import os
+import sys
+
+import yaml
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+from .scheduler import SNAPSHOT
+
+MSSQL = "mssql"
+MYSQL = "mysql"
+FILES = "files"
+TARGET_TYPES = [MSSQL, MYSQL, FILES]
+
+DATABASE_KEYS = ["server", "port", "user", "database"]
+
+
+def read_config_file(file_path: str) -> dict:
+    """Read a TOML or YAML job file
+
+    Args:
+        file_path (str): The job file, .toml, .yaml or .yml
+
+    Returns:
+        dict: The parsed job file
+    """
+    if file_path.endswith(".toml"):
+        with open(file_path, "rb") as f:
+            return tomllib.load(f)
+    elif file_path.endswith((".yaml", ".yml")):
+        with open(file_path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)
+    else:
+        raise ValueError(f"Job file must be .toml, .yaml or .yml, not {file_path}")
+
+
+def load_config(file_path: str) -> dict:
+    """Load and validate a job file listing many report targets
+
+    Example (TOML):
+
+        output_dir = "reports"
+        combined_report = "All_Clients.xlsx"
+        workers = 8
+        max_concurrent_queries = 2
+
+        [[targets]]
+        type = "mssql"
+        server = "sql01"
+        port = 1433
+        user = "reporting"
+        password_env = "SQL01_PASSWORD"
+        database = "Client1"
+        schema = "dbo"
+
+        [[targets]]
+        type = "files"
+        name = "client2_dump"
+        files = ["dumps/client2/*.csv"]
+
+    Database targets read their password from password, or from the environment
+    variable named by password_env. A target can limit its tables with tables.
+    A files target can set typed = true to read its text columns narrowed to
+    integer/categorical dtypes, see file_utils.read_file. Setting pool_size keeps
+    that many connections open per database for the run, see ConnectionPool.
+    Setting relationships = true adds key candidates and relationships to every
+    report, including the combined report, see relationships.find_relationships.
+    Setting patterns = true adds the most common value patterns of each field,
+    and stats = true their min, max, mean, quartiles and text lengths. Setting
+    duplicates = true adds a sheet grouping the tables and columns with the
+    same content; in the combined report these can be in different targets.
+    Setting snapshot_dir saves a snapshot of each target to <name>.parquet in
+    that directory, for the diff command.
+
+    Args:
+        file_path (str): The job file, .toml, .yaml or .yml
+
+    Returns:
+        dict: The job settings, with defaults filled in
+    """
+    config = read_config_file(file_path) or {}
+    targets = config.get("targets")
+    if not targets:
+        raise ValueError(f"Job file {file_path} has no targets")
+
+    config.setdefault("output_dir", ".")
+    config.setdefault("combined_report", None)
+    config.setdefault("per_target_reports", True)
+    config.setdefault("workers", 4)
+    config.setdefault("max_concurrent_queries", None)
+    config.setdefault("rows_per_second", None)
+    config.setdefault("isolation_level", None)
+    config.setdefault("query_timeout", None)
+    config.setdefault("pool_size", None)
+    config.setdefault("relationships", False)
+    config.setdefault("patterns", False)
+    config.setdefault("stats", False)
+    config.setdefault("duplicates", False)
+    config.setdefault("snapshot_dir", None)
+
+    isolation_level = config["isolation_level"]
+    if isolation_level and isolation_level.upper() == SNAPSHOT:
+        if not config["pool_size"] and any(t.get("type") == MSSQL for t in targets):
+            raise ValueError(
+                "SNAPSHOT isolation needs pool_size for mssql targets, it cannot be set through connectorx"
+            )
+
+    names = set()
+    for i, target in enumerate(targets):
+        target_type = target.get("type")
+        if target_type not in TARGET_TYPES:
+            raise ValueError(
+                f"Target {i} type must be one of: {TARGET_TYPES}, not {target_type}"
+            )
+
+        if target_type == FILES:
+            if not target.get("files"):
+                raise ValueError(f"Target {i} has no files")
+            target.setdefault("name", f"files{i}")
+            target.setdefault("typed", False)
+        else:
+            missing = [k for k in DATABASE_KEYS if k not in target]
+            if missing:
+                raise ValueError(f"Target {i} is missing: {missing}")
+            if "password_env" in target:
+                target["password"] = os.getenv(target["password_env"])
+            if target.get("password") is None:
+                raise ValueError(f"Target {i} has no password or password_env")
+            if target_type == MSSQL:
+                target.setdefault("schema", "dbo")
+                target.setdefault("name", f"{target['database']}_{target['schema']}")
+            else:
+                target.setdefault("name", target["database"])
+
+        if target["name"] in names:
+            raise ValueError(f"Target name {target['name']} is used more than once")
+        names.add(target["name"])
+        target.setdefault("output_file", f"{target['name']}.xlsx")
+
+    return config
+
+
+def expand_files(patterns: list[str]) -> list[str]:
+    """Expand file paths and glob patterns, keeping their order
+
+    Args:
+        patterns (list[str]): File paths or glob patterns
+
+    Returns:
+        list[str]: The matching file paths
+    """
+    files = {}
+    for pattern in patterns:
+        for match in sorted(glob.glob(pattern, recursive=True)):
+            files.setdefault(match, None)
+    return list(files)
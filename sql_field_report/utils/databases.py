@@ -1,6 +1,16 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from urllib.parse import quote_plus
 
-from sqlalchemy import URL, create_engine
+from sqlalchemy import URL, Connection, create_engine, exc
+
+import sql_field_report.constants.connections as connections
+
+from .metrics import RunMetrics
+
+logger = logging.getLogger(__name__)
 
 
 class DBConnection(object):
@@ -113,3 +123,153 @@ class MySQLConnection(DBConnection):
     def __exit__(self, type, value, traceback):
         self.conn.close()
         self.engine.dispose()
+
+
+class ConnectionPool(object):
+    """Keeps a pool of connections open for a whole report run
+
+    Connections are checked with a ping before they are handed out, and failed
+    connection attempts are retried with exponential backoff. The time spent
+    waiting for a connection is added to the run metrics as pool_wait_seconds.
+
+    Parameters:
+        url (Union[str, URL]): The SQLAlchemy database URL
+        pool_size (int): The number of connections kept open
+        max_overflow (int): The number of extra connections allowed under load
+        pool_timeout (float): Seconds to wait for a free connection
+        pool_recycle (int): Seconds after which connections are replaced
+        retries (int): The number of times a failed connection attempt is retried
+        backoff (float): Seconds to wait before the first retry, doubled for each retry
+        metrics (RunMetrics): The run metrics, e.g. QueryScheduler.metrics
+    """
+
+    def __init__(
+        self,
+        url,
+        pool_size: int = connections.POOL_SIZE,
+        max_overflow: int = connections.POOL_MAX_OVERFLOW,
+        pool_timeout: float = connections.POOL_TIMEOUT,
+        pool_recycle: int = connections.POOL_RECYCLE,
+        retries: int = connections.CONNECT_RETRIES,
+        backoff: float = connections.CONNECT_BACKOFF,
+        metrics: RunMetrics = None,
+        **engine_kwargs,
+    ):
+        self.url = url
+        self.retries = retries
+        self.backoff = backoff
+        self.metrics = metrics or RunMetrics()
+        self._engine_kwargs = dict(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=True,
+            **engine_kwargs,
+        )
+        self.engine = None
+
+    def __enter__(self):
+        self.engine = create_engine(self.url, **self._engine_kwargs)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.engine.dispose()
+
+    def checkout(self) -> Connection:
+        """Check out a connection, retrying failed attempts with backoff
+
+        Returns:
+            Connection: SQLAlchemy connection, to be closed to return it to the pool
+        """
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                conn = self.engine.connect()
+            except (exc.OperationalError, exc.InterfaceError, exc.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2**attempt
+                logger.warning(f"Connection failed, retrying in {delay}s: {e}")
+                self.metrics.add("connection_retries")
+                time.sleep(delay)
+            else:
+                self.metrics.add("pool_checkouts")
+                return conn
+            finally:
+                self.metrics.add("pool_wait_seconds", time.perf_counter() - start)
+
+    @contextmanager
+    def connect(self):
+        """Check out a connection for the duration of a with block, like Engine.connect"""
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+class PooledDBConnection(DBConnection, ABC):
+    """Provides a DB Connection Pool, see ConnectionPool
+
+    Parameters:
+        server (str): The server name/address
+        port (int): The server port
+        user (str): The username
+        password (str): The passowrd
+        db_name (str): The name of the database
+        pool_options: ConnectionPool parameters
+    """
+
+    def __init__(
+        self,
+        server: str,
+        port: int,
+        user: str,
+        password: str,
+        db_name: str,
+        **pool_options,
+    ):
+        super().__init__(server, port, user, password, db_name)
+        self._pool_options = pool_options
+        self.pool = None
+
+    @abstractmethod
+    def _url(self) -> URL:
+        """The SQLAlchemy URL of the database, for the pool's engine"""
+
+    def __enter__(self):
+        self.pool = ConnectionPool(self._url(), **self._pool_options)
+        return self.pool.__enter__()
+
+    def __exit__(self, type, value, traceback):
+        self.pool.__exit__(type, value, traceback)
+
+
+class MSSQLConnectionPool(PooledDBConnection):
+    """Provides an MSSQL Connection Pool, see PooledDBConnection"""
+
+    def _url(self) -> URL:
+        return URL.create(
+            "mssql+pyodbc",
+            username=self._user,
+            password=self._password,
+            host=self._server,
+            port=self._port,
+            database=self._db_name,
+            query={"driver": connections.MSSQL_ODBC_DRIVER},
+        )
+
+
+class MySQLConnectionPool(PooledDBConnection):
+    """Provides an MySQL Connection Pool, see PooledDBConnection"""
+
+    def _url(self) -> URL:
+        return URL.create(
+            "mysql+mysqlconnector",
+            username=self._user,
+            password=self._password,
+            host=self._server,
+            port=self._port,
+            database=self._db_name,
+        )
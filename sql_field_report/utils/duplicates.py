@@ -0,0 +1,378 @@
+"""Content fingerprints of columns and tables, for finding duplicates
+
+A column fingerprint is the sum of the hashes of its values, as text, so it
+does not depend on the order of the rows and can be built from value counts
+(each hash weighted by its count) as well as from the column itself. Sums of
+the fingerprints of batches of rows are the fingerprint of all of them. The
+high and low 32 bits of the 64 bit hashes are summed separately, so the sums
+cannot overflow.
+
+A table fingerprint combines the row count with the field names and
+fingerprints of its columns.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+
+import pandas as pd
+import polars as pl
+
+import sql_field_report.constants.field_report_schema as schema
+import sql_field_report.constants.profiling as profiling
+
+logger = logging.getLogger(__name__)
+
+HALF = 2**32
+
+
+def column_fingerprint(values: pl.DataFrame) -> list[int]:
+    """Build the content fingerprint of a column from its value counts
+
+    Nulls are hashed as blank text, so a NULL in a database and an empty cell
+    in a CSV file match.
+
+    Args:
+        values (pl.DataFrame): value counts, as returned by pl.Expr.value_counts
+
+    Returns:
+        list[int]: the high and low fingerprint sums, or None if the values cannot be read as text
+    """
+    column = values.columns[0]
+    try:
+        hashes = values.select(
+            pl.col(column)
+            .cast(pl.Utf8)
+            .fill_null("")
+            .hash(seed=profiling.SKETCH_HASH_SEED)
+            .alias("hash"),
+            pl.col("count").cast(pl.UInt64),
+        ).select(
+            ((pl.col("hash") // HALF) * pl.col("count")).sum().alias("high"),
+            ((pl.col("hash") % HALF) * pl.col("count")).sum().alias("low"),
+        )
+    except Exception:
+        return None
+    return list([int(v) for v in hashes.row(0)])
+
+
+def series_fingerprint(values: pl.Series) -> list[int]:
+    """Build the content fingerprint of a column, see column_fingerprint
+
+    Args:
+        values (pl.Series): the column
+
+    Returns:
+        list[int]: the high and low fingerprint sums, or None if the values cannot be read as text
+    """
+    return column_fingerprint(
+        values.to_frame().with_columns(pl.lit(1, pl.UInt64).alias("count"))
+    )
+
+
+def blank_fingerprint(count: int) -> list[int]:
+    """Build the fingerprint of a column of nulls
+
+    Args:
+        count (int): the number of rows
+
+    Returns:
+        list[int]: the high and low fingerprint sums
+    """
+    return column_fingerprint(
+        pl.DataFrame(
+            [
+                pl.Series("blank", [None], dtype=pl.Utf8),
+                pl.Series("count", [count], dtype=pl.UInt64),
+            ]
+        )
+    )
+
+
+def merge_fingerprints(a: list[int], b: list[int]) -> list[int]:
+    """Merge the column fingerprints of two batches of rows of the same column
+
+    Args:
+        a (list[int]): a column fingerprint
+        b (list[int]): a column fingerprint
+
+    Returns:
+        list[int]: the fingerprint of both batches, or None if either is missing
+    """
+    if a is None or b is None:
+        return None
+    return list([x + y for x, y in zip(a, b)])
+
+
+def table_fingerprint(rows: int, columns: dict) -> str:
+    """Combine the column fingerprints of a table
+
+    Args:
+        rows (int): the number of rows of the table
+        columns (dict): the fingerprint of each field, by field name
+
+    Returns:
+        str: the table fingerprint
+    """
+    key = json.dumps([rows, sorted([str(k).lower(), v] for k, v in columns.items())])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def add_table_fingerprint(profiles: list[dict], fingerprint: str = None) -> list[dict]:
+    """Add the table fingerprint to the column profiles of a table
+
+    Args:
+        profiles (list[dict]): the column profiles of one table, see analysis.profile_column
+        fingerprint (str): the table fingerprint, built from the column fingerprints if not given
+            and all of them are known
+
+    Returns:
+        list[dict]: the column profiles
+    """
+    if fingerprint is None and all(p.get("fingerprint") for p in profiles or [None]):
+        # tables with unfingerprinted columns (failed or sampled) have none either
+        fingerprint = table_fingerprint(
+            profiles[0]["count"], {p["field"]: p["fingerprint"] for p in profiles}
+        )
+    for p in profiles:
+        p["table_fingerprint"] = fingerprint
+    return profiles
+
+
+def frame_fingerprint(data: pl.DataFrame) -> str:
+    """Build the table fingerprint of a dataframe
+
+    Args:
+        data (pl.DataFrame): the data
+
+    Returns:
+        str: the table fingerprint, see table_fingerprint
+    """
+    return table_fingerprint(
+        data.shape[0],
+        {c: series_fingerprint(data.get_column(c)) for c in data.columns},
+    )
+
+
+def error_frame() -> pl.DataFrame:
+    """Build the placeholder a get_data function returns when a table cannot be read
+
+    Returns:
+        pl.DataFrame: a single cell in the profiling.ERROR_FIELD column
+    """
+    return pl.from_records(data=[[0]], schema=[profiling.ERROR_FIELD])
+
+
+def is_error_frame(data: pl.DataFrame) -> bool:
+    """Check for the placeholder a get_data function returns when a table cannot be read
+
+    Args:
+        data (pl.DataFrame): the data returned by a get_data function
+
+    Returns:
+        bool: whether the data is an error placeholder, see profiling.ERROR_FIELD
+    """
+    return data.columns == [profiling.ERROR_FIELD]
+
+
+def sample_frame(data: pl.DataFrame) -> pl.DataFrame:
+    """Mark data a get_data function returns as only some of the rows of a table
+
+    The fingerprints of a sample are not those of its table, so the table and
+    its columns are left out of the duplicate groups, see is_sample_frame.
+
+    Args:
+        data (pl.DataFrame): the rows fetched, e.g. the TOP(50000) of a large table
+
+    Returns:
+        pl.DataFrame: the data
+    """
+    data.is_sample = True
+    return data
+
+
+def is_sample_frame(data: pl.DataFrame) -> bool:
+    """Check for data marked with sample_frame
+
+    Args:
+        data (pl.DataFrame): the data returned by a get_data function
+
+    Returns:
+        bool: whether the data is only some of the rows of its table
+    """
+    return getattr(data, "is_sample", False)
+
+
+class DuplicateIndex:
+    """The tables seen so far in a run, by fingerprint
+
+    Shared by the worker threads of a run, so that a table whose fingerprint
+    matches an earlier table is not profiled again, see resolve_duplicates.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.lock = threading.Lock()
+
+    def claim(self, fingerprint: str, table: str) -> str:
+        """Register a table fingerprint
+
+        Args:
+            fingerprint (str): the table fingerprint
+            table (str): the table name
+
+        Returns:
+            str: the table first seen with the fingerprint, or None if this is the first
+        """
+        with self.lock:
+            original = self.tables.setdefault(fingerprint, table)
+        return None if original == table else original
+
+    def release(self, fingerprint: str, table: str):
+        """Unregister a table fingerprint claimed by a table that could not be read
+
+        Args:
+            fingerprint (str): the table fingerprint
+            table (str): the table name
+        """
+        with self.lock:
+            if self.tables.get(fingerprint) == table:
+                del self.tables[fingerprint]
+
+
+def duplicate_profile(table: str, original: str, fingerprint: str) -> dict:
+    """Build a placeholder for the profiles of a table that duplicates another
+
+    Args:
+        table (str): the table name
+        original (str): the table it duplicates
+        fingerprint (str): their table fingerprint
+
+    Returns:
+        dict: the placeholder, replaced with copies of the original's profiles by resolve_duplicates
+    """
+    return {"table": table, "duplicate_of": original, "table_fingerprint": fingerprint}
+
+
+def resolve_duplicates(profiles: list[dict]) -> list[dict]:
+    """Replace duplicate table placeholders with copies of the original's profiles
+
+    Args:
+        profiles (list[dict]): column profiles, and placeholders from duplicate_profile
+
+    Returns:
+        list[dict]: the column profiles
+    """
+    originals = {}
+    for p in profiles:
+        if "duplicate_of" not in p:
+            originals.setdefault(p["table"], []).append(p)
+
+    resolved = []
+    for p in profiles:
+        if "duplicate_of" in p:
+            resolved.extend(
+                dict(o, table=p["table"]) for o in originals.get(p["duplicate_of"], [])
+            )
+        else:
+            resolved.append(p)
+    return resolved
+
+
+class DuplicateStream:
+    """Resolves duplicate table placeholders of tables profiled one at a time
+
+    The streaming counterpart of resolve_duplicates: a placeholder is replaced
+    with copies of the original's profiles as soon as the original is done.
+    """
+
+    def __init__(self):
+        self.originals = {}
+        self.waiting = {}
+
+    def add(self, profiles: list[dict]) -> list[list[dict]]:
+        """Add the profiles of a table
+
+        Args:
+            profiles (list[dict]): the column profiles of a table, or a placeholder from duplicate_profile
+
+        Returns:
+            list[list[dict]]: the column profiles of each table now resolved
+        """
+        if len(profiles) == 1 and "duplicate_of" in profiles[0]:
+            placeholder = profiles[0]
+            if placeholder["duplicate_of"] not in self.originals:
+                self.waiting.setdefault(placeholder["duplicate_of"], []).append(
+                    placeholder
+                )
+                return []
+            return [self._copy(placeholder)]
+        if not profiles:
+            return [profiles]
+        table = profiles[0]["table"]
+        self.originals[table] = profiles
+        return [profiles] + [self._copy(p) for p in self.waiting.pop(table, [])]
+
+    def _copy(self, placeholder: dict) -> list[dict]:
+        original = self.originals[placeholder["duplicate_of"]]
+        return list([dict(o, table=placeholder["table"]) for o in original])
+
+
+def find_duplicates(
+    profiles: list[dict], min_distinct: int = profiling.DUPLICATE_MIN_DISTINCT
+) -> pd.DataFrame:
+    """Group the tables and columns with the same content
+
+    Tables are duplicates if their field names, row counts and column contents
+    match. Columns are duplicates if they hold the same values with the same
+    counts; the columns of the later copies of a duplicate table are left out,
+    as they are implied by the table group.
+
+    Args:
+        profiles (list[dict]): column profiles with fingerprints, see analysis.profile_column
+        min_distinct (int): columns with fewer unique values are not grouped
+
+    Returns:
+        pd.DataFrame: the duplicate groups, see schema.DUPLICATE_SCHEMA
+    """
+    tables = {}
+    for p in profiles:
+        if p.get("table_fingerprint") and p["count"]:
+            tables.setdefault(p["table_fingerprint"], {}).setdefault(
+                p["table"], p["count"]
+            )
+
+    duplicates = []
+    copies = set()
+    group = 0
+    for members in tables.values():
+        if len(members) < 2:
+            continue
+        group += 1
+        for i, (table, count) in enumerate(members.items()):
+            duplicates.append((group, schema.TABLE_KIND, table, "", count))
+            if i:
+                copies.add(table)
+
+    columns = {}
+    for p in profiles:
+        if (
+            p.get("fingerprint") is None
+            or p["table"] in copies
+            or p["unique"] < min_distinct
+        ):
+            continue
+        key = (p["count"], tuple(p["fingerprint"]))
+        columns.setdefault(key, []).append(p)
+
+    for members in columns.values():
+        if len(members) < 2:
+            continue
+        group += 1
+        for p in members:
+            duplicates.append(
+                (group, schema.COLUMN_KIND, p["table"], p["field"], p["count"])
+            )
+
+    return pd.DataFrame.from_records(duplicates, columns=schema.DUPLICATE_SCHEMA)
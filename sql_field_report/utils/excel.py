@@ -30,12 +30,139 @@ def parse_file(file: str) -> str:
     return value
 
 
-def generate_excel_report(analysis: pd.DataFrame, file_path: str) -> str:
+def split_mapping_sheets(choice_values: pd.DataFrame) -> list[tuple[str, list]]:
+    """Split the choice fields of each table into mapping sheets
+
+    The choices are grouped by table in one pass. A table's mapping tables
+    spill over to extra sheets after schema.MAPPING_TABLES_PER_SHEET, or when
+    they would pass Excel's column limit, and a field with more values than fit
+    in a sheet is split into several mapping tables.
+
+    Args:
+        choice_values (pd.DataFrame): the Table/File, Field and Choices of the choice fields
+
+    Returns:
+        list[tuple[str, list]]: a unique sheet name and its (field, values) mapping tables
+    """
+    per_sheet = min(
+        schema.MAPPING_TABLES_PER_SHEET,
+        schema.EXCEL_MAX_COLUMNS // schema.MAPPING_TABLE_COLUMNS_COUNT,
+    )
+    max_values = schema.EXCEL_MAX_ROWS - 1
+
+    sheets = []
+    names = set()
+    for table, choices in choice_values.groupby(schema.TABLE_FILE, sort=False):
+        mapping_tables = []
+        for field, values in choices.drop_duplicates(schema.FIELD)[
+            [schema.FIELD, schema.CHOICES]
+        ].itertuples(index=False):
+            values = list(
+                [
+                    (
+                        re.sub(illegal_chars.ILLEGAL_CHARACTERS_RE, "", v)
+                        if isinstance(v, str)
+                        else v
+                    )
+                    for v in values
+                ]
+            )
+            values = list([v for v in values if v != ""])
+            mapping_tables.append((field, values[:max_values]))
+            for part, start in enumerate(
+                range(max_values, len(values), max_values), start=2
+            ):
+                mapping_tables.append(
+                    (f"{field} ({part})", values[start : start + max_values])
+                )
+
+        base = re.sub(illegal_chars.INVALID_TITLE_REGEX, "", f"Mappings- {table}")[:25]
+        for start in range(0, len(mapping_tables), per_sheet):
+            name = base
+            n = 1
+            while name.lower() in names:
+                n += 1
+                name = f"{base} ({n})"[: schema.EXCEL_MAX_SHEET_NAME]
+            names.add(name.lower())
+            sheets.append((name, mapping_tables[start : start + per_sheet]))
+
+    return sheets
+
+
+def write_mapping_sheet(
+    ws,
+    mapping_tables: list[tuple[str, list]],
+    value_fill: PatternFill,
+    options_fill: PatternFill,
+    header_border: Border,
+    header_font: Font,
+    header_alignment: Alignment,
+):
+    """Write the mapping tables of a sheet side by side, one row at a time
+
+    Args:
+        ws (Worksheet): the mapping sheet
+        mapping_tables (list[tuple[str, list]]): the (field, values) mapping tables, see split_mapping_sheets
+        value_fill (PatternFill): the fill of the legacy and target columns
+        options_fill (PatternFill): the fill of the options column
+        header_border (Border): the border of the header cells
+        header_font (Font): the font of the header cells
+        header_alignment (Alignment): the alignment of the legacy and target headers
+    """
+    width = len(mapping_tables) * schema.MAPPING_TABLE_COLUMNS_COUNT
+    rows = max(len(values) for _, values in mapping_tables) + 1
+
+    for r in range(rows):
+        row = [None] * width
+        for i, (field, values) in enumerate(mapping_tables):
+            start = i * schema.MAPPING_TABLE_COLUMNS_COUNT
+            if r == 0:
+                row[start + schema.LEGACY_COL_IDX] = f"{field}- {schema.LEGACY}"
+                row[start + schema.TARGET_COL_IDX] = f"{field}- {schema.TARGET}"
+                row[start + schema.OPTIONS_COL_IDX] = f"{field}- Options"
+            elif r == 1:
+                row[start + schema.OPTIONS_COL_IDX] = "{Insert CRM Options Here}"
+            if 0 < r <= len(values):
+                row[start + schema.LEGACY_COL_IDX] = values[r - 1]
+        ws.append(row)
+
+    for i, (field, values) in enumerate(mapping_tables):
+        legacy_col = schema.calculate_col_index_for_mapping_table(
+            i, schema.LEGACY_COL_IDX
+        )
+        target_col = schema.calculate_col_index_for_mapping_table(
+            i, schema.TARGET_COL_IDX
+        )
+        options_col = schema.calculate_col_index_for_mapping_table(
+            i, schema.OPTIONS_COL_IDX
+        )
+        for col in (legacy_col, target_col, options_col):
+            ws.column_dimensions[get_column_letter(col)].width = 30
+            header = ws.cell(row=1, column=col)
+            header.font = header_font
+            header.border = header_border
+        ws.cell(row=1, column=legacy_col).alignment = header_alignment
+        ws.cell(row=1, column=target_col).alignment = header_alignment
+
+        for r in range(1, len(values) + 2):
+            ws.cell(row=r, column=legacy_col).fill = value_fill
+            ws.cell(row=r, column=target_col).fill = value_fill
+            ws.cell(row=r, column=options_col).fill = options_fill
+
+
+def generate_excel_report(
+    analysis: pd.DataFrame,
+    file_path: str,
+    relationships: pd.DataFrame = None,
+    duplicates: pd.DataFrame = None,
+) -> str:
     """Generate an excel data report
 
     Args:
         analysis (pd.DataFrame): the analysis dataframe
         filepath (str): the filepath to the produced excel
+        relationships (pd.DataFrame): optional relationships sheet, see relationships.find_relationships
+        duplicates (pd.DataFrame): optional duplicates sheet, see duplicates.find_duplicates
 
     Returns:
         str: the filepath of the produced excel
@@ -66,6 +193,7 @@ def generate_excel_report(analysis: pd.DataFrame, file_path: str) -> str:
             schema.DATATYPE,
             schema.TOP_VALUES,
         ]
+        + list([c for c in schema.OPTIONAL_COLUMNS if c in analysis.columns])
     ]
 
     try:
@@ -117,6 +245,8 @@ def generate_excel_report(analysis: pd.DataFrame, file_path: str) -> str:
             ws.column_dimensions["E"].width = 10
             ws.column_dimensions["F"].width = 20
             ws.column_dimensions["G"].width = 100
+            for col in range(8, ws.max_column + 1):
+                ws.column_dimensions[get_column_letter(col)].width = 30
 
             even = False
             for i, row in enumerate(ws.iter_rows()):
@@ -138,96 +268,39 @@ def generate_excel_report(analysis: pd.DataFrame, file_path: str) -> str:
 
             ws.add_table(field_report_table)
 
-            # Generate mapping tables
-            # get tables with choice values
-            tables_with_choices = (
-                choice_values[schema.TABLE_FILE].drop_duplicates(keep="first").to_list()
-            )
-
-            for choice_table in tables_with_choices:
-                sheet_name = re.sub(
-                    illegal_chars.INVALID_TITLE_REGEX, "", f"Mappings- {choice_table}"
-                )[:25]
-
-                # get choice fields from table
-
-                choices = choice_values[
-                    choice_values[schema.TABLE_FILE] == choice_table
-                ]
-                choice_fields = (
-                    choices[schema.FIELD].drop_duplicates(keep="first").to_list()
+            if relationships is not None:
+                relationships = relationships.copy()
+                for column in (schema.TABLE_FILE, schema.REFERENCES_TABLE_FILE):
+                    relationships[column] = relationships[column].apply(parse_file)
+                relationships.to_excel(xlsx, sheet_name="Relationships", index=False)
+                rs = xlsx.sheets["Relationships"]
+                for column, width in zip("ABCDE", (30, 50, 30, 50, 12)):
+                    rs.column_dimensions[column].width = width
+
+            if duplicates is not None:
+                duplicates = duplicates.copy()
+                duplicates[schema.TABLE_FILE] = duplicates[schema.TABLE_FILE].apply(
+                    parse_file
                 )
-                mapping_table_count = 0
-                for choice_field in choice_fields:
-                    mapping_table_data = choices[choices[schema.FIELD] == choice_field][
-                        schema.CHOICES
-                    ].to_list()[0]
-                    mapping_table_data = list([[m, ""] for m in mapping_table_data])
-                    mapping_table = pd.DataFrame.from_records(
-                        data=mapping_table_data,
-                        columns=[
-                            f"{choice_field}- {schema.LEGACY}",
-                            f"{choice_field}- {schema.TARGET}",
-                        ],
-                    ).replace(illegal_chars.ILLEGAL_CHARACTERS_RE, "", regex=True)
-                    mapping_table = mapping_table[
-                        mapping_table[f"{choice_field}- {schema.LEGACY}"] != ""
-                    ]
-                    mapping_table.to_excel(
-                        xlsx,
-                        sheet_name=sheet_name,
-                        startcol=mapping_table_count
-                        * schema.MAPPING_TABLE_COLUMNS_COUNT,
-                        index=False,
-                    )
-                    choice_sheet = xlsx.sheets[sheet_name]
-                    start_col = schema.calculate_col_index_for_mapping_table(
-                        mapping_table_count, schema.LEGACY_COL_IDX
-                    )
-                    end_col = schema.calculate_col_index_for_mapping_table(
-                        mapping_table_count, schema.TARGET_COL_IDX
-                    )
-                    options_col = schema.calculate_col_index_for_mapping_table(
-                        mapping_table_count, schema.OPTIONS_COL_IDX
-                    )
+                duplicates.to_excel(xlsx, sheet_name="Duplicates", index=False)
+                ds = xlsx.sheets["Duplicates"]
+                for column, width in zip("ABCDE", (16, 10, 30, 50, 12)):
+                    ds.column_dimensions[column].width = width
 
-                    choice_sheet[f"{get_column_letter(options_col)}1"].value = (
-                        f"{choice_field}- Options"
-                    )
-                    choice_sheet[f"{get_column_letter(options_col)}1"].font = Font(
-                        bold=True
-                    )
-                    choice_sheet[f"{get_column_letter(options_col)}1"].border = (
-                        thin_border
-                    )
-                    choice_sheet[f"{get_column_letter(options_col)}2"].value = (
-                        f"{{Insert CRM Options Here}}"
-                    )
-
-                    choice_sheet.column_dimensions[
-                        get_column_letter(start_col)
-                    ].width = "30"
-
-                    choice_sheet.column_dimensions[get_column_letter(end_col)].width = (
-                        "30"
-                    )
-
-                    choice_sheet.column_dimensions[
-                        get_column_letter(options_col)
-                    ].width = "30"
-
-                    for row in range(mapping_table.shape[0] + 1):
-                        choice_sheet[f"{get_column_letter(start_col)}{row+1}"].fill = (
-                            even_fill
-                        )
-                        choice_sheet[f"{get_column_letter(end_col)}{row+1}"].fill = (
-                            even_fill
-                        )
-                        choice_sheet[
-                            f"{get_column_letter(options_col)}{row+1}"
-                        ].fill = gold_fill
-
-                    mapping_table_count += 1
+            # Generate mapping tables
+            header_font = Font(bold=True)
+            header_alignment = Alignment(horizontal="center", vertical="top")
+            for sheet_name, mapping_tables in split_mapping_sheets(choice_values):
+                choice_sheet = xlsx.book.create_sheet(sheet_name)
+                write_mapping_sheet(
+                    choice_sheet,
+                    mapping_tables,
+                    even_fill,
+                    gold_fill,
+                    thin_border,
+                    header_font,
+                    header_alignment,
+                )
 
         logger.info("Excel Report Generated")
 
@@ -0,0 +1,305 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+
+import polars as pl
+
+import sql_field_report.constants.file_reading as file_reading
+
+from .analysis import empty_profile, profile_column, profile_data, profile_fetched
+from .config import expand_files
+from .duplicates import add_table_fingerprint, error_frame
+from .file_utils import (
+    check_encoding,
+    detect_encoding,
+    expand_workbooks,
+    read_file,
+    transcode_to_utf8,
+)
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (
+    (".csv",)
+    + file_reading.EXCEL_EXTENSIONS
+    + file_reading.PARQUET_EXTENSIONS
+    + file_reading.IPC_EXTENSIONS
+    + file_reading.NDJSON_EXTENSIONS
+)
+
+
+def find_files(path: str) -> list[str]:
+    """Find the supported files in a directory, or matching a glob pattern
+
+    Args:
+        path (str): A directory, file path or glob pattern
+
+    Returns:
+        list[str]: The matching files, sorted
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, "*")
+    return list(
+        [
+            f
+            for f in expand_files([path])
+            if os.path.isfile(f) and f.lower().endswith(SUPPORTED_EXTENSIONS)
+        ]
+    )
+
+
+def scan_file(file: str, encoding: str = None) -> tuple[pl.LazyFrame, str]:
+    """Scan a CSV, Parquet, Arrow IPC or NDJSON file lazily
+
+    The encoding of each CSV is still checked, see file_utils.check_encoding:
+    files with the same schema can have different encodings. The check reads
+    at most ENCODING_SAMPLE_SIZE bytes and only runs chardet when the sample
+    is not UTF-8, so for UTF-8/ASCII files it is a small part of the scan.
+
+    Args:
+        file (str): The file
+        encoding (str): The CSV encoding, checked if not given
+
+    Returns:
+        tuple[pl.LazyFrame, str]: The scan, and the path of a transcoded copy to
+            remove once the scan is collected (or None)
+    """
+    if not file.lower().endswith(".csv"):
+        return read_file(file), None
+    encoding = encoding or check_encoding(file)
+    if encoding in (file_reading.UTF8, file_reading.UTF8_LOSSY):
+        return pl.scan_csv(file, encoding=encoding, infer_schema_length=0), None
+    path = transcode_to_utf8(file, encoding)
+    return pl.scan_csv(path, infer_schema_length=0), path
+
+
+def rescan_file(file: str, scan: pl.LazyFrame, transcoded: list) -> pl.LazyFrame:
+    """Scan a CSV file scanned as UTF-8 again, with the encoding of the whole file
+
+    Args:
+        file (str): The file
+        scan (pl.LazyFrame): Its scan as UTF-8, see scan_file
+        transcoded (list): The transcoded copies to remove once the scans are collected
+
+    Returns:
+        pl.LazyFrame: The scan
+    """
+    encoding = detect_encoding(file)
+    if encoding == file_reading.UTF8:
+        return scan
+    logger.info(f"{file} is not UTF-8 past its sample, reading it as {encoding}")
+    scan, path = scan_file(file, encoding)
+    if path:
+        transcoded.append(path)
+    return scan
+
+
+def failed_file_profiles(file: str, error: Exception) -> list[dict]:
+    """Profile a file that could not be read, so it is still listed in the report
+
+    Args:
+        file (str): The file
+        error (Exception): The error reading it
+
+    Returns:
+        list[dict]: An empty profile for an empty file, otherwise the profile of
+            the error placeholder, see duplicates.error_frame
+    """
+    if isinstance(error, pl.NoDataError):
+        logger.warning(f"{file} is empty")
+        return [empty_profile(file, "")]
+    logger.error(f"{file} could not be read: {error}")
+    return profile_fetched(file, error_frame())
+
+
+def profile_scans(
+    files: list[str], scans: list[pl.LazyFrame], key_sketch_size: int = None
+) -> list[dict]:
+    """Profile a schema group, or each of its files on its own if the group fails
+
+    Args:
+        files (list[str]): The files
+        scans (list[pl.LazyFrame]): The scan of each file, with matching schemas
+        key_sketch_size (int): if set, keep a sketch of each column's values for relationship discovery
+
+    Returns:
+        list[dict]: A profile for each column of each file, in file order
+    """
+    try:
+        return profile_file_group(files, scans, key_sketch_size)
+    except Exception as e:
+        if len(files) == 1:
+            return failed_file_profiles(files[0], e)
+    logger.warning(f"Profiling {len(files)} files one at a time, as one failed...")
+    return list(
+        [
+            p
+            for f, scan in zip(files, scans)
+            for p in profile_scans([f], [scan], key_sketch_size)
+        ]
+    )
+
+
+def profile_file_group(
+    files: list[str], scans: list[pl.LazyFrame], key_sketch_size: int = None
+) -> list[dict]:
+    """Profile files with matching schemas as one lazy scan
+
+    Each column is counted with a single group by over the file name and value,
+    and the counts are then split into one value count per file.
+
+    Args:
+        files (list[str]): The files
+        scans (list[pl.LazyFrame]): The scan of each file, with matching schemas
+        key_sketch_size (int): if set, keep a sketch of each column's values for relationship discovery
+
+    Returns:
+        list[dict]: A profile for each column of each file, in file order
+    """
+    name = file_reading.FILE_NAME_COLUMN
+    data = pl.concat(
+        [scan.with_columns(pl.lit(f).alias(name)) for f, scan in zip(files, scans)]
+    )
+    columns = list([c for c in scans[0].columns])
+
+    lengths = dict(data.group_by(name).agg(pl.len()).collect().iter_rows())
+
+    counts = dict(
+        zip(
+            columns,
+            pl.collect_all(
+                [
+                    data.group_by([name, c])
+                    .agg(pl.len().alias("count"))
+                    .sort([name, "count"], descending=[False, True])
+                    for c in columns
+                ]
+            ),
+        )
+    )
+    partitions = {
+        c: counts[c].partition_by([name], as_dict=True, include_key=False)
+        for c in columns
+    }
+
+    profiles = []
+    for file in files:
+        length = lengths.get(file, 0)
+        file_profiles = []
+        for c in columns:
+            if length == 0:
+                file_profiles.append(empty_profile(file, c))
+            else:
+                values = partitions[c][(file,)].select(
+                    c, pl.col("count").cast(pl.UInt32)
+                )
+                file_profiles.append(
+                    profile_column(
+                        file, values, length, key_sketch_size=key_sketch_size
+                    )
+                )
+        profiles.extend(add_table_fingerprint(file_profiles))
+    return profiles
+
+
+def profile_sheet(
+    sheet: Union[str, tuple], typed: bool = False, key_sketch_size: int = None
+) -> list[dict]:
+    """Profile a workbook sheet, see file_utils.expand_workbooks
+
+    Args:
+        sheet (Union[str, tuple]): The workbook, or a sheet of it
+        typed (bool): Narrow the text columns once loaded, see file_utils.read_excel_sheet
+        key_sketch_size (int): if set, keep a sketch of each column's values for relationship discovery
+
+    Returns:
+        list[dict]: A profile for each column of the sheet
+    """
+    try:
+        return profile_data(
+            sheet, read_file, typed=typed, key_sketch_size=key_sketch_size
+        )
+    except Exception as e:
+        return failed_file_profiles(sheet[0] if isinstance(sheet, tuple) else sheet, e)
+
+
+def profile_files(
+    files: list[str],
+    max_workers: int = 1,
+    typed: bool = False,
+    key_sketch_size: int = None,
+) -> list[dict]:
+    """Profile many files, scanning files with matching schemas together
+
+    CSV, Parquet, Arrow IPC and NDJSON files are grouped by schema and each
+    group is profiled with one lazy scan, see profile_file_group. Workbooks are
+    profiled one sheet at a time, max_workers at a time. Files that cannot be
+    read are listed as empty or failed, see failed_file_profiles.
+
+    Args:
+        files (list[str]): The files
+        max_workers (int): The number of workbook sheets read in parallel
+        typed (bool): Narrow workbook text columns once loaded, see file_utils.read_excel_sheet
+        key_sketch_size (int): if set, keep a sketch of each column's values for relationship discovery
+
+    Returns:
+        list[dict]: A profile for each column of each file, in file order
+    """
+    groups = {}
+    transcoded = []
+    utf8 = set()
+    failed = {}
+    workbooks = []
+    for file in files:
+        if file.lower().endswith(file_reading.EXCEL_EXTENSIONS):
+            workbooks.append(file)
+            continue
+        try:
+            scan, path = scan_file(file)
+            if path:
+                transcoded.append(path)
+            elif file.lower().endswith(".csv"):
+                utf8.add(file)
+            key = tuple(scan.schema.items())
+        except Exception as e:
+            failed[file] = failed_file_profiles(file, e)
+            continue
+        groups.setdefault(key, ([], []))
+        groups[key][0].append(file)
+        groups[key][1].append(scan)
+
+    logger.info(f"Profiling {len(files)} files in {len(groups)} schema groups...")
+    by_file = dict(failed)
+    try:
+        for group_files, scans in groups.values():
+            try:
+                group_profiles = profile_file_group(group_files, scans, key_sketch_size)
+            except pl.ComputeError:
+                # a CSV whose sample is UTF-8 can hold other bytes past it, so
+                # those scanned as UTF-8 are detected again, see file_utils.read_as_utf8
+                logger.info("Checking the encoding of the whole of each file...")
+                scans = list(
+                    [
+                        rescan_file(f, scan, transcoded) if f in utf8 else scan
+                        for f, scan in zip(group_files, scans)
+                    ]
+                )
+                group_profiles = profile_scans(group_files, scans, key_sketch_size)
+            for profile in group_profiles:
+                by_file.setdefault(profile["table"], []).append(profile)
+    finally:
+        for path in transcoded:
+            os.remove(path)
+
+    if workbooks:
+        sheets = expand_workbooks(workbooks, max_workers)
+        with ThreadPoolExecutor(max_workers) as pool:
+            sheet_profiles = pool.map(
+                lambda s: profile_sheet(s, typed, key_sketch_size), sheets
+            )
+            for sheet, profiles in zip(sheets, sheet_profiles):
+                file = sheet[1] if isinstance(sheet, tuple) else sheet
+                by_file.setdefault(file, []).extend(profiles)
+
+    return list([p for file in files for p in by_file.get(file, [])])
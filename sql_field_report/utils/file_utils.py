@@ -1,32 +1,426 @@
+import codecs
+import logging
+import mmap
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Union
 
 import cchardet as chardet
+import fastexcel
 import pandas as pd
 import polars as pl
+import pyarrow.parquet as pq
+
+import sql_field_report.constants.file_reading as file_reading
+
+logger = logging.getLogger(__name__)
+
+
+def read_sample(
+    filename: str, sample_size: int = file_reading.ENCODING_SAMPLE_SIZE
+) -> list:
+    """Read a bounded sample of a file through mmap
+
+    Args:
+        filename (str): The file
+        sample_size (int): The maximum number of bytes read
+
+    Returns:
+        list[tuple[int, bytes]]: (offset, chunk) pairs from the start, middle and end of the file
+    """
+    with open(filename, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if size <= sample_size:
+                return [(0, mm[:])]
+            chunk = sample_size // 3
+            offsets = [0, size // 2, size - chunk]
+            return list([(o, mm[o : o + chunk]) for o in offsets])
+
+
+def is_utf8(chunk: bytes, offset: int) -> bool:
+    """Check whether a chunk of a file is valid UTF-8
+
+    Multi-byte characters cut at the edges of the chunk are ignored. NUL bytes
+    are valid UTF-8 but not expected in text, they indicate UTF-16/32.
+    """
+    if b"\x00" in chunk:
+        return False
+    if offset:
+        # skip continuation bytes of a character starting before the chunk
+        start = 0
+        while start < min(3, len(chunk)) and 0x80 <= chunk[start] <= 0xBF:
+            start += 1
+        chunk = chunk[start:]
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(chunk, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
 
 
 def check_encoding(filename: str):
-    filepath = Path(filename)
+    sample = read_sample(filename)
+
+    # fast path, ASCII is valid UTF-8. Only part of a large file is checked,
+    # so it is read strictly and detected again if that fails, see read_as_utf8
+    if all(is_utf8(chunk, offset) for offset, chunk in sample):
+        return file_reading.UTF8
 
-    blob = filepath.read_bytes()
-    detection = chardet.detect(blob)
+    detection = chardet.detect(b"".join(chunk for _, chunk in sample))
 
     encoding = detection.get("encoding")
 
+    return encoding or file_reading.UTF8_LOSSY
+
+
+def detect_encoding(
+    filename: str, chunk_size: int = file_reading.TRANSCODE_CHUNK_SIZE
+) -> str:
+    """Detect the encoding of a whole file, once a strict UTF-8 read of it has failed
+
+    The file is decoded as UTF-8 one chunk at a time, and the encoding is
+    detected from the first chunk that does not decode, which holds the bytes
+    the sample missed (see check_encoding).
+
+    Args:
+        filename (str): The file
+        chunk_size (int): The number of bytes decoded at a time
+
+    Returns:
+        str: The encoding, UTF8 if the whole file is valid UTF-8, or UTF8_LOSSY
+            if the encoding of the invalid bytes cannot be detected
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    invalid = None
+    with open(filename, "rb") as f:
+        while chunk := f.read(chunk_size):
+            try:
+                decoder.decode(chunk)
+            except UnicodeDecodeError:
+                invalid = chunk
+                break
+        else:
+            try:
+                decoder.decode(b"", final=True)
+                return file_reading.UTF8
+            except UnicodeDecodeError:
+                invalid = chunk
+
+    encoding = chardet.detect(invalid).get("encoding")
+    if not encoding or encoding.lower().replace("-", "") in ("utf8", "ascii"):
+        logger.warning(
+            f"{filename} is not valid UTF-8 and its encoding could not be detected, "
+            "invalid bytes are replaced"
+        )
+        return file_reading.UTF8_LOSSY
     return encoding
 
 
+def transcode_to_utf8(
+    filename: str, encoding: str, chunk_size: int = file_reading.TRANSCODE_CHUNK_SIZE
+) -> str:
+    """Transcode a file to a temporary UTF-8 file, one chunk at a time
+
+    Args:
+        filename (str): The file
+        encoding (str): The encoding of the file
+        chunk_size (int): The number of bytes decoded at a time
+
+    Returns:
+        str: The path of the UTF-8 copy, to be removed by the caller
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    fd, path = tempfile.mkstemp(suffix=Path(filename).suffix)
+    with open(filename, "rb") as source, os.fdopen(fd, "wb") as target:
+        while chunk := source.read(chunk_size):
+            target.write(decoder.decode(chunk).encode("utf-8"))
+        target.write(decoder.decode(b"", final=True).encode("utf-8"))
+    return path
+
+
+def read_as_utf8(file: str, encoding: str, read: Callable[[str, str], object]):
+    """Read a file as UTF-8, transcoding it first if it is in another encoding
+
+    A file whose sample is UTF-8 (see check_encoding) is read strictly. If an
+    invalid byte past the sample fails the read, the encoding is detected again
+    (see detect_encoding) and the file transcoded, so no bytes are replaced
+    without a warning.
+
+    Args:
+        file (str): The file
+        encoding (str): The file encoding, see check_encoding
+        read (Callable[[str, str], object]): Reads a file path with the UTF8 or UTF8_LOSSY encoding
+
+    Returns:
+        object: The result of read
+    """
+    if encoding == file_reading.UTF8:
+        try:
+            return read(file, encoding)
+        except (pl.ComputeError, UnicodeDecodeError):
+            encoding = detect_encoding(file)
+            if encoding == file_reading.UTF8:
+                raise
+            logger.info(
+                f"{file} is not UTF-8 past its sample, reading it as {encoding}"
+            )
+    if encoding == file_reading.UTF8_LOSSY:
+        return read(file, encoding)
+    path = transcode_to_utf8(file, encoding)
+    try:
+        return read(path, file_reading.UTF8)
+    finally:
+        os.remove(path)
+
+
+def read_csv_utf8(file: str, encoding: str, **kwargs) -> pl.DataFrame:
+    """Read a CSV file with polars' native reader, transcoding it first if it is not UTF-8"""
+    return read_as_utf8(
+        file, encoding, lambda path, e: pl.read_csv(path, encoding=e, **kwargs)
+    )
+
+
+def infer_text_dtypes(
+    sample: pl.DataFrame, categorical_ratio: float = file_reading.CATEGORICAL_RATIO
+) -> dict:
+    """Pick a smaller dtype for the text columns of a sample
+
+    Columns holding only canonical integers are read as Int64, as they cast back
+    to exactly the same text. Low cardinality columns are read as Categorical.
+
+    Args:
+        sample (pl.DataFrame): A sample of the data, read as strings
+        categorical_ratio (float): Columns with at most this unique:row ratio are Categorical
+
+    Returns:
+        dict: The dtype of each column that can be narrowed
+    """
+    dtypes = {}
+    for column in sample.columns:
+        series = sample.get_column(column)
+        if series.dtype != pl.Utf8 or series.null_count() == series.len():
+            continue
+        if is_integer_text(series):
+            dtypes[column] = pl.Int64
+        elif series.n_unique() <= categorical_ratio * series.len():
+            dtypes[column] = pl.Categorical
+    return dtypes
+
+
+def is_integer_text(series: pl.Series) -> bool:
+    """Check that every populated value of a text series is a canonical integer"""
+    return bool(series.drop_nulls().str.contains(file_reading.INTEGER_REGEX).all())
+
+
+def read_csv_typed(
+    file: str,
+    encoding: str,
+    sample_rows: int = file_reading.TYPE_SAMPLE_ROWS,
+    categorical_ratio: float = file_reading.CATEGORICAL_RATIO,
+) -> pl.DataFrame:
+    """Read a CSV file in batches, narrowing the text columns of each batch
+
+    Column dtypes are inferred from the first batch, see infer_text_dtypes. An
+    integer column is read back as text if a later batch has a value that would
+    not cast back to the same text, so the values in the report are unchanged.
+    Only one batch is held as text at a time.
+
+    Args:
+        file (str): The file
+        encoding (str): The file encoding, see check_encoding
+        sample_rows (int): The number of rows per batch
+        categorical_ratio (float): Columns with at most this unique:row ratio are Categorical
+
+    Returns:
+        pl.DataFrame: The data
+    """
+
+    def read(path: str, encoding: str) -> pl.DataFrame:
+        reader = pl.read_csv_batched(
+            path, encoding=encoding, infer_schema_length=0, batch_size=sample_rows
+        )
+        batches = []
+        dtypes = None
+        with pl.StringCache():
+            while chunk := reader.next_batches(1):
+                batch = chunk[0]
+                if dtypes is None:
+                    dtypes = infer_text_dtypes(batch, categorical_ratio)
+                for column, dtype in list(dtypes.items()):
+                    if dtype == pl.Int64 and not is_integer_text(
+                        batch.get_column(column)
+                    ):
+                        del dtypes[column]
+                        batches = list(
+                            [
+                                b.with_columns(pl.col(column).cast(pl.Utf8))
+                                for b in batches
+                            ]
+                        )
+                batches.append(
+                    batch.with_columns(pl.col(c).cast(d) for c, d in dtypes.items())
+                )
+            if not batches:
+                return pl.read_csv(path, encoding=encoding, infer_schema_length=0)
+            return pl.concat(batches, rechunk=False)
+
+    return read_as_utf8(file, encoding, read)
+
+
+def list_excel_sheets(file: str) -> list[str]:
+    """List the sheet names of a workbook"""
+    return fastexcel.read_excel(file).sheet_names
+
+
+def read_excel_sheet(
+    file: str, sheet: Union[str, int] = 0, typed: bool = False
+) -> pl.DataFrame:
+    """Read a workbook sheet with the calamine engine, every column as strings
+
+    With typed, the text columns are narrowed after the whole sheet is loaded,
+    so the sheet holds less memory while it is profiled, but the peak memory
+    of the read itself is unchanged.
+
+    Args:
+        file (str): The workbook
+        sheet (Union[str, int]): The sheet name or index
+        typed (bool): Narrow the text columns once read, see infer_text_dtypes
+
+    Returns:
+        pl.DataFrame: The sheet data
+    """
+    reader = fastexcel.read_excel(file)
+    load = (
+        reader.load_sheet_by_name
+        if isinstance(sheet, str)
+        else reader.load_sheet_by_idx
+    )
+    columns = list([c.name for c in load(sheet, n_rows=0).available_columns])
+    data = pl.from_arrow(load(sheet, dtypes={c: "string" for c in columns}).to_arrow())
+    if typed:
+        dtypes = infer_text_dtypes(data)
+        data = data.with_columns(pl.col(c).cast(d) for c, d in dtypes.items())
+    return data
+
+
+def expand_workbooks(files: list[str], max_workers: int = 8) -> list:
+    """Expand multi-sheet workbooks into one object per sheet, for read_file
+
+    Workbooks are opened in parallel. Sheets are named "<file> [<sheet>]" in the
+    report, single sheet workbooks and other files are kept as they are, as are
+    workbooks that cannot be opened, so reading them reports the error.
+
+    Args:
+        files (list[str]): File paths
+        max_workers (int): The number of workbooks opened in parallel
+
+    Returns:
+        list: File paths and (name, file, sheet) tuples
+    """
+    workbooks = list(
+        [f for f in files if f.lower().endswith(file_reading.EXCEL_EXTENSIONS)]
+    )
+
+    def sheet_names(file: str) -> list[str]:
+        try:
+            return list_excel_sheets(file)
+        except Exception as e:
+            logger.error(f"{file} sheets could not be listed: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        sheets = dict(zip(workbooks, pool.map(sheet_names, workbooks)))
+
+    objects = []
+    for file in files:
+        if len(sheets.get(file, [])) > 1:
+            objects.extend((f"{file} [{sheet}]", file, sheet) for sheet in sheets[file])
+        else:
+            objects.append(file)
+    return objects
+
+
+def parquet_column_stats(file: str) -> dict:
+    """Summarise the row group statistics of the flat columns of a Parquet file
+
+    Args:
+        file (str): The Parquet file
+
+    Returns:
+        dict: {column: {"null_count": int, "min": value, "max": value}} for the
+            columns with null counts in every row group. min and max are only
+            given for non-string columns with min/max in every row group, as
+            string statistics may be truncated.
+    """
+    metadata = pq.ParquetFile(file).metadata
+    stats = {}
+    for c in range(metadata.num_columns):
+        column = metadata.row_group(0).column(c) if metadata.num_row_groups else None
+        if column is None or "." in column.path_in_schema:
+            continue
+        summary = {"null_count": 0, "min": None, "max": None}
+        has_min_max = column.physical_type not in ("BYTE_ARRAY", "FIXED_LEN_BYTE_ARRAY")
+        for rg in range(metadata.num_row_groups):
+            statistics = metadata.row_group(rg).column(c).statistics
+            if statistics is None or not statistics.has_null_count:
+                summary = None
+                break
+            summary["null_count"] += statistics.null_count
+            if has_min_max and statistics.has_min_max:
+                if summary["min"] is None or statistics.min < summary["min"]:
+                    summary["min"] = statistics.min
+                if summary["max"] is None or statistics.max > summary["max"]:
+                    summary["max"] = statistics.max
+            elif statistics.num_values:
+                has_min_max = False
+        if summary is not None:
+            if not has_min_max:
+                summary["min"] = summary["max"] = None
+            stats[column.path_in_schema] = summary
+    return stats
+
+
 def read_file_pandas(file: str) -> pd.DataFrame:
     if file.endswith(".csv"):
-        encoding = check_encoding(file)
-        return pd.read_csv(file, encoding=encoding, low_memory=False)
+        return read_as_utf8(
+            file,
+            check_encoding(file),
+            lambda path, encoding: pd.read_csv(
+                path,
+                encoding="utf-8",
+                encoding_errors=(
+                    "replace" if encoding == file_reading.UTF8_LOSSY else "strict"
+                ),
+                low_memory=False,
+            ),
+        )
     else:
         return pd.read_excel(file)
 
 
-def read_file(file: str) -> pl.DataFrame:
-    if file.endswith(".csv"):
+def read_file(
+    file: Union[str, tuple], typed: bool = False
+) -> Union[pl.DataFrame, pl.LazyFrame]:
+    if isinstance(file, tuple):
+        # a workbook sheet, see expand_workbooks
+        _, file, sheet = file
+        return read_excel_sheet(file, sheet, typed)
+    lower = file.lower()
+    if lower.endswith(file_reading.PARQUET_EXTENSIONS):
+        return pl.scan_parquet(file)
+    elif lower.endswith(file_reading.IPC_EXTENSIONS):
+        return pl.scan_ipc(file, memory_map=True)
+    elif lower.endswith(file_reading.NDJSON_EXTENSIONS):
+        return pl.scan_ndjson(file, infer_schema_length=None)
+    elif file.endswith(".csv"):
         encoding = check_encoding(file)
-        return pl.read_csv(file, encoding=encoding, infer_schema_length=0)
+        if typed:
+            return read_csv_typed(file, encoding)
+        return read_csv_utf8(file, encoding, infer_schema_length=0)
     else:
-        return pl.read_excel(file, read_csv_options={"infer_schema_length": 0})
+        return read_excel_sheet(file, typed=typed)
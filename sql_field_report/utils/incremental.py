@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable
+
+import polars as pl
+
+import sql_field_report.constants.profiling as profiling
+
+from .analysis import profile_frame
+from .duplicates import add_table_fingerprint, is_error_frame
+from .profiles import merge_table_profiles, truncate_profile
+
+logger = logging.getLogger(__name__)
+
+
+def load_state(state_file: str) -> dict:
+    """Load the incremental profiling state, or an empty state if there is none yet
+
+    Args:
+        state_file (str): the filepath of the state
+
+    Returns:
+        dict: the state of each table, keyed by table name
+    """
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state: dict, state_file: str) -> str:
+    """Save the incremental profiling state
+
+    Args:
+        state (dict): the state of each table, keyed by table name
+        state_file (str): the filepath of the state
+
+    Returns:
+        str: the filepath of the state
+    """
+    with open(state_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, default=str)
+    return state_file
+
+
+def dump_watermark(value) -> dict:
+    """Convert a watermark value to a JSON safe representation"""
+    if isinstance(value, datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    elif isinstance(value, date):
+        return {"type": "date", "value": value.isoformat()}
+    elif isinstance(value, Decimal):
+        # JSON would store it as a float or string, which do not compare with Decimal
+        return {"type": "decimal", "value": str(value)}
+    else:
+        return {"type": "value", "value": value}
+
+
+def load_watermark(watermark: dict):
+    """Convert a watermark saved with dump_watermark back to its value"""
+    if watermark is None:
+        return None
+    elif watermark["type"] == "datetime":
+        return datetime.fromisoformat(watermark["value"])
+    elif watermark["type"] == "date":
+        return date.fromisoformat(watermark["value"])
+    elif watermark["type"] == "decimal":
+        return Decimal(watermark["value"])
+    else:
+        return watermark["value"]
+
+
+def profile_incremental(
+    objects: list,
+    get_data: Callable[..., pl.DataFrame],
+    state_file: str,
+    watermark_column: str,
+    cnx: str = None,
+    max_workers: int = 1,
+    key_sketch_size: int = None,
+    **kwargs,
+) -> list[dict]:
+    """Profile append-only tables incrementally
+
+    For each table only rows past the stored high-water mark are fetched, and
+    their column profiles merged into the stored profiles. get_data is called
+    with watermark_column and watermark keyword arguments, and must return only
+    the rows where watermark_column > watermark (all rows if watermark is None).
+    The watermark column is matched case-insensitively, like SQL Server does.
+
+    Tables without the watermark column are fully profiled on each run. If
+    get_data raises, or returns the placeholder of a failed pull (see
+    duplicates.is_error_frame), the stored state of that table is kept as it is.
+
+    Args:
+        objects (list): A list of tables to be analyzed
+        get_data (Callable[..., pl.DataFrame]): A function that will take in a table name and return a Dataframe
+        state_file (str): The filepath of the stored profiles and watermarks
+        watermark_column (str): An ascending identity or created-date column
+        cnx (str): ConnectorX connection string
+        max_workers (int): The number of tables fetched and analysed in parallel
+        key_sketch_size (int): if set, keep a sketch of each column's values for relationship discovery
+
+    Returns:
+        list[dict]: The column profiles of all rows of each table
+    """
+    state = load_state(state_file)
+
+    def profile_table(table) -> tuple[str, dict, list[dict]]:
+        name = table[0] if isinstance(table, tuple) else table
+        entry, table_profiles = profile_table_incremental(
+            table,
+            get_data,
+            state.get(name),
+            watermark_column,
+            cnx,
+            key_sketch_size,
+            **kwargs,
+        )
+        return name, entry, table_profiles
+
+    profiles = []
+    with ThreadPoolExecutor(max_workers, thread_name_prefix="analysis") as pool:
+        for name, entry, table_profiles in pool.map(profile_table, objects):
+            if entry:
+                state[name] = entry
+            profiles.extend(table_profiles)
+
+    save_state(state, state_file)
+
+    return profiles
+
+
+def profile_table_incremental(
+    table,
+    get_data: Callable[..., pl.DataFrame],
+    previous: dict,
+    watermark_column: str,
+    cnx: str = None,
+    key_sketch_size: int = None,
+    **kwargs,
+) -> tuple[dict, list[dict]]:
+    """Profile the rows of a table past its stored high-water mark, see profile_incremental
+
+    Args:
+        table: the table, passed to get_data
+        get_data (Callable[..., pl.DataFrame]): returns the rows past a watermark
+        previous (dict): the stored state of the table, or None
+        watermark_column (str): An ascending identity or created-date column
+        cnx (str): ConnectorX connection string
+        key_sketch_size (int): if set, keep a sketch of each column's values for relationship discovery
+
+    Returns:
+        tuple[dict, list[dict]]: the new state of the table (None to keep the
+            stored state), and the column profiles of all its rows
+    """
+    name = table[0] if isinstance(table, tuple) else table
+    column = watermark_column.strip("[]")
+    watermark = load_watermark(previous["watermark"]) if previous else None
+
+    logger.info(f"Analysing {name} past {column} {watermark}...")
+    try:
+        if cnx:
+            data = get_data(
+                table,
+                cnx,
+                watermark_column=watermark_column,
+                watermark=watermark,
+                **kwargs,
+            )
+        else:
+            data = get_data(
+                table,
+                watermark_column=watermark_column,
+                watermark=watermark,
+                **kwargs,
+            )
+        if is_error_frame(data):
+            raise ValueError("the data could not be read")
+    except Exception as e:
+        traceback.print_exc()
+        logger.error(f"Table {name} incremental pull failed, keeping stored state: {e}")
+        return None, previous["profiles"] if previous else []
+
+    batch = add_table_fingerprint(
+        profile_frame(
+            name,
+            data,
+            distinct_sketch_size=profiling.DISTINCT_SKETCH_SIZE,
+            key_sketch_size=key_sketch_size,
+        )
+    )
+
+    # the column as named in the data, SQL Server names are case-insensitive
+    column = next((c for c in data.columns if c.lower() == column.lower()), None)
+    if column is None:
+        logger.warning(
+            f"Table {name} has no {watermark_column} column, fully profiled."
+        )
+        table_profiles = batch
+        watermark = None
+    elif previous:
+        table_profiles = merge_table_profiles(previous["profiles"], batch)
+    else:
+        table_profiles = batch
+
+    if column is not None and data.shape[0] != 0:
+        batch_max = data.get_column(column).max()
+        if watermark is None or batch_max > watermark:
+            watermark = batch_max
+
+    logger.info(f"Table {name}: {data.shape[0]} new rows, watermark {watermark}")
+    entry = {
+        "watermark": dump_watermark(watermark) if watermark is not None else None,
+        "profiles": list([truncate_profile(p) for p in table_profiles]),
+    }
+    return entry, table_profiles
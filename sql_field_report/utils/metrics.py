@@ -0,0 +1,33 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class RunMetrics(object):
+    """Thread safe counters describing a report run
+
+    Counters are created on first use, e.g. metrics.add("queries").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def add(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def log(self):
+        for name, value in sorted(self.as_dict().items()):
+            if isinstance(value, float):
+                value = round(value, 3)
+            logger.info(f"Run metrics -- {name}: {value}")
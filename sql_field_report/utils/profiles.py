@@ -0,0 +1,268 @@
+import json
+import logging
+
+import sql_field_report.constants.profiling as profiling
+
+from .duplicates import add_table_fingerprint, blank_fingerprint, merge_fingerprints
+from .sketches import estimate_distinct, merge_distinct_sketches
+
+logger = logging.getLogger(__name__)
+
+
+def truncate_profile(
+    profile: dict, sketch_size: int = profiling.PROFILE_SKETCH_SIZE
+) -> dict:
+    """Cut the value counts of a column profile to a sketch, for storage
+
+    Args:
+        profile (dict): the column profile, see analysis.profile_column
+        sketch_size (int): the maximum number of value counts kept
+
+    Returns:
+        dict: the profile, or a copy keeping only the most common sketch_size values
+    """
+    values = profile.get("values") or []
+    if len(values) <= sketch_size:
+        return profile
+    return dict(profile, values=values[:sketch_size], truncated=True)
+
+
+def save_profiles(
+    profiles: list[dict],
+    file_path: str,
+    sketch_size: int = profiling.PROFILE_SKETCH_SIZE,
+) -> str:
+    """Save column profiles as JSON lines
+
+    Values that JSON cannot represent (dates, decimals, ...) are stored as strings.
+    Only the most common sketch_size value counts of each column are saved.
+
+    Args:
+        profiles (list[dict]): the column profiles, see analysis.profile_column
+        file_path (str): the filepath to write the profiles to
+        sketch_size (int): the maximum number of value counts saved per column
+
+    Returns:
+        str: the filepath of the saved profiles
+    """
+    with open(file_path, "w", encoding="utf-8") as f:
+        for profile in profiles:
+            f.write(json.dumps(truncate_profile(profile, sketch_size), default=str))
+            f.write("\n")
+    logger.info(f"Saved {len(profiles)} column profiles to {file_path}")
+    return file_path
+
+
+def load_profiles(file_path: str) -> list[dict]:
+    """Load column profiles saved with save_profiles
+
+    Args:
+        file_path (str): the filepath of the saved profiles
+
+    Returns:
+        list[dict]: the column profiles
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        return list([json.loads(line) for line in f if line.strip()])
+
+
+def _value_key(value):
+    # values read back from JSON are strings, so compare on the string form
+    return None if value is None else str(value)
+
+
+def merge_value_counts(a: list, b: list, sketch_size: int) -> tuple[list, bool]:
+    """Merge two value count sketches
+
+    Args:
+        a (list): [value, count] pairs
+        b (list): [value, count] pairs
+        sketch_size (int): the maximum number of value counts kept
+
+    Returns:
+        tuple[list, bool]: the merged [value, count] pairs sorted by count, and
+            whether values were dropped to fit the sketch size
+    """
+    merged = {}
+    for value, count in a + b:
+        key = _value_key(value)
+        if key in merged:
+            merged[key][1] += count
+        else:
+            merged[key] = [value, count]
+    values = sorted(merged.values(), key=lambda v: v[1], reverse=True)
+    return values[:sketch_size], len(values) > sketch_size
+
+
+def merge_value_stats(old: dict, new: dict, old_count: int, new_count: int) -> dict:
+    """Merge the value stats of two batches of rows of the same column
+
+    Quantiles cannot be merged exactly, so they are dropped when both batches
+    have stats.
+
+    Args:
+        old (dict): the value stats of the first batch, see analysis.get_value_stats
+        new (dict): the value stats of the second batch
+        old_count (int): the number of populated values of the first batch
+        new_count (int): the number of populated values of the second batch
+
+    Returns:
+        dict: the merged value stats
+    """
+    if not old or not new:
+        return old or new
+    if ("mean" in old) != ("mean" in new):
+        # the column changed from numbers to dates or text between batches
+        return {}
+    merged = {"min": min(old["min"], new["min"]), "max": max(old["max"], new["max"])}
+    if "mean" in old:
+        merged["mean"] = (old["mean"] * old_count + new["mean"] * new_count) / (
+            old_count + new_count
+        )
+    return merged
+
+
+def merge_profiles(
+    old: dict,
+    new: dict,
+    sketch_size: int = profiling.PROFILE_SKETCH_SIZE,
+    distinct_sketch_size: int = profiling.DISTINCT_SKETCH_SIZE,
+) -> dict:
+    """Merge the profiles of two batches of rows of the same column
+
+    Counts are added and value count sketches combined. The unique count is
+    exact while both value count sketches are complete, otherwise it is
+    estimated from the distinct value sketches.
+
+    Args:
+        old (dict): the profile of the earlier rows
+        new (dict): the profile of the later rows
+        sketch_size (int): the maximum number of value counts kept
+        distinct_sketch_size (int): the size of the distinct value sketches
+
+    Returns:
+        dict: the profile of all rows
+    """
+    if new["count"] == 0:
+        return dict(old)
+    if old["count"] == 0:
+        return dict(new)
+
+    values, truncated = merge_value_counts(old["values"], new["values"], sketch_size)
+    truncated = truncated or old["truncated"] or new["truncated"]
+    sketch = merge_distinct_sketches(
+        old.get("distinct_sketch", []),
+        new.get("distinct_sketch", []),
+        distinct_sketch_size,
+    )
+    populated = old["populated"] + new["populated"]
+    if populated == 0:
+        unique = 0
+    elif truncated and sketch:
+        unique = estimate_distinct(sketch, distinct_sketch_size)
+    else:
+        unique = len(values)
+
+    lengths = {}
+    if old["lengths"] and new["lengths"]:
+        lengths = {
+            "min": min(old["lengths"]["min"], new["lengths"]["min"]),
+            "max": max(old["lengths"]["max"], new["lengths"]["max"]),
+            "mean": (
+                old["lengths"]["mean"] * old["populated"]
+                + new["lengths"]["mean"] * new["populated"]
+            )
+            / populated,
+        }
+    else:
+        lengths = old["lengths"] or new["lengths"]
+
+    stats = merge_value_stats(
+        old.get("stats") or {},
+        new.get("stats") or {},
+        old["populated"],
+        new["populated"],
+    )
+
+    patterns, _ = merge_value_counts(
+        old.get("patterns", []), new.get("patterns", []), profiling.PATTERN_SKETCH_SIZE
+    )
+
+    type_matches = dict(old["type_matches"])
+    for k, v in new["type_matches"].items():
+        type_matches[k] = type_matches.get(k, 0) + v
+
+    if "key_sketch" in old or "key_sketch" in new:
+        new = dict(
+            new,
+            key_sketch=merge_distinct_sketches(
+                old.get("key_sketch", []),
+                new.get("key_sketch", []),
+                profiling.KEY_SKETCH_SIZE,
+            ),
+        )
+
+    return dict(
+        new,
+        dtype=new["dtype"] or old["dtype"],
+        count=old["count"] + new["count"],
+        populated=populated,
+        unique=unique,
+        values=values,
+        truncated=truncated,
+        lengths=lengths,
+        type_matches=type_matches,
+        stats=stats,
+        fingerprint=merge_fingerprints(old.get("fingerprint"), new.get("fingerprint")),
+        patterns=patterns,
+        pattern_total=old.get("pattern_total", 0) + new.get("pattern_total", 0),
+        distinct_sketch=sketch,
+    )
+
+
+def merge_table_profiles(old: list[dict], new: list[dict], **options) -> list[dict]:
+    """Merge the column profiles of two batches of rows of the same table
+
+    Columns only present in one batch are treated as empty in the other.
+
+    Args:
+        old (list[dict]): the column profiles of the earlier rows
+        new (list[dict]): the column profiles of the later rows
+        options: sketch sizes, see merge_profiles
+
+    Returns:
+        list[dict]: the column profiles of all rows
+    """
+    old_count = old[0]["count"] if old else 0
+    new_count = new[0]["count"] if new else 0
+    old_fields = {p["field"]: p for p in old}
+    new_fields = {p["field"]: p for p in new}
+
+    merged = []
+    for field in list(old_fields) + [f for f in new_fields if f not in old_fields]:
+        table = (new_fields.get(field) or old_fields.get(field))["table"]
+        merged.append(
+            merge_profiles(
+                old_fields.get(field) or _missing_profile(table, field, old_count),
+                new_fields.get(field) or _missing_profile(table, field, new_count),
+                **options,
+            )
+        )
+    return add_table_fingerprint(merged)
+
+
+def _missing_profile(table: str, field: str, count: int) -> dict:
+    # profile of a column that was absent from a batch of `count` rows
+    return {
+        "table": table,
+        "field": field,
+        "dtype": None,
+        "count": count,
+        "populated": 0,
+        "unique": 0,
+        "values": [[None, count]] if count else [],
+        "truncated": False,
+        "lengths": {},
+        "type_matches": {},
+        "fingerprint": blank_fingerprint(count),
+    }
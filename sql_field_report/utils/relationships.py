@@ -0,0 +1,87 @@
+"""Key and relationship discovery from column profiles
+
+Uses the key sketches of profile_column (key_sketch_size), so no data is read
+again. Candidate pairs are found through an index of the sketched hashes, so
+only columns sharing at least one sketched value are compared, rather than
+every pair of columns in the schema.
+"""
+
+import pandas as pd
+
+import sql_field_report.constants.field_report_schema as schema
+import sql_field_report.constants.profiling as profiling
+
+from .sketches import estimate_containment
+
+
+def is_key_candidate(
+    profile: dict, tolerance: float = profiling.KEY_UNIQUE_TOLERANCE
+) -> bool:
+    """Check whether a column is populated and unique on every row
+
+    Args:
+        profile (dict): the column profile, see analysis.profile_column
+        tolerance (float): the allowed shortfall of an approximate unique count
+
+    Returns:
+        bool: True if the column could be a primary key
+    """
+    count = profile["count"]
+    if count < 2 or profile["populated"] != count:
+        return False
+    if profile.get("sampled") or profile.get("truncated"):
+        return profile["unique"] >= (1 - tolerance) * count
+    return profile["unique"] == count
+
+
+def find_relationships(
+    profiles: list[dict],
+    min_containment: float = profiling.RELATIONSHIP_MIN_CONTAINMENT,
+    min_distinct: int = profiling.RELATIONSHIP_MIN_DISTINCT,
+    min_sample: int = profiling.RELATIONSHIP_MIN_SAMPLE,
+    k: int = profiling.KEY_SKETCH_SIZE,
+) -> pd.DataFrame:
+    """Find columns whose values are (mostly) contained in a key candidate column
+
+    Args:
+        profiles (list[dict]): column profiles with key sketches
+        min_containment (float): the estimated share of values found in the key to report a relationship
+        min_distinct (int): columns with fewer unique values are not checked
+        min_sample (int): the fewest sketched values a containment estimate is based on
+        k (int): the size of the key sketches
+
+    Returns:
+        pd.DataFrame: the relationships, see schema.RELATIONSHIP_SCHEMA
+    """
+    profiles = list([p for p in profiles if p.get("key_sketch")])
+    keys = list([i for i, p in enumerate(profiles) if is_key_candidate(p)])
+
+    index = {}
+    for i in keys:
+        for h in profiles[i]["key_sketch"]:
+            index.setdefault(h, []).append(i)
+
+    relationships = []
+    for i, profile in enumerate(profiles):
+        if profile["unique"] < min_distinct:
+            continue
+        candidates = set(j for h in profile["key_sketch"] for j in index.get(h, []))
+        candidates.discard(i)
+        for j in candidates:
+            key = profiles[j]
+            containment, sample = estimate_containment(
+                profile["key_sketch"], key["key_sketch"], k
+            )
+            if sample >= min_sample and containment >= min_containment:
+                relationships.append(
+                    (
+                        profile["table"],
+                        profile["field"],
+                        key["table"],
+                        key["field"],
+                        round(containment, 3),
+                    )
+                )
+
+    relationships.sort(key=lambda r: (r[0], r[1], -r[4], r[2], r[3]))
+    return pd.DataFrame.from_records(relationships, columns=schema.RELATIONSHIP_SCHEMA)
@@ -0,0 +1,71 @@
+import csv
+import threading
+
+import pandas as pd
+
+import sql_field_report.constants.field_report_schema as schema
+
+
+class CsvReportWriter(object):
+    """Append field report rows to a CSV file as each table completes
+
+    Every write is flushed, so the file can be read while the run is in
+    progress. The header is written with the first table's rows, and holds the
+    optional columns present in them (see schema.OPTIONAL_COLUMNS), e.g. from
+    iter_field_report(..., stats=True). Choices are joined with "; ", like the
+    top values.
+
+        with CsvReportWriter("report.csv") as writer:
+            for rows in iter_field_report(objects, get_data):
+                writer.write(rows)
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.tables = 0
+        self.rows = 0
+        self.columns = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        self._file = open(self.file_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        return self
+
+    def _write_header(self, analysis: pd.DataFrame = None):
+        self.columns = schema.FIELD_REPORT_SCHEMA + list(
+            [
+                c
+                for c in schema.OPTIONAL_COLUMNS
+                if analysis is not None and c in analysis.columns
+            ]
+        )
+        self._writer.writerow(self.columns)
+
+    def write(self, analysis: pd.DataFrame):
+        with self._lock:
+            if self.columns is None:
+                self._write_header(analysis)
+            rows = list(
+                [
+                    [
+                        "; ".join(str(c) for c in v) if isinstance(v, list) else v
+                        for v in row
+                    ]
+                    for row in analysis.reindex(
+                        columns=self.columns, fill_value=""
+                    ).itertuples(index=False)
+                ]
+            )
+            self._writer.writerows(rows)
+            self._file.flush()
+            self.tables += 1
+            self.rows += len(rows)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self._lock:
+            if self.columns is None:
+                self._write_header()
+        self._file.close()
@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Callable
+from urllib.parse import urlparse
+
+import pandas as pd
+import polars as pl
+from sqlalchemy import Connection, text
+
+from .metrics import RunMetrics
+
+logger = logging.getLogger(__name__)
+
+READ_UNCOMMITTED = "READ UNCOMMITTED"
+SNAPSHOT = "SNAPSHOT"
+ISOLATION_LEVELS = [READ_UNCOMMITTED, SNAPSHOT]
+
+
+class QueryScheduler(object):
+    """Throttles the queries a report run sends to each database server
+
+    Parameters:
+        max_concurrent_queries (int): The maximum number of queries running on one server at a time, unbounded if None
+        rows_per_second (float): The maximum average number of rows fetched per second from one server, unbounded if None
+        isolation_level (str): READ UNCOMMITTED or SNAPSHOT, the server default if None
+        timeout (float): Query timeout in seconds, none if None
+
+    Used as a context manager, the thread running timed queries is shut down on exit.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_queries: int = None,
+        rows_per_second: float = None,
+        isolation_level: str = None,
+        timeout: float = None,
+    ):
+        if isolation_level is not None:
+            isolation_level = isolation_level.upper()
+            if isolation_level not in ISOLATION_LEVELS:
+                raise ValueError(
+                    f"Isolation level must be one of: {ISOLATION_LEVELS}, not {isolation_level}"
+                )
+        self.max_concurrent_queries = max_concurrent_queries
+        self.rows_per_second = rows_per_second
+        self.isolation_level = isolation_level
+        self.timeout = timeout
+        self.metrics = RunMetrics()
+
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._available_at = {}
+        self._executor = None
+
+    def _semaphore(self, server: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if server not in self._semaphores:
+                self._semaphores[server] = threading.BoundedSemaphore(
+                    self.max_concurrent_queries
+                )
+            return self._semaphores[server]
+
+    def acquire(self, server: str) -> Callable[[], None]:
+        """Wait for a query slot on a server, and for the row rate limit to allow a new query
+
+        Args:
+            server (str): The server key, see server_key
+
+        Returns:
+            Callable[[], None]: Releases the slot
+        """
+        start = time.perf_counter()
+        semaphore = None
+        if self.max_concurrent_queries:
+            semaphore = self._semaphore(server)
+            semaphore.acquire()
+        if self.rows_per_second:
+            with self._lock:
+                delay = self._available_at.get(server, 0) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.metrics.add("query_wait_seconds", time.perf_counter() - start)
+        return semaphore.release if semaphore else lambda: None
+
+    @contextmanager
+    def slot(self, server: str):
+        """Hold a query slot on a server, see acquire"""
+        release = self.acquire(server)
+        try:
+            yield
+        finally:
+            release()
+
+    def record_rows(self, server: str, rows: int):
+        """Record the rows fetched from a server, delaying its next queries under the row rate limit"""
+        self.metrics.add("queries")
+        self.metrics.add("rows", rows)
+        if self.rows_per_second:
+            with self._lock:
+                start = max(self._available_at.get(server, 0), time.monotonic())
+                self._available_at[server] = start + rows / self.rows_per_second
+
+    def table_hint(self) -> str:
+        """The MSSQL table hint implementing the isolation level, for queries that cannot set it"""
+        if self.isolation_level == READ_UNCOMMITTED:
+            return " WITH (NOLOCK)"
+        return ""
+
+    def read_database_uri(self, query: str, uri: str) -> pl.DataFrame:
+        """Run a connectorx query under the scheduler limits
+
+        connectorx runs a single statement per query, so READ UNCOMMITTED has to be
+        applied with table_hint, and SNAPSHOT is not supported. The timeout is
+        enforced by the caller: a query that times out keeps its slot until the
+        server finishes it.
+
+        Args:
+            query (str): The query
+            uri (str): The connectorx connection string
+
+        Returns:
+            pl.DataFrame: The query result
+        """
+        if self.isolation_level == SNAPSHOT:
+            raise ValueError(
+                "SNAPSHOT isolation requires a SQLAlchemy connection, it cannot be set through connectorx"
+            )
+        server = server_key(uri)
+        release = self.acquire(server)
+        try:
+            if self.timeout:
+                future = self._get_executor().submit(pl.read_database_uri, query, uri)
+                try:
+                    data = future.result(timeout=self.timeout)
+                except FutureTimeoutError:
+                    self.metrics.add("timeouts")
+                    # the query keeps its slot until the server finishes it
+                    future.add_done_callback(lambda f: release())
+                    release = None
+                    raise TimeoutError(
+                        f"Query exceeded {self.timeout}s timeout on {server}"
+                    )
+            else:
+                data = pl.read_database_uri(query, uri)
+        finally:
+            if release:
+                release()
+        self.record_rows(server, data.shape[0])
+        return data
+
+    def read_sql(self, query: str, conn: Connection) -> pl.DataFrame:
+        """Run a SQLAlchemy query under the scheduler limits
+
+        Args:
+            query (str): The query
+            conn (Connection): SQLAlchemy connection
+
+        Returns:
+            pl.DataFrame: The query result
+        """
+        server = server_key(conn)
+        with self.slot(server):
+            if self.isolation_level:
+                if conn.in_transaction():
+                    # profiling queries only read, so the open transaction can be ended
+                    conn.rollback()
+                conn = conn.execution_options(isolation_level=self.isolation_level)
+            if self.timeout:
+                set_query_timeout(conn, self.timeout)
+            data = pl.from_pandas(pd.read_sql(text(query), conn))
+        self.record_rows(server, data.shape[0])
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        """Shut down the threads running timed queries, without waiting for queries that timed out"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(thread_name_prefix="query")
+            return self._executor
+
+
+def server_key(cnx) -> str:
+    """Identify the server of a connectorx connection string or SQLAlchemy connection
+
+    Args:
+        cnx (Union[str, Connection]): The connection
+
+    Returns:
+        str: host:port
+    """
+    if isinstance(cnx, str):
+        url = urlparse(cnx)
+        return f"{url.hostname}:{url.port}"
+    url = cnx.engine.url
+    return f"{url.host}:{url.port}"
+
+
+def set_query_timeout(conn: Connection, timeout: float):
+    """Set the timeout of the queries run on a SQLAlchemy connection
+
+    Args:
+        conn (Connection): SQLAlchemy connection
+        timeout (float): Query timeout in seconds
+    """
+    dialect = conn.dialect.name
+    if dialect == "mssql":
+        # pyodbc applies the connection timeout to each statement
+        conn.connection.dbapi_connection.timeout = int(timeout)
+    elif dialect == "mysql":
+        conn.execute(text(f"SET SESSION MAX_EXECUTION_TIME={int(timeout * 1000)}"))
+    else:
+        logger.warning(f"Query timeouts are not supported for {dialect}")
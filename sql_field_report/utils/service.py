@@ -0,0 +1,301 @@
+"""A local HTTP/JSON profiling service
+
+Keeps connection pools, table lists and table profiles warm between jobs, and
+profiles the tables of all jobs on one shared worker pool.
+
+    POST /jobs                 {"url": "sqlite:///crm.db", "tables": ["contacts"]}
+                               {"files": ["exports/*.csv"]}
+                               -> {"job": "<id>", "tables": [...]}
+    GET  /jobs/<id>            the job status and the report rows so far
+    GET  /jobs/<id>/stream     one JSON line per table, as each table completes
+    GET  /health               the service run metrics
+
+Database jobs take a SQLAlchemy URL, with optional "schema" and "tables" (all
+tables of the schema by default). Cached profiles are reused unless the job
+sets "use_cache": false; file profiles are invalidated when the file changes.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import inspect
+
+import sql_field_report.constants.service as service
+
+from .analysis import build_analysis, get_sql_engine_data, profile_data
+from .config import expand_files
+from .databases import ConnectionPool
+from .file_utils import expand_workbooks, read_file
+from .metrics import RunMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache(object):
+    """A thread safe LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class Job(object):
+    """The tables of a profiling job, and their report rows as they complete"""
+
+    def __init__(self, tables: list):
+        self.id = uuid.uuid4().hex
+        self.tables = tables
+        self.results = []
+        self.errors = []
+        self._condition = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return len(self.results) + len(self.errors) == len(self.tables)
+
+    def add_result(self, table: str, rows: list[dict]):
+        with self._condition:
+            self.results.append({"table": table, "rows": rows})
+            self._condition.notify_all()
+
+    def add_error(self, table: str, error: str):
+        with self._condition:
+            self.errors.append({"table": table, "error": error})
+            self._condition.notify_all()
+
+    def as_dict(self) -> dict:
+        with self._condition:
+            return {
+                "job": self.id,
+                "done": self.done,
+                "tables": len(self.tables),
+                "results": list(self.results),
+                "errors": list(self.errors),
+            }
+
+    def stream(self):
+        """Yield each table result or error once, as they complete, until the job is done"""
+        sent = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self.done or len(self.results) + len(self.errors) > sent
+                )
+                items = (self.results + self.errors)[sent:]
+                sent += len(items)
+                done = self.done
+            yield from items
+            if done:
+                return
+
+
+class ProfilingService(object):
+    """Runs profiling jobs on a shared worker pool, with warm pools and caches
+
+    Parameters:
+        workers (int): The number of tables profiled at once, across all jobs
+        pool_size (int): The number of connections kept open per database
+        cache_ttl (float): Seconds table profiles are reused for
+        cache_size (int): The number of table profiles cached
+    """
+
+    def __init__(
+        self,
+        workers: int = service.SERVICE_WORKERS,
+        pool_size: int = service.SERVICE_POOL_SIZE,
+        cache_ttl: float = service.RESULT_CACHE_TTL,
+        cache_size: int = service.RESULT_CACHE_SIZE,
+    ):
+        self.metrics = RunMetrics()
+        self.pool_size = pool_size
+        self.results = ResultCache(cache_size, cache_ttl)
+        self.catalogs = ResultCache(cache_size, service.CATALOG_TTL)
+        self.jobs = OrderedDict()
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="service")
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            for pool in self._pools.values():
+                pool.__exit__(None, None, None)
+            self._pools = {}
+
+    def get_pool(self, url: str) -> ConnectionPool:
+        """Get the warm connection pool of a database, opening it on first use"""
+        with self._lock:
+            if url not in self._pools:
+                self._pools[url] = ConnectionPool(
+                    url, pool_size=self.pool_size, metrics=self.metrics
+                ).__enter__()
+            return self._pools[url]
+
+    def get_tables(self, url: str, schema: str = None) -> list[str]:
+        """Get the tables of a database schema, from the catalog cache if fresh"""
+        key = (url, schema)
+        tables = self.catalogs.get(key)
+        if tables is None:
+            with self.get_pool(url).connect() as conn:
+                tables = inspect(conn).get_table_names(schema=schema)
+            self.catalogs.put(key, tables)
+        return tables
+
+    def submit(self, spec: dict) -> Job:
+        """Queue a profiling job, see the module docstring for the job format
+
+        Args:
+            spec (dict): The job
+
+        Returns:
+            Job: The queued job
+        """
+        if spec.get("url"):
+            url = spec["url"]
+            schema = spec.get("schema")
+            objects = spec.get("tables") or self.get_tables(url, schema)
+            if schema:
+                objects = list([f"{schema}.{t}" for t in objects])
+            pool = self.get_pool(url)
+            tasks = list(
+                [
+                    ((url, t), lambda t=t: profile_data(t, get_sql_engine_data, pool))
+                    for t in objects
+                ]
+            )
+        elif spec.get("files"):
+            objects = expand_workbooks(expand_files(spec["files"]))
+            tasks = list(
+                [
+                    (file_cache_key(o), lambda o=o: profile_data(o, read_file))
+                    for o in objects
+                ]
+            )
+        else:
+            raise ValueError("A job needs a url or files")
+
+        job = Job(list([o[0] if isinstance(o, tuple) else o for o in objects]))
+        with self._lock:
+            self.jobs[job.id] = job
+            finished = list([j for j in self.jobs.values() if j.done])
+            for old in finished[: max(0, len(finished) - service.FINISHED_JOBS_KEPT)]:
+                del self.jobs[old.id]
+
+        use_cache = spec.get("use_cache", True)
+        for table, (key, profile) in zip(job.tables, tasks):
+            self._executor.submit(self._run, job, table, key, profile, use_cache)
+        self.metrics.add("jobs")
+        return job
+
+    def _run(self, job: Job, table: str, key, profile, use_cache: bool):
+        try:
+            profiles = self.results.get(key) if use_cache else None
+            if profiles is None:
+                profiles = profile()
+                self.results.put(key, profiles)
+            else:
+                self.metrics.add("cache_hits")
+            rows = build_analysis(profiles).to_dict(orient="records")
+            job.add_result(table, rows)
+            self.metrics.add("tables")
+        except Exception as e:
+            logger.exception(f"Profiling {table} failed")
+            job.add_error(table, str(e))
+            self.metrics.add("errors")
+
+
+def file_cache_key(obj) -> tuple:
+    """Key a file (or workbook sheet) by its path, size and modification time"""
+    path = obj[1] if isinstance(obj, tuple) else obj
+    stat = os.stat(path)
+    return (obj, stat.st_size, stat.st_mtime_ns)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to the ProfilingService of the server"""
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send_json(404, {"error": "Not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            spec = json.loads(self.rfile.read(length) or b"{}")
+            job = self.server.service.submit(spec)
+        except Exception as e:
+            return self._send_json(400, {"error": str(e)})
+        self._send_json(202, {"job": job.id, "tables": job.tables})
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts == ["health"]:
+            return self._send_json(200, self.server.service.metrics.as_dict())
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self._send_json(404, {"error": "Not found"})
+        job = self.server.service.jobs.get(parts[1])
+        if job is None:
+            return self._send_json(404, {"error": f"No job {parts[1]}"})
+        if parts[2:] == ["stream"]:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for item in job.stream():
+                self.wfile.write(json.dumps(item, default=str).encode("utf-8") + b"\n")
+                self.wfile.flush()
+            return
+        self._send_json(200, job.as_dict())
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def create_server(
+    host: str = service.SERVICE_HOST,
+    port: int = service.SERVICE_PORT,
+    **options,
+) -> ThreadingHTTPServer:
+    """Create the profiling service HTTP server, see ProfilingService for options
+
+    Args:
+        host (str): The address to listen on
+        port (int): The port to listen on, 0 for any free port
+
+    Returns:
+        ThreadingHTTPServer: The server, with the service as server.service
+    """
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = ProfilingService(**options)
+    return server
@@ -0,0 +1,104 @@
+"""K-minimum-values sketches of the distinct values of a column
+
+A sketch keeps the k smallest 64 bit hashes of the distinct values. Sketches
+of different batches of the same column can be merged, and the number of
+distinct values estimated from the merged sketch.
+"""
+
+import polars as pl
+
+import sql_field_report.constants.profiling as profiling
+
+HASH_SPACE = 2**64
+
+
+def distinct_sketch(
+    values: pl.Series, k: int = profiling.DISTINCT_SKETCH_SIZE
+) -> list[int]:
+    """Build a distinct value sketch of a series
+
+    Args:
+        values (pl.Series): the values to sketch
+        k (int): the number of hashes kept
+
+    Returns:
+        list[int]: the k smallest distinct hashes, ascending
+    """
+    return (
+        values.hash(seed=profiling.SKETCH_HASH_SEED).unique().sort().head(k).to_list()
+    )
+
+
+def key_sketch(values: pl.Series, k: int = profiling.KEY_SKETCH_SIZE) -> list[int]:
+    """Build a distinct value sketch of the populated values of a series, as text
+
+    Values are hashed as text, so the sketches of columns read with different
+    types (e.g. an integer id and the same id in a CSV file) can be compared.
+
+    Args:
+        values (pl.Series): the values to sketch
+        k (int): the number of hashes kept
+
+    Returns:
+        list[int]: the k smallest distinct hashes, ascending
+    """
+    values = values.cast(pl.Utf8).drop_nulls()
+    return distinct_sketch(values.filter(values != ""), k)
+
+
+def merge_distinct_sketches(
+    a: list[int], b: list[int], k: int = profiling.DISTINCT_SKETCH_SIZE
+) -> list[int]:
+    """Merge two distinct value sketches
+
+    Args:
+        a (list[int]): a distinct value sketch
+        b (list[int]): a distinct value sketch
+        k (int): the number of hashes kept
+
+    Returns:
+        list[int]: the sketch of the union of both inputs
+    """
+    return sorted(set(a) | set(b))[:k]
+
+
+def estimate_distinct(
+    sketch: list[int], k: int = profiling.DISTINCT_SKETCH_SIZE
+) -> int:
+    """Estimate the number of distinct values from a sketch
+
+    Args:
+        sketch (list[int]): a distinct value sketch
+        k (int): the number of hashes kept
+
+    Returns:
+        int: the exact count if the sketch is not full, otherwise an estimate
+    """
+    if len(sketch) < k:
+        return len(sketch)
+    return int(round((k - 1) / (sketch[k - 1] / HASH_SPACE)))
+
+
+def estimate_containment(a: list[int], b: list[int], k: int) -> tuple[float, int]:
+    """Estimate the share of the distinct values of a found in b from their sketches
+
+    Both sketches hold every hash of their column below their largest hash (or
+    every hash, if not full), so the hashes of a below the smaller of the two
+    thresholds are a uniform sample of a that can be checked against b.
+
+    Args:
+        a (list[int]): a distinct value sketch
+        b (list[int]): a distinct value sketch
+        k (int): the number of hashes kept
+
+    Returns:
+        tuple[float, int]: the estimated containment, and the sample size it is based on
+    """
+    threshold = min(
+        a[-1] if len(a) >= k else HASH_SPACE, b[-1] if len(b) >= k else HASH_SPACE
+    )
+    sample = list([h for h in a if h <= threshold])
+    if not sample:
+        return 0.0, 0
+    found = set(b)
+    return sum(1 for h in sample if h in found) / len(sample), len(sample)
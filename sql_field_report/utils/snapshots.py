@@ -0,0 +1,227 @@
+"""Run snapshots and the diff between two runs
+
+A snapshot is a Parquet file with one row per field of a report, see
+schema.SNAPSHOT_SCHEMA. Two snapshots are diffed with one outer join on
+Table/File + Field, so the diff never reads the source data again.
+"""
+
+import logging
+import os
+from typing import Union
+
+import pandas as pd
+import polars as pl
+
+import sql_field_report.constants.field_report_schema as schema
+import sql_field_report.constants.profiling as profiling
+
+from .analysis import classify_profile
+from .excel import parse_file
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DTYPES = {
+    schema.TABLE_FILE: pl.Utf8,
+    schema.FIELD: pl.Utf8,
+    schema.SOURCE_TYPE: pl.Utf8,
+    schema.COUNT: pl.Int64,
+    schema.POPULATED: pl.Int64,
+    schema.UNIQUE: pl.Int64,
+    schema.DATATYPE: pl.Utf8,
+    schema.CHOICES: pl.List(pl.Utf8),
+    schema.FINGERPRINT: pl.Utf8,
+}
+
+
+def build_snapshot(profiles: list[dict], **thresholds) -> pl.DataFrame:
+    """Build the snapshot of a run from its column profiles
+
+    Args:
+        profiles (list[dict]): the column profiles, see analysis.profile_column
+        thresholds: classification thresholds, see analysis.classify_profile
+
+    Returns:
+        pl.DataFrame: the snapshot, see schema.SNAPSHOT_SCHEMA
+    """
+    rows = []
+    for p in profiles:
+        table, field, count, populated, unique, datatype, _, choices = classify_profile(
+            p, **thresholds
+        )
+        fingerprint = p.get("fingerprint")
+        rows.append(
+            (
+                parse_file(table),
+                field,
+                p.get("dtype"),
+                count,
+                populated,
+                unique,
+                datatype,
+                list([str(c) for c in choices or [] if c is not None]),
+                None if fingerprint is None else ":".join(map(str, fingerprint)),
+            )
+        )
+    return pl.DataFrame(rows, schema=SNAPSHOT_DTYPES, orient="row")
+
+
+def save_snapshot(profiles: list[dict], file_path: str, **thresholds) -> str:
+    """Save the snapshot of a run as Parquet
+
+    Args:
+        profiles (list[dict]): the column profiles, see analysis.profile_column
+        file_path (str): the filepath to write the snapshot to
+        thresholds: classification thresholds, see analysis.classify_profile
+
+    Returns:
+        str: the filepath of the saved snapshot
+    """
+    snapshot = build_snapshot(profiles, **thresholds)
+    snapshot.write_parquet(file_path)
+    logger.info(f"Saved a snapshot of {snapshot.shape[0]} fields to {file_path}")
+    return file_path
+
+
+def load_snapshot(file_path: str) -> pl.LazyFrame:
+    """Scan a snapshot saved with save_snapshot
+
+    Args:
+        file_path (str): the filepath of the snapshot
+
+    Returns:
+        pl.LazyFrame: the snapshot
+    """
+    return pl.scan_parquet(file_path)
+
+
+def diff_snapshots(
+    old: Union[pl.DataFrame, pl.LazyFrame],
+    new: Union[pl.DataFrame, pl.LazyFrame],
+    populated_shift: float = profiling.DIFF_POPULATED_SHIFT,
+    all_fields: bool = False,
+) -> pl.DataFrame:
+    """Diff two run snapshots
+
+    Fields are matched on Table/File + Field. A matched field has changed if
+    its datatype, source type or choices changed, or the share of its rows
+    that are populated moved by at least populated_shift.
+
+    Args:
+        old (Union[pl.DataFrame, pl.LazyFrame]): the earlier snapshot
+        new (Union[pl.DataFrame, pl.LazyFrame]): the later snapshot
+        populated_shift (float): the smallest change of the populated share reported
+        all_fields (bool): keep unchanged fields too
+
+    Returns:
+        pl.DataFrame: the changes, see schema.DIFF_SCHEMA
+    """
+    keys = [schema.TABLE_FILE, schema.FIELD]
+    old, new = old.lazy(), new.lazy()
+    old_tables = old.select(pl.col(schema.TABLE_FILE).unique()).collect()
+    new_tables = new.select(pl.col(schema.TABLE_FILE).unique()).collect()
+
+    def prefixed(frame: pl.LazyFrame, prefix: str) -> pl.LazyFrame:
+        return frame.select(
+            keys
+            + list(
+                [
+                    pl.col(c).alias(prefix + c)
+                    for c in schema.SNAPSHOT_SCHEMA
+                    if c not in keys
+                ]
+            )
+            + [pl.lit(True).alias(prefix)]
+        )
+
+    joined = prefixed(old, schema.OLD).join(
+        prefixed(new, schema.NEW), on=keys, how="full", coalesce=True
+    )
+
+    def share(prefix: str) -> pl.Expr:
+        count = pl.col(prefix + schema.COUNT)
+        return (
+            pl.when(count > 0)
+            .then(pl.col(prefix + schema.POPULATED) / count)
+            .otherwise(0.0)
+        )
+
+    empty = pl.lit([], dtype=pl.List(pl.Utf8))
+    old_choices = pl.col(schema.OLD + schema.CHOICES).fill_null(empty)
+    new_choices = pl.col(schema.NEW + schema.CHOICES).fill_null(empty)
+    in_both = pl.col(schema.OLD).is_not_null() & pl.col(schema.NEW).is_not_null()
+
+    diff = joined.with_columns(
+        (share(schema.NEW) - share(schema.OLD)).alias(schema.POPULATED_SHIFT),
+        new_choices.list.set_difference(old_choices).alias(schema.ADDED_CHOICES),
+        old_choices.list.set_difference(new_choices).alias(schema.REMOVED_CHOICES),
+        (
+            pl.col(schema.OLD + schema.FINGERPRINT)
+            != pl.col(schema.NEW + schema.FINGERPRINT)
+        ).alias(schema.CONTENT_CHANGED),
+    ).with_columns(
+        pl.when(~pl.col(schema.TABLE_FILE).is_in(old_tables[schema.TABLE_FILE]))
+        .then(pl.lit(schema.ADDED_TABLE))
+        .when(~pl.col(schema.TABLE_FILE).is_in(new_tables[schema.TABLE_FILE]))
+        .then(pl.lit(schema.DROPPED_TABLE))
+        .when(pl.col(schema.OLD).is_null())
+        .then(pl.lit(schema.ADDED_FIELD))
+        .when(pl.col(schema.NEW).is_null())
+        .then(pl.lit(schema.DROPPED_FIELD))
+        .when(
+            (
+                pl.col(schema.OLD + schema.DATATYPE)
+                != pl.col(schema.NEW + schema.DATATYPE)
+            )
+            | (
+                pl.col(schema.OLD + schema.SOURCE_TYPE).fill_null("")
+                != pl.col(schema.NEW + schema.SOURCE_TYPE).fill_null("")
+            )
+            | (pl.col(schema.POPULATED_SHIFT).abs() >= populated_shift)
+            | (pl.col(schema.ADDED_CHOICES).list.len() > 0)
+            | (pl.col(schema.REMOVED_CHOICES).list.len() > 0)
+        )
+        .then(pl.lit(schema.CHANGED))
+        .otherwise(pl.lit(schema.UNCHANGED))
+        .alias(schema.CHANGE),
+        # shifts and choice changes only apply to fields in both runs
+        pl.when(in_both).then(pl.col(schema.POPULATED_SHIFT)),
+        pl.when(in_both).then(pl.col(schema.ADDED_CHOICES)),
+        pl.when(in_both).then(pl.col(schema.REMOVED_CHOICES)),
+    )
+
+    if not all_fields:
+        diff = diff.filter(pl.col(schema.CHANGE) != schema.UNCHANGED)
+
+    return diff.select(schema.DIFF_SCHEMA).sort(keys).collect()
+
+
+def write_diff_report(diff: pl.DataFrame, file_path: str) -> str:
+    """Write a diff report, as Excel, CSV or Parquet depending on the file extension
+
+    Args:
+        diff (pl.DataFrame): the changes, see diff_snapshots
+        file_path (str): the filepath of the report, .xlsx, .csv or .parquet
+
+    Returns:
+        str: the filepath of the report
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".parquet":
+        diff.write_parquet(file_path)
+        return file_path
+
+    # choice lists are written as text, like the Choices column of a CSV field report
+    diff = diff.with_columns(
+        pl.col(schema.ADDED_CHOICES).list.join("; "),
+        pl.col(schema.REMOVED_CHOICES).list.join("; "),
+    )
+    if extension == ".csv":
+        diff.write_csv(file_path)
+    else:
+        with pd.ExcelWriter(file_path, engine="openpyxl") as xlsx:
+            diff.to_pandas().to_excel(xlsx, sheet_name="Changes", index=False)
+            ws = xlsx.sheets["Changes"]
+            for col, width in zip("ABC", (30, 50, 16)):
+                ws.column_dimensions[col].width = width
+    logger.info(f"Saved {diff.shape[0]} changes to {file_path}")
+    return file_path
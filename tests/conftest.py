@@ -0,0 +1,10 @@
+import polars as pl
+
+COLOURS = ["Red", "Green", "Blue", "Pink", "Grey"]
+
+
+def get_choice_data(name: str) -> pl.DataFrame:
+    return pl.from_records(
+        data=[(f"{name}{i}", COLOURS[i % 5]) for i in range(20)],
+        schema=["Name", "Colour"],
+    )
@@ -1,11 +1,31 @@
 import os
 import uuid
+from datetime import date
 
 import polars as pl
 
-from sql_field_report import build_dataframe_field_report
-from sql_field_report.utils.analysis import analyze_data
+from sql_field_report import (
+    build_csv_field_report,
+    build_dataframe_field_report,
+    build_reclassified_field_report,
+)
+from sql_field_report.utils.analysis import (
+    analyze_data,
+    build_analysis,
+    format_patterns,
+    iter_field_report,
+    iter_profiles,
+    profile_frame,
+    reclassify_profiles,
+)
 from sql_field_report.utils.file_utils import read_file
+from sql_field_report.utils.profiles import (
+    load_profiles,
+    merge_profiles,
+    save_profiles,
+)
+
+from .conftest import COLOURS, get_choice_data
 
 
 def get_data(name: str) -> pl.DataFrame:
@@ -34,3 +54,195 @@ def test_analyze_data():
         r"data\Account.csv",
         read_file,
     )
+
+
+def test_reclassify():
+    file = f"Test_Report{str(uuid.uuid4())}.xlsx"
+    profile_file = os.path.join("test_output", f"{file}.profiles.jsonl")
+    build_dataframe_field_report(
+        os.path.join("test_output", file),
+        ["test"],
+        get_choice_data,
+        profile_file=profile_file,
+    )
+
+    default = reclassify_profiles(profile_file)
+    assert default["Datatype"].to_list() == ["Single Line", "Choice/Reference"]
+    assert sorted(default["Choices"].to_list()[1]) == sorted(COLOURS)
+
+    relaxed = reclassify_profiles(profile_file, choice_distinct_threshold=0)
+    assert relaxed["Datatype"].to_list() == ["Single Line", "Single Line"]
+
+    detailed = reclassify_profiles(profile_file, patterns=True, stats=True)
+    assert detailed["Patterns"].to_list()[1] != ""
+    assert detailed["Length"].to_list()[1] != ""
+
+    build_reclassified_field_report(os.path.join("test_output", file), profile_file)
+    assert file in os.listdir("test_output")
+
+    os.remove(os.path.join("test_output", file))
+    os.remove(profile_file)
+
+
+def test_type_matches():
+    # the five most common values are numbers, most values are not
+    notes = pl.DataFrame(
+        {"Notes": [str(i % 5) for i in range(50)] + [f"note {i}" for i in range(200)]}
+    )
+    # and the other way round
+    codes = pl.DataFrame(
+        {"Code": [f"n/a {i % 5}" for i in range(50)] + [str(i) for i in range(200)]}
+    )
+    analysis = build_analysis(
+        profile_frame("notes", notes) + profile_frame("codes", codes)
+    )
+    assert analysis["Datatype"].to_list() == ["Single Line", "Number"]
+
+
+def test_cardinality_early_exit():
+    data = pl.from_records(
+        data=[(f"ID-{i}", COLOURS[i % 5]) for i in range(5000)],
+        schema=["Id", "Colour"],
+    )
+
+    ids, colours = profile_frame("test", data)
+    assert ids["sampled"]
+    # near the populated count, so counted exactly
+    assert ids["unique"] == 5000
+    assert ids["populated"] == 5000
+    assert "sampled" not in colours
+    assert colours["unique"] == 5
+
+
+def test_reclassify_sampled():
+    data = pl.from_records(data=[(f"ID-{i // 2}",) for i in range(5000)], schema=["Id"])
+
+    (ids,) = profile_frame("test", data)
+    assert ids["sampled"]
+    assert len(ids["values"]) < ids["unique"] <= ids["populated"]
+
+    analysis = build_analysis([ids], choice_ratio_threshold=0.6)
+    assert analysis["Datatype"].to_list() != ["Choice/Reference"]
+    assert analysis["Choices"].to_list() == [""]
+
+
+def test_choices_past_sketch_size():
+    # 12000 choices on 300k rows, more than a saved profile keeps
+    data = pl.DataFrame({"Code": [f"C{i % 12000}" for i in range(300000)]})
+
+    (codes,) = profile_frame("test", data)
+    assert not codes["truncated"]
+    (row,) = build_analysis([codes]).itertuples(index=False)
+    assert row.Datatype == "Choice/Reference"
+    assert len(row.Choices) == 12000
+
+    profile_file = os.path.join("test_output", f"{uuid.uuid4()}.profiles.jsonl")
+    save_profiles([codes], profile_file)
+    (saved,) = load_profiles(profile_file)
+    assert saved["truncated"] and len(saved["values"]) == 10000
+    os.remove(profile_file)
+
+
+def test_iter_field_report():
+    tables = ["red", "green", "blue"]
+    rows = list(iter_field_report(tables, get_choice_data, max_workers=2))
+    assert sorted(r["Table/File"].iloc[0] for r in rows) == sorted(tables)
+    assert all(r["Field"].to_list() == ["Name", "Colour"] for r in rows)
+
+    file = os.path.join("test_output", f"Test_Report{str(uuid.uuid4())}.csv")
+    build_csv_field_report(file, tables, get_choice_data, max_workers=2)
+    report = pl.read_csv(file)
+    assert report.shape == (6, 8)
+    assert sorted(report["Choices"].drop_nulls()[0].split("; ")) == sorted(COLOURS)
+
+    build_csv_field_report(file, tables, get_choice_data, patterns=True, stats=True)
+    report = pl.read_csv(file)
+    assert report.columns[8:] == [
+        "Min",
+        "Max",
+        "Mean",
+        "Quartiles",
+        "Length",
+        "Patterns",
+    ]
+    assert report.shape == (6, 14)
+
+    os.remove(file)
+
+
+def test_iter_profiles_options():
+    tables = ["red", "red_bak", "green"]
+    fetched = []
+
+    def get_data(name: str) -> pl.DataFrame:
+        fetched.append(name)
+        return get_choice_data(name.replace("_bak", ""))
+
+    profiles = {
+        p[0]["table"]: p
+        for p in iter_profiles(
+            tables, get_data, max_workers=2, skip_duplicates=True, relationships=True
+        )
+    }
+    assert sorted(profiles) == sorted(tables)
+    assert profiles["red_bak"] == list(
+        [dict(p, table="red_bak") for p in profiles["red"]]
+    )
+    assert all("key_sketch" in p for p in profiles["green"])
+
+
+def test_patterns():
+    data = pl.from_records(
+        data=[(f"AB-{1000 + i}", COLOURS[i % 5]) for i in range(4)]
+        + [("12/03/2024", None)],
+        schema=["Code", "Colour"],
+    )
+
+    codes, colours = profile_frame("test", data)
+    assert codes["patterns"] == [["AA-9999", 4], ["99/99/9999", 1]]
+    assert format_patterns(codes) == "AA-9999 (80%); 99/99/9999 (20%)"
+    assert colours["pattern_total"] == 4
+
+    merged = merge_profiles(codes, codes)
+    assert merged["patterns"] == [["AA-9999", 8], ["99/99/9999", 2]]
+    assert format_patterns(merged, top=1) == "AA-9999 (80%)"
+
+    ids = pl.from_records(data=[(f"ID-{i:05}",) for i in range(5000)], schema=["Id"])
+    (sampled,) = profile_frame("test", ids)
+    assert sampled["sampled"]
+    assert format_patterns(sampled) == "AA-99999 (100%)"
+
+    analysis = build_analysis([codes, colours], patterns=True)
+    assert analysis["Patterns"].to_list()[0] == "AA-9999 (80%); 99/99/9999 (20%)"
+
+
+def test_value_stats():
+    data = pl.DataFrame(
+        {
+            "Amount": [1, 2, 3, 4, None],
+            "Text": ["1", "2.5", " 3", "", None],
+            "Code": ["a", "1", "2", "3", "4"],
+            "Date": [date(2020, 1, i) for i in range(1, 6)],
+        }
+    )
+
+    amounts, texts, codes, dates = profile_frame("test", data)
+    assert amounts["stats"] == {"min": 1, "max": 4, "mean": 2.5, "quantiles": [1, 2, 3]}
+    assert texts["stats"]["quantiles"] == [1, 2.5, 3]
+    assert codes["stats"] == {}
+    assert dates["stats"] == {"min": "2020-01-01", "max": "2020-01-05"}
+
+    merged = merge_profiles(
+        amounts, dict(amounts, stats={"min": 0, "max": 2, "mean": 1})
+    )
+    assert merged["stats"] == {"min": 0, "max": 4, "mean": 1.75}
+
+    ids = pl.DataFrame({"Id": range(5000)})
+    (sampled,) = profile_frame("test", ids)
+    assert sampled["sampled"]
+    assert sampled["stats"]["max"] == 4999
+
+    analysis = build_analysis([amounts, texts, codes, dates], stats=True)
+    assert analysis["Min"].to_list() == ["1", "1", "", "2020-01-01"]
+    assert analysis["Quartiles"].to_list()[0] == "1 / 2 / 3"
+    assert analysis["Length"].to_list() == ["", "1-3 (mean 2.0)", "1-1 (mean 1.0)", ""]
@@ -0,0 +1,154 @@
+import asyncio
+import contextlib
+import threading
+import time
+
+import polars as pl
+from sqlalchemy import create_engine, text
+
+from sql_field_report.utils.analysis import (
+    analyze_polars_dataframes,
+    get_sql_engine_data,
+)
+from sql_field_report.utils.async_analysis import (
+    aiter_field_report,
+    aiter_profiles,
+    analyze_async,
+    get_async_engine_data,
+)
+
+from .conftest import get_choice_data
+
+
+def test_async_stub_driver():
+    tables = list([f"table{i}" for i in range(12)])
+    running = []
+    peak = []
+
+    async def get_data(name: str) -> pl.DataFrame:
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+        return get_choice_data(name)
+
+    analysis = asyncio.run(analyze_async(tables, get_data, max_in_flight=4))
+
+    assert max(peak) == 4
+    expected = analyze_polars_dataframes(tables, get_choice_data)
+    # values with tied counts have no defined order
+    ties = ["Top Values", "Choices"]
+    assert analysis.drop(columns=ties).equals(expected.drop(columns=ties))
+
+
+def test_async_sqlite(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.connect() as conn:
+        for table in ["contacts", "companies"]:
+            conn.execute(text(f"CREATE TABLE {table} (name TEXT, city TEXT)"))
+            conn.execute(
+                text(f"INSERT INTO {table} VALUES ('Ann', 'Leeds'), ('Bob', 'York')")
+            )
+        conn.commit()
+
+    async def collect():
+        return list(
+            [
+                rows
+                async for rows in aiter_field_report(
+                    ["contacts", "companies"], get_sql_engine_data, engine
+                )
+            ]
+        )
+
+    rows = asyncio.run(collect())
+    assert sorted(r["Table/File"].iloc[0] for r in rows) == ["companies", "contacts"]
+    assert all(r["Count"].to_list() == [2, 2] for r in rows)
+
+
+class StubAsyncEngine:
+    """An AsyncEngine over a blocking engine, counting the connections held open"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.open = []
+        self.peak = 0
+
+    @contextlib.asynccontextmanager
+    async def connect(self):
+        self.open.append(1)
+        self.peak = max(self.peak, len(self.open))
+        await asyncio.sleep(0.01)
+        try:
+            with self.engine.connect() as conn:
+                yield StubAsyncConnection(conn)
+        finally:
+            self.open.pop()
+
+
+class StubAsyncConnection:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def execute(self, statement):
+        return self.conn.execute(statement)
+
+
+def test_async_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    tables = list([f"contacts{i}" for i in range(8)])
+    with engine.connect() as conn:
+        for table in tables:
+            conn.execute(text(f"CREATE TABLE {table} (name TEXT, city TEXT)"))
+            conn.execute(
+                text(f"INSERT INTO {table} VALUES ('Ann', 'Leeds'), ('Bob', 'York')")
+            )
+        conn.commit()
+
+    async_engine = StubAsyncEngine(engine)
+    analysis = asyncio.run(
+        analyze_async(tables, get_async_engine_data, async_engine, max_in_flight=3)
+    )
+
+    assert async_engine.peak == 3
+    assert analysis["Table/File"].to_list() == [t for t in tables for _ in range(2)]
+    assert analysis["Count"].to_list() == [2] * 16
+
+
+def test_async_blocking_fetch_threads():
+    tables = list([f"table{i}" for i in range(12)])
+    threads = set()
+
+    def get_data(name: str) -> pl.DataFrame:
+        threads.add(threading.current_thread().name)
+        time.sleep(0.01)
+        return get_choice_data(name)
+
+    asyncio.run(analyze_async(tables, get_data, max_in_flight=8, fetch_workers=2))
+
+    assert len(threads) <= 2
+
+
+def test_async_duplicates_and_key_sketches():
+    tables = ["contacts", "contacts_bak", "companies"]
+
+    def get_data(name: str) -> pl.DataFrame:
+        return get_choice_data("contacts" if name == "contacts_bak" else name)
+
+    async def collect():
+        return list(
+            [
+                profiles
+                async for profiles in aiter_profiles(
+                    tables, get_data, skip_duplicates=True, relationships=True
+                )
+            ]
+        )
+
+    profiles = {p[0]["table"]: p for p in asyncio.run(collect())}
+
+    assert sorted(profiles) == sorted(tables)
+    assert profiles["contacts_bak"] == list(
+        [dict(p, table="contacts_bak") for p in profiles["contacts"]]
+    )
+    assert all("key_sketch" in p for p in profiles["companies"])
@@ -0,0 +1,75 @@
+import os
+
+import polars as pl
+import pytest
+
+from sql_field_report.sql_field_report import build_config_field_reports
+from sql_field_report.utils.config import load_config
+
+
+def test_run_config(tmp_path):
+    for client in ["client1", "client2"]:
+        os.makedirs(tmp_path / client)
+        pl.DataFrame({"Name": ["Ann", "Bob"], "City": ["Leeds", "York"]}).write_csv(
+            tmp_path / client / "contacts.csv"
+        )
+    # a file that cannot be read is listed as failed, the job carries on
+    (tmp_path / "client2" / "empty.csv").write_text("")
+
+    config_file = tmp_path / "job.toml"
+    config_file.write_text(f"""
+output_dir = "{(tmp_path / "reports").as_posix()}"
+combined_report = "All.xlsx"
+workers = 2
+
+[[targets]]
+type = "files"
+name = "client1"
+files = ["{(tmp_path / "client1").as_posix()}/*.csv"]
+
+[[targets]]
+type = "files"
+name = "client2"
+files = ["{(tmp_path / "client2").as_posix()}/*.csv"]
+""")
+
+    paths = build_config_field_reports(str(config_file))
+
+    assert sorted(os.listdir(tmp_path / "reports")) == [
+        "All.xlsx",
+        "client1.xlsx",
+        "client2.xlsx",
+    ]
+    assert len(paths) == 3
+    report = pl.read_excel(tmp_path / "reports" / "client2.xlsx")
+    assert sorted(report["Field"].to_list()) == ["City", "ERROR", "Name"]
+
+
+def test_config_validation(tmp_path):
+    config_file = tmp_path / "job.toml"
+    config_file.write_text("""
+[[targets]]
+type = "mssql"
+server = "sql01"
+port = 1433
+user = "reporting"
+database = "Client1"
+""")
+
+    with pytest.raises(ValueError, match="password"):
+        load_config(str(config_file))
+
+    config_file.write_text("""
+isolation_level = "snapshot"
+
+[[targets]]
+type = "mssql"
+server = "sql01"
+port = 1433
+user = "reporting"
+password = "secret"
+database = "Client1"
+""")
+
+    with pytest.raises(ValueError, match="pool_size"):
+        load_config(str(config_file))
@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from sql_field_report.utils.analysis import (
+    analyze_polars_dataframes,
+    get_sql_engine_data,
+)
+from sql_field_report.utils.databases import (
+    ConnectionPool,
+    MSSQLConnectionPool,
+    PooledDBConnection,
+)
+
+
+def test_connection_pool(tmp_path):
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    tables = list([f"contacts{i}" for i in range(6)])
+    with create_engine(url).connect() as conn:
+        for table in tables:
+            conn.execute(text(f"CREATE TABLE {table} (name TEXT, city TEXT)"))
+            conn.execute(
+                text(f"INSERT INTO {table} VALUES ('Ann', 'Leeds'), ('Bob', 'York')")
+            )
+        conn.commit()
+
+    with ConnectionPool(url, pool_size=2) as pool:
+        analysis = analyze_polars_dataframes(
+            tables, get_sql_engine_data, pool, max_workers=4
+        )
+        assert pool.engine.pool.size() == 2
+
+    assert analysis["Count"].to_list() == [2] * 12
+    assert pool.metrics.get("pool_checkouts") == 6
+    assert pool.metrics.get("pool_wait_seconds") > 0
+
+
+def test_connection_retries(tmp_path):
+    url = f"sqlite:///{tmp_path / 'missing' / 'test.db'}"
+    with ConnectionPool(url, retries=2, backoff=0.01) as pool:
+        with pytest.raises(exc.OperationalError):
+            pool.checkout()
+
+    assert pool.metrics.get("connection_retries") == 2
+
+
+def test_pooled_connection_needs_url():
+    with pytest.raises(TypeError):
+        PooledDBConnection("server", 1433, "user", "password", "db")
+
+    pool = MSSQLConnectionPool("server", 1433, "user", "password", "db", pool_size=2)
+    assert pool._url().drivername == "mssql+pyodbc"
@@ -0,0 +1,128 @@
+import polars as pl
+
+from sql_field_report.utils.analysis import profile_frame, profile_objects
+from sql_field_report.utils.duplicates import (
+    column_fingerprint,
+    find_duplicates,
+    sample_frame,
+    series_fingerprint,
+)
+from sql_field_report.utils.profiles import merge_table_profiles
+
+from .conftest import COLOURS
+
+
+def get_data(name: str) -> pl.DataFrame:
+    data = pl.DataFrame(
+        {
+            "Id": [f"ID-{i}" for i in range(20)],
+            "Colour": [COLOURS[i % 5] for i in range(20)],
+        }
+    )
+    if name == "contacts_bak":
+        return data.reverse()
+    if name == "accounts":
+        return data.select(pl.col("Id"), pl.col("Id").alias("Name"))
+    return data
+
+
+def test_fingerprints():
+    values = pl.Series("Colour", ["Red", None, "Red", "Blue", ""])
+    counts = values.value_counts(sort=True)
+    assert column_fingerprint(counts) == series_fingerprint(values)
+    assert series_fingerprint(values.reverse()) == series_fingerprint(values)
+    # nulls and blanks match, a CSV file has no nulls
+    assert series_fingerprint(values.fill_null("")) == series_fingerprint(values)
+    # values are compared as text
+    assert series_fingerprint(pl.Series([1, 2])) == series_fingerprint(
+        pl.Series(["1", "2"])
+    )
+
+    ids = pl.DataFrame({"Id": range(5000)})
+    (sampled,) = profile_frame("test", ids)
+    assert sampled["sampled"]
+    assert sampled["fingerprint"] == series_fingerprint(ids["Id"])
+
+    first = profile_frame("test", get_data("contacts").head(7))
+    rest = profile_frame("test", get_data("contacts").tail(13))
+    merged = merge_table_profiles(first, rest)
+    whole = profile_frame("test", get_data("contacts"))
+    assert [p["fingerprint"] for p in merged] == [p["fingerprint"] for p in whole]
+
+
+def test_skip_duplicates():
+    tables = ["contacts", "contacts_bak", "accounts"]
+    fetched = []
+
+    def get_counted_data(name: str) -> pl.DataFrame:
+        fetched.append(name)
+        return get_data(name)
+
+    profiles = profile_objects(tables, get_counted_data, skip_duplicates=True)
+    assert sorted(fetched) == sorted(tables)
+    assert [(p["table"], p["field"]) for p in profiles] == [
+        ("contacts", "Id"),
+        ("contacts", "Colour"),
+        ("contacts_bak", "Id"),
+        ("contacts_bak", "Colour"),
+        ("accounts", "Id"),
+        ("accounts", "Name"),
+    ]
+    assert profiles[2] == dict(profiles[0], table="contacts_bak")
+
+    duplicates = find_duplicates(profiles)
+    groups = duplicates.groupby("Duplicate Group")
+    assert [list(zip(g["Kind"], g["Table/File"], g["Field"])) for _, g in groups] == [
+        [("Table", "contacts", ""), ("Table", "contacts_bak", "")],
+        [
+            ("Column", "contacts", "Id"),
+            ("Column", "accounts", "Id"),
+            ("Column", "accounts", "Name"),
+        ],
+    ]
+
+
+def test_failed_tables_are_not_duplicates():
+    def get_failing_data(name: str) -> pl.DataFrame:
+        if name.startswith("missing"):
+            return pl.from_records(data=[[0]], schema=["ERROR"])
+        return get_data(name)
+
+    tables = ["missing_a", "missing_b", "contacts"]
+    profiles = profile_objects(tables, get_failing_data, skip_duplicates=True)
+    assert [(p["table"], p["field"]) for p in profiles] == [
+        ("missing_a", "ERROR"),
+        ("missing_b", "ERROR"),
+        ("contacts", "Id"),
+        ("contacts", "Colour"),
+    ]
+    assert not any(p.get("duplicate_of") for p in profiles)
+    assert find_duplicates(profiles).empty
+
+
+def test_sampled_tables_are_not_duplicates():
+    def get_sampled_data(name: str) -> pl.DataFrame:
+        if name == "contacts_top":
+            return sample_frame(get_data("contacts"))
+        return get_data(name)
+
+    tables = ["contacts", "contacts_top"]
+    profiles = profile_objects(tables, get_sampled_data, skip_duplicates=True)
+    assert not any(p.get("duplicate_of") for p in profiles)
+    assert find_duplicates(profiles).empty
+
+    def get_checksum(name: str) -> str:
+        return "checksum"
+
+    profiles = profile_objects(
+        ["contacts_top", "contacts_top_bak"],
+        lambda name: sample_frame(get_data("contacts")),
+        skip_duplicates=True,
+        get_fingerprint=get_checksum,
+    )
+    assert profiles[2] == dict(profiles[0], table="contacts_top_bak")
+    duplicates = find_duplicates(profiles)
+    assert list(zip(duplicates["Kind"], duplicates["Table/File"])) == [
+        ("Table", "contacts_top"),
+        ("Table", "contacts_top_bak"),
+    ]
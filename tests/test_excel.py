@@ -0,0 +1,62 @@
+import pandas as pd
+from openpyxl import load_workbook
+
+import sql_field_report.constants.field_report_schema as schema
+from sql_field_report.utils.excel import generate_excel_report, split_mapping_sheets
+
+
+def get_analysis(tables: dict) -> pd.DataFrame:
+    return pd.DataFrame.from_records(
+        [
+            (
+                table,
+                f"Field{i}",
+                10,
+                10,
+                2,
+                "Choice/Reference",
+                "Yes; No",
+                ["Yes", "No"],
+            )
+            for table, fields in tables.items()
+            for i in range(fields)
+        ],
+        columns=schema.FIELD_REPORT_SCHEMA,
+    )
+
+
+def test_mapping_sheets_spill():
+    analysis = get_analysis({"accounts": 120, "contacts": 3})
+    sheets = split_mapping_sheets(analysis[analysis[schema.CHOICES] != ""])
+
+    assert [(name, len(tables)) for name, tables in sheets] == [
+        ("Mappings- accounts", 50),
+        ("Mappings- accounts (2)", 50),
+        ("Mappings- accounts (3)", 20),
+        ("Mappings- contacts", 3),
+    ]
+    assert sheets[1][1][0] == ("Field50", ["Yes", "No"])
+
+
+def test_mapping_sheet_layout(tmp_path):
+    path = generate_excel_report(
+        get_analysis({"accounts": 60}), str(tmp_path / "report.xlsx")
+    )
+
+    book = load_workbook(path)
+    assert book.sheetnames == [
+        "Field Report",
+        "Mappings- accounts",
+        "Mappings- accounts (2)",
+    ]
+    ws = book["Mappings- accounts"]
+    assert [c.value for c in ws[1][:4]] == [
+        "Field0- Legacy Value",
+        "Field0- Target Value",
+        None,
+        "Field0- Options",
+    ]
+    assert ws["A2"].value == "Yes" and ws["A3"].value == "No"
+    assert ws["D2"].value == "{Insert CRM Options Here}"
+    assert ws["F1"].value == "Field1- Legacy Value"
+    assert book["Mappings- accounts (2)"]["A1"].value == "Field50- Legacy Value"
@@ -0,0 +1,49 @@
+import os
+
+import polars as pl
+
+from sql_field_report.utils.analysis import profile_data
+from sql_field_report.utils.file_groups import find_files, profile_files
+from sql_field_report.utils.file_utils import read_file
+
+
+def test_grouped_files_match_single_files(tmp_path):
+    for i in range(3):
+        pl.DataFrame(
+            {
+                "Name": [f"Name {n}" for n in range(i * 10)],
+                "Colour": (["Red", "Green", ""] * 10)[: i * 10],
+            }
+        ).write_csv(tmp_path / f"part{i}.csv")
+    (tmp_path / "other.csv").write_bytes("Code\n007\n\n008\n".encode("utf-16"))
+    pl.DataFrame({"Amount": [1.5, 2.0, None]}).write_parquet(tmp_path / "a.parquet")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    files = find_files(str(tmp_path))
+    assert len(files) == 5
+
+    grouped = profile_files(files)
+    single = [p for f in files for p in profile_data(f, read_file)]
+
+    # values with tied counts have no defined order
+    for profile in grouped + single:
+        profile["values"] = sorted(profile["values"], key=str)
+    assert grouped == single
+    assert [p["count"] for p in grouped if p["table"].endswith("part0.csv")] == [0, 0]
+
+
+def test_unreadable_files_are_listed(tmp_path):
+    (tmp_path / "a.csv").write_text("Name,Colour\nAnn,Red\n")
+    (tmp_path / "b.csv").write_text("Name,Colour\nBob,Blue\nCy,Red,Extra\n")
+    (tmp_path / "c.csv").write_text("")
+    (tmp_path / "d.xlsx").write_text("not a workbook")
+
+    profiles = profile_files(find_files(str(tmp_path)))
+    rows = [(os.path.basename(p["table"]), p["field"], p["count"]) for p in profiles]
+    assert rows == [
+        ("a.csv", "Name", 1),
+        ("a.csv", "Colour", 1),
+        ("b.csv", "ERROR", 1),
+        ("c.csv", "", 0),
+        ("d.xlsx", "ERROR", 1),
+    ]
@@ -0,0 +1,138 @@
+import pandas as pd
+import polars as pl
+
+from sql_field_report.utils.analysis import analyze_polars_dataframes, profile_data
+from sql_field_report.utils.file_groups import profile_files
+from sql_field_report.utils.file_utils import (
+    check_encoding,
+    expand_workbooks,
+    is_integer_text,
+    parquet_column_stats,
+    read_csv_typed,
+    read_file,
+    read_file_pandas,
+)
+
+ROWS = "Name,City\n" + "".join(f"Zoë{i},Köln\n" for i in range(1000))
+
+
+def test_utf8_fast_path(tmp_path):
+    file = tmp_path / "utf8.csv"
+    file.write_bytes(ROWS.encode("utf-8"))
+
+    assert check_encoding(str(file)) == "utf8"
+    assert read_file(str(file)).row(0) == ("Zoë0", "Köln")
+
+
+def test_byte_outside_sample(tmp_path):
+    file = tmp_path / "cp1252.csv"
+    rows = ["Name,City"] + [f"Name{i},London" for i in range(400_000)]
+    rows[len(rows) // 4] = "Ren\xe9,Paris"
+    file.write_bytes("\n".join(rows).encode("cp1252"))
+
+    # the sample is UTF-8, so the file is read strictly and detected again
+    assert check_encoding(str(file)) == "utf8"
+    for data in (read_file(str(file)), read_file(str(file), typed=True)):
+        assert data.shape == (400_000, 2)
+        assert data.row(len(rows) // 4 - 1) == ("René", "Paris")
+    assert read_file_pandas(str(file)).iloc[len(rows) // 4 - 1, 0] == "René"
+
+    names, cities = profile_files([str(file)])
+    assert names["unique"] == 400_000
+    assert [v for v, _ in cities["values"]] == ["London", "Paris"]
+
+
+def test_transcoded_read(tmp_path):
+    file = tmp_path / "utf16.csv"
+    file.write_bytes(ROWS.encode("utf-16"))
+
+    assert check_encoding(str(file)) == "UTF-16"
+    data = read_file(str(file))
+    assert data.shape == (1000, 2)
+    assert data.row(999) == ("Zoë999", "Köln")
+
+
+def test_workbook_sheets(tmp_path):
+    book = str(tmp_path / "book.xlsx")
+    with pd.ExcelWriter(book) as xlsx:
+        pd.DataFrame({"Code": ["007", "n/a"]}).to_excel(
+            xlsx, sheet_name="Codes", index=False
+        )
+        pd.DataFrame({"Amount": [1.5, 2]}).to_excel(
+            xlsx, sheet_name="Amounts", index=False
+        )
+
+    objects = expand_workbooks([book])
+    assert [o[0] for o in objects] == [f"{book} [Codes]", f"{book} [Amounts]"]
+
+    analysis = analyze_polars_dataframes(objects, read_file, max_workers=2)
+    assert analysis["Field"].to_list() == ["Code", "Amount"]
+    assert read_file(objects[0])["Code"].to_list() == ["007", "n/a"]
+
+
+def test_lazy_formats(tmp_path):
+    data = pl.DataFrame(
+        {
+            "Id": [1, 2, 3],
+            "Status": ["Open", "Open", "Open"],
+            "Region": [7, 7, 7],
+            "Notes": [None, None, None],
+        }
+    )
+    data.write_parquet(tmp_path / "data.parquet")
+    data.write_ipc(tmp_path / "data.arrow")
+    data.write_ndjson(tmp_path / "data.ndjson")
+
+    stats = parquet_column_stats(str(tmp_path / "data.parquet"))
+    assert stats["Region"] == {"null_count": 0, "min": 7, "max": 7}
+    assert stats["Notes"]["null_count"] == 3
+    assert stats["Status"]["min"] is None
+
+    files = list(
+        [str(tmp_path / f"data.{ext}") for ext in ["parquet", "arrow", "ndjson"]]
+    )
+    assert all(isinstance(read_file(f), pl.LazyFrame) for f in files)
+    analysis = analyze_polars_dataframes(files, read_file)
+    for file in files:
+        rows = analysis[analysis["Table/File"] == file]
+        assert rows["Populated"].to_list() == [3, 3, 3, 0]
+        assert rows["Unique"].to_list() == [3, 1, 1, 0]
+
+
+def test_integer_text():
+    assert is_integer_text(pl.Series(["0", "-12", "340", None]))
+    # these would be read back as different text
+    assert not is_integer_text(pl.Series(["-0"]))
+    assert not is_integer_text(pl.Series(["007"]))
+    assert not is_integer_text(pl.Series(["+5"]))
+
+
+def test_typed_read(tmp_path):
+    file = tmp_path / "typed.csv"
+    rows = [f"{i},{['Open', 'Closed'][i % 2]},{i % 3},Note {i}" for i in range(300)]
+    # not canonical integers, so Code is read back as text from this batch on
+    rows[250] = "250,Open,007,Note 250"
+    rows[260] = "260,Open,,Note 260"
+    file.write_text("Id,Status,Code,Notes\n" + "\n".join(rows))
+
+    data = read_csv_typed(str(file), "utf8", sample_rows=100)
+    assert data.dtypes == [pl.Int64, pl.Categorical, pl.Utf8, pl.Utf8]
+    assert data["Code"][250] == "007"
+
+    typed = profile_data(str(file), read_file, typed=True)
+    text = profile_data(str(file), read_file)
+    # values with tied counts have no defined order
+    for profile in typed + text:
+        profile["values"] = sorted(profile["values"], key=str)
+    assert typed == text
+
+
+def test_typed_unique_estimate(tmp_path):
+    file = tmp_path / "ids.csv"
+    # high cardinality, but not near unique, so the unique count is estimated
+    file.write_text("Id\n" + "\n".join(str(i // 2) for i in range(250_000)))
+
+    (typed,) = profile_data(str(file), read_file, typed=True)
+    (text,) = profile_data(str(file), read_file)
+    assert typed["sampled"] and text["sampled"]
+    assert typed["unique"] == text["unique"]
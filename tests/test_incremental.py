@@ -0,0 +1,81 @@
+import os
+import uuid
+from decimal import Decimal
+
+import polars as pl
+
+from sql_field_report.utils.analysis import analyze_data, build_analysis
+from sql_field_report.utils.incremental import profile_incremental
+
+EVENTS = pl.from_records(
+    data=[(i, f"user{i % 7}", ["open", "close", ""][i % 3]) for i in range(1, 31)],
+    schema=["EventId", "User", "Action"],
+)
+
+ROWS = {"events": 20}
+
+
+def get_events(table: str, watermark_column: str = None, watermark=None):
+    data = EVENTS.head(ROWS[table])
+    if watermark is not None:
+        data = data.filter(pl.col(watermark_column) > watermark)
+    return data
+
+
+def test_incremental_matches_full_profile():
+    state_file = os.path.join("test_output", f"state{str(uuid.uuid4())}.json")
+
+    ROWS["events"] = 20
+    first = profile_incremental(["events"], get_events, state_file, "EventId")
+    assert first[0]["count"] == 20
+
+    ROWS["events"] = 30
+    merged = build_analysis(
+        profile_incremental(["events"], get_events, state_file, "EventId")
+    )
+    full = analyze_data("events", get_events)
+
+    for row, expected in zip(merged.itertuples(index=False), full):
+        assert tuple(row)[:6] == expected[:6]
+
+    os.remove(state_file)
+
+
+def test_failed_pull_keeps_state():
+    state_file = os.path.join("test_output", f"state{str(uuid.uuid4())}.json")
+
+    ROWS["events"] = 20
+    first = profile_incremental(["events"], get_events, state_file, "EventId")
+
+    def get_error(table: str, **kwargs):
+        return pl.from_records(data=[[0]], schema=["ERROR"])
+
+    assert profile_incremental(["events"], get_error, state_file, "EventId") == first
+
+    os.remove(state_file)
+
+
+def test_watermark_column_case_and_decimal():
+    state_file = os.path.join("test_output", f"state{str(uuid.uuid4())}.json")
+    amounts = pl.DataFrame(
+        {"Amount": [Decimal(f"{i}.50") for i in range(1, 31)]},
+        schema={"Amount": pl.Decimal(10, 2)},
+    )
+    seen = []
+
+    def get_amounts(table: str, watermark_column: str = None, watermark=None):
+        seen.append(watermark)
+        data = amounts.head(ROWS[table])
+        if watermark is not None:
+            data = data.filter(pl.col("Amount").cast(pl.Float64) > float(watermark))
+        return data
+
+    ROWS["amounts"] = 20
+    profile_incremental(["amounts"], get_amounts, state_file, "[amount]")
+    ROWS["amounts"] = 30
+    merged = profile_incremental(["amounts"], get_amounts, state_file, "[amount]")
+
+    assert seen == [None, Decimal("20.50")]
+    assert merged[0]["count"] == 30
+
+    os.remove(state_file)
@@ -0,0 +1,69 @@
+import os
+import uuid
+
+import polars as pl
+from openpyxl import load_workbook
+
+from sql_field_report import build_dataframe_field_report, build_file_field_report
+from sql_field_report.utils.analysis import build_analysis, profile_objects
+from sql_field_report.utils.relationships import find_relationships
+
+TABLES = {
+    "accounts": pl.DataFrame(
+        {"Id": range(1, 5001), "Region": ["North", "South"] * 2500}
+    ),
+    # ids read as text, as from a CSV file
+    "contacts": pl.DataFrame(
+        {
+            "Email": [f"person{i}@example.com" for i in range(3000)],
+            "AccountId": [str(1 + (i * 7) % 1000) for i in range(3000)],
+        }
+    ),
+    "orders": pl.DataFrame({"OrderNo": range(100000, 108000)}),
+}
+
+
+def get_data(name: str) -> pl.DataFrame:
+    return TABLES[name]
+
+
+def test_find_relationships():
+    profiles = profile_objects(list(TABLES), get_data, key_sketch_size=1024)
+
+    analysis = build_analysis(profiles)
+    assert analysis["Key Candidate"].to_list() == ["Yes", "", "Yes", "", "Yes"]
+
+    relationships = find_relationships(profiles)
+    assert relationships[
+        ["Table/File", "Field", "References Table/File", "References Field"]
+    ].values.tolist() == [["contacts", "AccountId", "accounts", "Id"]]
+    assert relationships["Containment"][0] == 1.0
+
+
+def test_relationships_sheet():
+    file = os.path.join("test_output", f"Test_Report{str(uuid.uuid4())}.xlsx")
+    build_dataframe_field_report(file, list(TABLES), get_data, relationships=True)
+
+    book = load_workbook(file)
+    assert book["Field Report"]["H1"].value == "Key Candidate"
+    assert book["Relationships"]["A2"].value == "contacts"
+
+    os.remove(file)
+
+
+def test_file_relationships(tmp_path):
+    for name, data in TABLES.items():
+        data.write_csv(tmp_path / f"{name}.csv")
+
+    file = str(tmp_path / "Files.xlsx")
+    build_file_field_report(file, str(tmp_path), relationships=True)
+
+    book = load_workbook(file)
+    assert book["Field Report"]["H1"].value == "Key Candidate"
+    row = [c.value for c in book["Relationships"][2]]
+    assert [os.path.basename(row[0]), row[1], os.path.basename(row[2]), row[3]] == [
+        "contacts.csv",
+        "AccountId",
+        "accounts.csv",
+        "Id",
+    ]
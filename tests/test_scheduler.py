@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+import typer
+from sqlalchemy import create_engine, text
+
+from sql_field_report.sql_field_report import MSSQL_Database_Report
+from sql_field_report.utils.analysis import analyze_sql_tables
+from sql_field_report.utils.scheduler import QueryScheduler
+
+
+def test_concurrency_limit():
+    scheduler = QueryScheduler(max_concurrent_queries=2)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def query():
+        with scheduler.slot("server:1433"):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+
+    threads = [threading.Thread(target=query) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(peak) == 2
+
+
+def test_rows_per_second():
+    scheduler = QueryScheduler(rows_per_second=1000)
+    scheduler.record_rows("server:1433", 200)
+
+    start = time.perf_counter()
+    with scheduler.slot("server:1433"):
+        pass
+    assert time.perf_counter() - start >= 0.15
+
+
+def test_sql_report_with_scheduler():
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE contacts (name TEXT, city TEXT)"))
+        conn.execute(
+            text("INSERT INTO contacts VALUES ('Ann', 'Leeds'), ('Bob', 'York')")
+        )
+        conn.commit()
+        scheduler = QueryScheduler(isolation_level="read uncommitted")
+        analysis = analyze_sql_tables(["contacts"], conn, scheduler=scheduler)
+
+    assert analysis["Count"].to_list() == [2, 2]
+    assert scheduler.metrics.get("rows") == 2
+
+
+def test_close_executor():
+    with QueryScheduler(timeout=1) as scheduler:
+        executor = scheduler._get_executor()
+        assert executor.submit(lambda: 1).result() == 1
+    assert scheduler._executor is None
+    assert executor._shutdown
+
+
+def test_snapshot_needs_pool():
+    with pytest.raises(typer.BadParameter, match="pool-size"):
+        MSSQL_Database_Report(
+            "sql01",
+            1433,
+            "user",
+            "secret",
+            "db",
+            "dbo",
+            "report.xlsx",
+            isolation_level="snapshot",
+        )
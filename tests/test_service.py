@@ -0,0 +1,71 @@
+import json
+import threading
+from urllib.request import Request, urlopen
+
+import polars as pl
+import pytest
+from sqlalchemy import create_engine, text
+
+from sql_field_report.utils.service import create_server
+
+
+@pytest.fixture
+def server():
+    server = create_server(port=0, workers=2, pool_size=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+
+def post_job(server: str, spec: dict) -> dict:
+    request = Request(
+        f"{server}/jobs",
+        data=json.dumps(spec).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def stream_job(server: str, job: str) -> list[dict]:
+    with urlopen(f"{server}/jobs/{job}/stream") as response:
+        return list([json.loads(line) for line in response])
+
+
+def test_sqlite_job(server, tmp_path):
+    url = f"sqlite:///{tmp_path / 'crm.db'}"
+    with create_engine(url).connect() as conn:
+        for table in ["contacts", "companies"]:
+            conn.execute(text(f"CREATE TABLE {table} (name TEXT, city TEXT)"))
+            conn.execute(
+                text(f"INSERT INTO {table} VALUES ('Ann', 'Leeds'), ('Bob', 'York')")
+            )
+        conn.commit()
+
+    job = post_job(server, {"url": url})
+    assert sorted(job["tables"]) == ["companies", "contacts"]
+    results = stream_job(server, job["job"])
+    assert sorted(r["table"] for r in results) == ["companies", "contacts"]
+    assert all([row["Count"] for row in r["rows"]] == [2, 2] for r in results)
+
+    # the second job is served from the warm result cache
+    stream_job(server, post_job(server, {"url": url, "tables": ["contacts"]})["job"])
+    with urlopen(f"{server}/health") as response:
+        metrics = json.loads(response.read())
+    assert metrics["cache_hits"] == 1
+    assert metrics["tables"] == 3
+
+
+def test_file_job(server, tmp_path):
+    pl.DataFrame({"Code": ["007", "007", "008"]}).write_csv(tmp_path / "codes.csv")
+
+    job = post_job(server, {"files": [str(tmp_path / "*.csv")]})
+    stream_job(server, job["job"])
+    with urlopen(f"{server}/jobs/{job['job']}") as response:
+        status = json.loads(response.read())
+
+    assert status["done"]
+    assert status["results"][0]["rows"][0]["Top Values"] == "007; 008"
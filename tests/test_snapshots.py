@@ -0,0 +1,69 @@
+import polars as pl
+
+from sql_field_report import build_dataframe_field_report, build_diff_report
+from sql_field_report.utils.snapshots import diff_snapshots, load_snapshot
+
+from .conftest import COLOURS
+
+
+def get_old_data(name: str) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "Name": [f"{name}{i}" for i in range(20)],
+            "Colour": [COLOURS[i % 4] for i in range(20)],
+            "Notes": [None] * 20,
+            "Fax": [f"0{i}" for i in range(20)],
+        }
+    )
+
+
+def get_new_data(name: str) -> pl.DataFrame:
+    return get_old_data(name).select(
+        pl.col("Name"),
+        pl.Series("Colour", [COLOURS[i % 5] for i in range(20)]),
+        pl.Series("Notes", [f"note {i}" for i in range(20)]),
+        pl.Series("Email", [f"{i}@example.com" for i in range(20)]),
+    )
+
+
+def test_diff(tmp_path):
+    old_snapshot = str(tmp_path / "old.parquet")
+    new_snapshot = str(tmp_path / "new.parquet")
+    build_dataframe_field_report(
+        str(tmp_path / "old.xlsx"),
+        ["contacts", "leads"],
+        get_old_data,
+        snapshot_file=old_snapshot,
+    )
+    build_dataframe_field_report(
+        str(tmp_path / "new.xlsx"),
+        ["contacts", "accounts"],
+        get_new_data,
+        snapshot_file=new_snapshot,
+    )
+
+    diff = diff_snapshots(load_snapshot(old_snapshot), load_snapshot(new_snapshot))
+    changes = dict(
+        ((t, f), c)
+        for t, f, c in diff.select("Table/File", "Field", "Change").iter_rows()
+    )
+    assert changes[("contacts", "Colour")] == "Changed"
+    assert changes[("contacts", "Notes")] == "Changed"
+    assert changes[("contacts", "Fax")] == "Dropped Field"
+    assert changes[("contacts", "Email")] == "Added Field"
+    assert changes[("leads", "Name")] == "Dropped Table"
+    assert changes[("accounts", "Name")] == "Added Table"
+    assert ("contacts", "Name") not in changes
+
+    contacts = diff.filter(pl.col("Table/File") == "contacts")
+    colour = contacts.filter(pl.col("Field") == "Colour").row(0, named=True)
+    assert colour["Added Choices"] == ["Grey"]
+    assert colour["Removed Choices"] == []
+    notes = contacts.filter(pl.col("Field") == "Notes").row(0, named=True)
+    assert notes["Populated Shift"] == 1.0
+    assert notes["Content Changed"]
+
+    report = build_diff_report(
+        str(tmp_path / "diff.csv"), old_snapshot, new_snapshot, all_fields=True
+    )
+    assert pl.read_csv(report).shape[0] == diff.shape[0] + 1